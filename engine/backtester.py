@@ -1,49 +1,377 @@
-# engine/backtester.py
+import numpy as np
 import pandas as pd
 from typing import List, Dict, Any
 
-def run_backtest(df: pd.DataFrame, signals: pd.DataFrame) -> Dict[str, Any]:
+BACKTEST_MODES = ("vectorized", "loop")
+
+# Keys of the metrics block returned by compute_metrics and backtest_matrix
+METRIC_NAMES = ("total_return", "max_drawdown", "max_drawdown_duration", "sharpe", "sortino",
+                "exposure", "win_rate", "number_of_trades")
+
+
+def run_backtest(df: pd.DataFrame, signals: pd.DataFrame, mode: str = "vectorized") -> Dict[str, Any]:
     """
     Implements a simple long-only backtest simulation based on entry/exit signals.
-    
+
     Args:
         df: DataFrame containing OHLCV data (indexed by date).
         signals: DataFrame with boolean 'entry' and 'exit' columns.
-        
+        mode: "vectorized" (default) runs the NumPy engine; "loop" runs the
+            original bar-by-bar reference implementation.
+
+    Returns:
+        Dictionary containing numeric backtest results: 'total_return' and
+        'max_drawdown' as fractions, 'number_of_trades', 'trade_log', the
+        per-bar 'equity_curve' and 'position' arrays, 'trade_returns' and the
+        'metrics' block. Use format_results() for display strings.
+    """
+    if mode == "vectorized":
+        return _run_backtest_vectorized(df, signals)
+    if mode == "loop":
+        return _run_backtest_loop(df, signals)
+    raise ValueError(f"Unknown backtest mode: {mode}. Expected one of {BACKTEST_MODES}")
+
+
+def compute_positions(entry: np.ndarray, exit: np.ndarray, initial=False) -> np.ndarray:
+    """
+    Derives the bar-by-bar position state from boolean entry/exit arrays.
+
+    Follows the same rules as the reference loop: an entry opens a position
+    when flat, an exit closes it when long, and a bar carrying both signals
+    flips whatever state the previous bar left.
+
+    Args:
+        entry: Boolean array, True where the entry rule fires. Bars run along
+            axis 0; a 2D (bars x strategies) matrix is handled column-wise.
+        exit: Boolean array of the same shape, True where the exit rule fires.
+        initial: Position held before the first bar (a bool, or one per
+            column), for continuing a run chunk by chunk.
+
+    Returns:
+        Boolean array, True on every bar that ends with an open position.
+    """
+    entry = np.asarray(entry, dtype=bool)
+    exit = np.asarray(exit, dtype=bool)
+    n = len(entry)
+    if n == 0:
+        return np.zeros(entry.shape, dtype=bool)
+
+    # Bars with exactly one signal force the state; bars with both toggle it.
+    setter = entry ^ exit
+    flip_count = np.cumsum(entry & exit, axis=0)
+
+    # Index of the most recent forcing bar (or -1 before the first one)
+    bars = np.arange(n).reshape((n,) + (1,) * (entry.ndim - 1))
+    last_set = np.where(setter, bars, -1)
+    np.maximum.accumulate(last_set, axis=0, out=last_set)
+    has_set = last_set >= 0
+    safe_set = np.where(has_set, last_set, 0)
+
+    base_state = np.where(has_set, np.take_along_axis(entry, safe_set, axis=0), np.asarray(initial, dtype=bool))
+    flips_since = flip_count - np.where(has_set, np.take_along_axis(flip_count, safe_set, axis=0), 0)
+    return base_state ^ (flips_since % 2 == 1)
+
+
+def extract_trades(close: np.ndarray, position: np.ndarray):
+    """
+    Extracts closed trades from a position array.
+
+    Args:
+        close: Array of CLOSE prices (entries and exits fill at CLOSE).
+        position: Boolean position array from compute_positions.
+
+    Returns:
+        Tuple of (entry_idx, exit_idx, entry_price, exit_price, returns) arrays.
+        A position still open on the last bar is not reported as a trade.
+    """
+    close = np.asarray(close, dtype=float)
+    position = np.asarray(position, dtype=bool)
+    previous = np.concatenate(([False], position[:-1]))
+
+    entry_idx = np.flatnonzero(position & ~previous)
+    exit_idx = np.flatnonzero(~position & previous)
+    entry_idx = entry_idx[:len(exit_idx)]
+
+    entry_price = close[entry_idx]
+    exit_price = close[exit_idx]
+    returns = (exit_price / entry_price) - 1.0
+    return entry_idx, exit_idx, entry_price, exit_price, returns
+
+
+def _align_signals(df: pd.DataFrame, signals: pd.DataFrame):
+    """Aligns the signal columns to the data index (missing bars are False)."""
+    aligned = signals.reindex(df.index)
+    entry = aligned['entry'].fillna(False).to_numpy(dtype=bool)
+    exit = aligned['exit'].fillna(False).to_numpy(dtype=bool)
+    return entry, exit
+
+
+
+def bar_returns(close: np.ndarray) -> np.ndarray:
+    """
+    CLOSE-to-CLOSE returns of bars 1..n-1.
+
+    A return that is not finite (a NaN CLOSE from a missing print, or one
+    measured from a zero CLOSE) is 0: the bar is treated as flat instead of turning the rest of the
+    equity curve, and every drawdown metric, into NaN. All backtest paths
+    (vectorized, loop, streaming, incremental) apply this rule.
+    """
+    close = np.asarray(close, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = (close[1:] / close[:-1]) - 1.0
+    returns[~np.isfinite(returns)] = 0.0
+    return returns
+
+
+def compute_equity(close: np.ndarray, position: np.ndarray) -> np.ndarray:
+    """
+    Builds the mark-to-market equity curve (starting at 1.0) from CLOSE returns.
+
+    A position held at the close of bar t-1 earns the CLOSE-to-CLOSE return of
+    bar t, so open trades are marked on every bar rather than only at exit.
+    Non-finite returns count as 0 (see bar_returns).
+
+    Args:
+        close: Array of CLOSE prices.
+        position: Boolean position array from compute_positions (1D, or a
+            2D bars x strategies matrix sharing the same close series).
+
     Returns:
-        Dictionary containing backtest results and metrics.
+        Float array with one equity value per bar (same shape as position).
+    """
+    close = np.asarray(close, dtype=float)
+    position = np.asarray(position, dtype=bool)
+    if len(close) == 0:
+        return np.ones(position.shape)
+    returns = bar_returns(close).reshape((-1,) + (1,) * (position.ndim - 1))
+    strategy_returns = np.where(position[:-1], returns, 0.0)
+    first = np.ones((1,) + position.shape[1:])
+    return np.concatenate((first, np.cumprod(1.0 + strategy_returns, axis=0)))
+
+
+def _metric_arrays(equity: np.ndarray, position: np.ndarray, wins, trades,
+                   periods_per_year: int) -> Dict[str, Any]:
+    # Metrics along axis 0, so one call covers a single curve or a whole
+    # (bars x strategies) matrix. Every statistic is derived from the same bar
+    # returns, running peak and underwater mask.
+    n = len(equity)
+
+    # Drawdown depth and duration from the running peak
+    peak = np.maximum.accumulate(equity, axis=0)
+    drawdown = (peak - equity) / peak
+    underwater = equity < peak
+    bars = np.arange(n).reshape((n,) + (1,) * (equity.ndim - 1))
+    last_high = np.maximum.accumulate(np.where(underwater, 0, bars), axis=0)
+    max_duration = np.max(bars - last_high, axis=0)
+
+    # Risk-adjusted ratios from bar returns
+    returns = (equity[1:] / equity[:-1]) - 1.0
+    shape = equity.shape[1:]
+    sharpe = np.zeros(shape)
+    sortino = np.zeros(shape)
+    if len(returns) > 1:
+        mean = returns.mean(axis=0)
+        std = returns.std(axis=0, ddof=1)
+        downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2, axis=0))
+        scale = np.sqrt(periods_per_year)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe = np.where(std > 0, mean / std * scale, 0.0)
+            sortino = np.where(downside > 0, mean / downside * scale, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win_rate = np.where(trades > 0, wins / np.maximum(trades, 1), 0.0)
+
+    return {
+        'total_return': equity[-1] - 1.0,
+        'max_drawdown': drawdown.max(axis=0),
+        'max_drawdown_duration': max_duration,
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'exposure': np.mean(position, axis=0),
+        'win_rate': win_rate,
+        'number_of_trades': trades,
+    }
+
+
+def compute_metrics(equity: np.ndarray, position: np.ndarray, trade_returns: np.ndarray,
+                    periods_per_year: int = 252) -> Dict[str, float]:
     """
-    
+    Computes the numeric metrics block from a per-bar equity curve.
+
+    Every statistic is derived from the same bar returns, running peak and
+    underwater mask, so the equity array is only traversed once per quantity.
+
+    Args:
+        equity: Per-bar equity curve from compute_equity.
+        position: Boolean position array (for exposure).
+        trade_returns: Returns of the closed trades (for win rate).
+        periods_per_year: Bars per year used to annualize Sharpe/Sortino.
+
+    Returns:
+        Dictionary of plain floats (returns and drawdowns as fractions,
+        drawdown duration in bars).
+    """
+    equity = np.asarray(equity, dtype=float)
+    trade_returns = np.asarray(trade_returns, dtype=float)
+    if len(equity) == 0:
+        return {
+            'total_return': 0.0, 'max_drawdown': 0.0, 'max_drawdown_duration': 0,
+            'sharpe': 0.0, 'sortino': 0.0, 'exposure': 0.0, 'win_rate': 0.0,
+            'number_of_trades': 0,
+        }
+    metrics = _metric_arrays(equity, np.asarray(position, dtype=bool), int(np.sum(trade_returns > 0)),
+                             len(trade_returns), periods_per_year)
+    metrics = {key: float(value) for key, value in metrics.items()}
+    metrics['max_drawdown_duration'] = int(metrics['max_drawdown_duration'])
+    metrics['number_of_trades'] = int(metrics['number_of_trades'])
+    return metrics
+
+
+def backtest_matrix(close: np.ndarray, entries: np.ndarray, exits: np.ndarray,
+                    periods_per_year: int = 252) -> Dict[str, np.ndarray]:
+    """
+    Backtests many strategies on one price series at once.
+
+    Args:
+        close: Array of CLOSE prices, shape (bars,).
+        entries: Boolean entry matrix, shape (bars, strategies).
+        exits: Boolean exit matrix, shape (bars, strategies).
+        periods_per_year: Bars per year used to annualize Sharpe/Sortino.
+
+    Returns:
+        Dictionary mapping each metric name of compute_metrics to an array
+        with one value per strategy (column).
+    """
+    close = np.asarray(close, dtype=float)
+    entries = np.asarray(entries, dtype=bool)
+    exits = np.asarray(exits, dtype=bool)
+    n, width = entries.shape
+    if n == 0:
+        zeros = np.zeros(width)
+        return {'total_return': zeros, 'max_drawdown': zeros, 'max_drawdown_duration': zeros.astype(int),
+                'sharpe': zeros, 'sortino': zeros, 'exposure': zeros, 'win_rate': zeros,
+                'number_of_trades': zeros.astype(int)}
+
+    position = compute_positions(entries, exits)
+    equity = compute_equity(close, position)
+
+    # Closed trades: compare each exit bar's CLOSE with the CLOSE of the entry that opened it
+    previous = np.vstack((np.zeros((1, width), dtype=bool), position[:-1]))
+    entry_bars = position & ~previous
+    exit_bars = ~position & previous
+    bars = np.arange(n)[:, None]
+    last_entry = np.where(entry_bars, bars, 0)
+    np.maximum.accumulate(last_entry, axis=0, out=last_entry)
+    winners = exit_bars & (close[:, None] > close[last_entry])
+
+    return _metric_arrays(equity, position, winners.sum(axis=0), exit_bars.sum(axis=0), periods_per_year)
+
+
+def format_results(results: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Presentation step: renders the numeric backtest metrics as display strings.
+
+    Args:
+        results: Dictionary returned by run_backtest.
+
+    Returns:
+        Dictionary of formatted strings, e.g. {'total_return': "12.34%", ...}.
+    """
+    metrics = results['metrics']
+    return {
+        'total_return': f"{metrics['total_return'] * 100:.2f}%",
+        'max_drawdown': f"{metrics['max_drawdown'] * 100:.2f}%",
+        'max_drawdown_duration': f"{metrics['max_drawdown_duration']} bars",
+        'sharpe': f"{metrics['sharpe']:.2f}",
+        'sortino': f"{metrics['sortino']:.2f}",
+        'exposure': f"{metrics['exposure'] * 100:.2f}%",
+        'win_rate': f"{metrics['win_rate'] * 100:.2f}%",
+        'number_of_trades': str(metrics['number_of_trades']),
+    }
+
+
+def _build_results(equity_curve, position, trade_returns, trades) -> Dict[str, Any]:
+    """Packs the shared result layout used by both backtest modes."""
+    metrics = compute_metrics(equity_curve, position, trade_returns)
+    return {
+        'total_return': metrics['total_return'],
+        'max_drawdown': metrics['max_drawdown'],
+        'number_of_trades': len(trades),
+        'trade_log': trades,
+        'equity_curve': equity_curve,
+        'position': position,
+        'trade_returns': trade_returns,
+        'metrics': metrics,
+    }
+
+
+def run_backtest_arrays(close: np.ndarray, entry: np.ndarray, exit: np.ndarray, index=None) -> Dict[str, Any]:
+    """
+    Vectorized backtest over raw arrays (no DataFrame required).
+
+    Args:
+        close: Array of CLOSE prices.
+        entry: Boolean entry signal array (same length as close).
+        exit: Boolean exit signal array (same length as close).
+        index: Optional sequence of bar labels used for trade dates
+            (defaults to bar positions).
+
+    Returns:
+        Dictionary with the same layout as run_backtest.
+    """
+    close = np.asarray(close, dtype=float)
+    if index is None:
+        index = np.arange(len(close))
+
+    position = compute_positions(entry, exit)
+    entry_idx, exit_idx, entry_price, exit_price, returns = extract_trades(close, position)
+    equity_curve = compute_equity(close, position)
+
+    trades = [
+        {
+            'entry_date': index[i],
+            'entry_price': ep,
+            'exit_date': index[j],
+            'exit_price': xp,
+            'profit_loss': r,
+        }
+        for i, j, ep, xp, r in zip(entry_idx.tolist(), exit_idx.tolist(),
+                                   entry_price.tolist(), exit_price.tolist(), returns.tolist())
+    ]
+    return _build_results(equity_curve, position, returns, trades)
+
+
+def _run_backtest_vectorized(df: pd.DataFrame, signals: pd.DataFrame) -> Dict[str, Any]:
+    """NumPy engine: position state, trades and equity derived with array operations."""
+    entry, exit = _align_signals(df, signals)
+    return run_backtest_arrays(df['CLOSE'].to_numpy(dtype=float), entry, exit, index=df.index)
+
+
+def _run_backtest_loop(df: pd.DataFrame, signals: pd.DataFrame) -> Dict[str, Any]:
+    """Reference implementation: walks every bar with iterrows()."""
+
     # Combine data and signals
-    data = df.join(signals, how='left').fillna(False)
-    
+    data = df.join(signals[['entry', 'exit']], how='left')
+    # Only the signals default to False; a missing CLOSE stays NaN (see bar_returns)
+    data[['entry', 'exit']] = data[['entry', 'exit']].fillna(False).astype(bool)
+
     # Initialize variables
     in_position = False
-    equity_curve = [1.0] # Starting equity normalized to 1.0
+    current_equity = 1.0 # Starting equity normalized to 1.0
+    equity_curve: List[float] = []
+    positions: List[bool] = []
     trades: List[Dict[str, Any]] = []
     current_trade: Dict[str, Any] = {}
-    
-    # Tracking for Drawdown calculation
-    peak_equity = 1.0
-    max_drawdown = 0.0
-    
+    previous_close = None
+
     # --- Simulation Loop ---
     for index, row in data.iterrows():
-        
-        # 1. Update daily equity (for drawdown calculation purposes)
+
+        # 1. Mark the open position to market with this bar's CLOSE return
         if in_position:
-            # Calculate current PnL of the open trade
-            daily_pnl = (row['CLOSE'] / current_trade['entry_price']) - 1.0
-            
-            # Simple equity calculation for tracking peak/drawdown
-            # NOTE: This is a simplified equity tracking focused on realizing final metrics
-            current_equity = equity_curve[-1] 
-            
-            # If the position is open, we need to track the return relative to the market
-            # For simplicity in a trade-by-trade backtest, we primarily update equity only on trade exit.
-            
-        else:
-            current_equity = equity_curve[-1]
+            bar_return = bar_returns([previous_close, float(row['CLOSE'])])[0]
+            current_equity = current_equity * (1.0 + bar_return)
+        previous_close = float(row['CLOSE'])
 
         # 2. Check for ENTRY
         if row['entry'] and not in_position:
@@ -59,39 +387,24 @@ def run_backtest(df: pd.DataFrame, signals: pd.DataFrame) -> Dict[str, Any]:
         # 3. Check for EXIT
         elif row['exit'] and in_position:
             in_position = False
-            
+
             # Calculate PnL for the completed trade
             exit_price = row['CLOSE'] # Exit price is CLOSE
             pnl_return = (exit_price / current_trade['entry_price']) - 1.0 # Profit/loss
-            
-            # Update equity curve
-            new_equity = equity_curve[-1] * (1 + pnl_return)
-            equity_curve.append(new_equity)
-            current_equity = new_equity
-            
+
             # Finalize trade record
             current_trade['exit_date'] = index
             current_trade['exit_price'] = exit_price
             current_trade['profit_loss'] = pnl_return
-            
+
             trades.append(current_trade)
-            
+
             # Reset
             current_trade = {}
 
-        # 4. Drawdown Calculation
-        peak_equity = max(peak_equity, current_equity)
-        drawdown = (peak_equity - current_equity) / peak_equity
-        max_drawdown = max(max_drawdown, drawdown)
-        
-        
-    # --- Final Reporting ---
-    final_equity = equity_curve[-1]
-    total_return = final_equity - 1.0 # Total return
-    
-    return {
-        'total_return': f"{total_return * 100:.2f}%",
-        'max_drawdown': f"{max_drawdown * 100:.2f}%",
-        'number_of_trades': len(trades), # Number of trades
-        'trade_log': trades
-    }
\ No newline at end of file
+        equity_curve.append(current_equity)
+        positions.append(in_position)
+
+    trade_returns = np.array([trade['profit_loss'] for trade in trades], dtype=float)
+    return _build_results(np.array(equity_curve, dtype=float), np.array(positions, dtype=bool),
+                          trade_returns, trades)
@@ -0,0 +1,309 @@
+# engine/bars.py
+"""
+Tick-to-bar aggregation.
+
+Trades (or quotes) are grouped into time, volume or tick-count bars with
+sorted-group reductions: ticks arrive in time order, so every bar is a
+contiguous run of equal bar ids and its OHLCV values come from one
+np.*.reduceat call per column. Tick files are read in chunks; only the
+running aggregate of the bar still open at the end of a chunk is carried,
+so memory is bounded by the chunk size.
+
+build_bars() writes the bars into the columnar market-data store
+(engine.market_store) under "<symbol>.<kind>-<size>", e.g. "ES.time-5min",
+and records the tick file's size and modification time, so each interval is
+built only once per source file.
+"""
+import os
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .market_store import iter_csv_chunks, read_meta, write_symbol
+
+BAR_KINDS = ("time", "volume", "tick")
+
+# Normalized tick columns looked up in order; quotes without a trade price use the BID/ASK midpoint
+PRICE_COLUMNS = ("PRICE", "LAST", "TRADE_PRICE")
+SIZE_COLUMNS = ("SIZE", "VOLUME", "QUANTITY", "QTY")
+
+BAR_FIELDS = ("OPEN", "HIGH", "LOW", "CLOSE", "VOLUME", "TICKS")
+
+
+class BarSpec(NamedTuple):
+    kind: str
+    # Bar width in nanoseconds (time), volume units (volume) or ticks (tick)
+    size: float
+    label: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}-{self.label}"
+
+
+def parse_bar_spec(spec: Union[str, BarSpec]) -> BarSpec:
+    """
+    Parses a bar interval: "5min", "1h", "time:1D", "volume:100000" or "tick:500".
+
+    Time intervals are fixed-width pandas Timedelta strings; time bars are aligned to
+    the Unix epoch (UTC) and labelled with their start, volume and tick bars
+    with the time of their last tick.
+    """
+    if isinstance(spec, BarSpec):
+        return spec
+    kind, _, size = spec.partition(":") if ":" in spec else ("time", "", spec)
+    kind = kind.strip().lower()
+    size = size.strip()
+    if kind not in BAR_KINDS:
+        raise ValueError(f"Unknown bar kind: {kind}. Expected one of {BAR_KINDS}")
+    if kind == "time":
+        try:
+            width = pd.Timedelta(size).value
+        except (ValueError, TypeError):
+            raise ValueError(f"Bar interval {size} is not a fixed-width time offset")
+        if width <= 0:
+            raise ValueError(f"Bar interval must be positive: {size}")
+        return BarSpec(kind, width, size)
+    try:
+        value = float(size)
+    except ValueError:
+        raise ValueError(f"Invalid {kind} bar size: {size}")
+    if value <= 0 or (kind == "tick" and not value.is_integer()):
+        raise ValueError(f"Invalid {kind} bar size: {size}")
+    return BarSpec(kind, value, size)
+
+
+def bar_symbol(symbol: str, spec: Union[str, BarSpec]) -> str:
+    """Store name of the bars of a symbol, e.g. "ES.time-5min"."""
+    return f"{symbol}.{parse_bar_spec(spec).key}"
+
+
+class TickAggregator:
+    """
+    Incremental tick-to-bar aggregation for one bar interval.
+
+    update() takes the next chunk of ticks (sorted by time) and returns the
+    bars completed so far; the bar still open is kept as a running
+    aggregate and returned by flush() at the end of the data.
+    """
+
+    def __init__(self, spec: Union[str, BarSpec]):
+        self.spec = parse_bar_spec(spec)
+        self.ticks = 0
+        self.volume = 0.0
+        self.last_time: Optional[int] = None
+        self._open_bar: Optional[Dict[str, Any]] = None
+
+    def _bar_ids(self, times: np.ndarray, volume: np.ndarray) -> np.ndarray:
+        # volume: running total before each tick, then after the last one
+        kind, width = self.spec.kind, self.spec.size
+        if kind == "time":
+            return times // int(width)
+        if kind == "tick":
+            return (self.ticks + np.arange(len(times))) // int(width)
+        # A bar closes on the tick that reaches the threshold; the next tick opens a new one
+        return np.floor_divide(volume[:-1], width).astype(np.int64)
+
+    def update(self, times: np.ndarray, price: np.ndarray, size: np.ndarray) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Aggregates a chunk of ticks.
+
+        Args:
+            times: int64 nanosecond timestamps, non-decreasing.
+            price: Tick prices.
+            size: Tick sizes (zeros for quotes).
+
+        Returns:
+            'TIME' (int64 ns bar labels) plus BAR_FIELDS arrays of the bars
+            completed by this chunk, or None when none completed.
+        """
+        times = np.asarray(times, dtype=np.int64)
+        price = np.asarray(price, dtype=float)
+        size = np.asarray(size, dtype=float)
+        n = len(times)
+        if n == 0:
+            return None
+        if np.any(times[1:] < times[:-1]) or (self.last_time is not None and times[0] < self.last_time):
+            raise ValueError("Ticks must be sorted by time")
+
+        # One sequential sum continued from the previous chunk, so volume bars
+        # close on the same tick however the ticks are chunked
+        volume = np.cumsum(np.concatenate(([self.volume], size)))
+        ids = self._bar_ids(times, volume)
+        starts = np.concatenate(([0], np.flatnonzero(ids[1:] != ids[:-1]) + 1))
+        ends = np.concatenate((starts[1:], [n]))
+        bars = {
+            'ID': ids[starts],
+            'TIME': ids[starts] * int(self.spec.size) if self.spec.kind == "time" else times[ends - 1],
+            'OPEN': price[starts],
+            'HIGH': np.maximum.reduceat(price, starts),
+            'LOW': np.minimum.reduceat(price, starts),
+            'CLOSE': price[ends - 1],
+            'VOLUME': np.add.reduceat(size, starts),
+            'TICKS': (ends - starts).astype(float),
+        }
+        self.ticks += n
+        self.volume = float(volume[-1])
+        self.last_time = int(times[-1])
+
+        completed = []
+        if self._open_bar is not None:
+            if self._open_bar['ID'] == bars['ID'][0]:
+                # The first group continues the bar left open by the previous chunk
+                previous = self._open_bar
+                bars['OPEN'][0] = previous['OPEN']
+                bars['HIGH'][0] = max(previous['HIGH'], bars['HIGH'][0])
+                bars['LOW'][0] = min(previous['LOW'], bars['LOW'][0])
+                bars['VOLUME'][0] += previous['VOLUME']
+                bars['TICKS'][0] += previous['TICKS']
+            else:
+                completed.append({name: np.array([value]) for name, value in self._open_bar.items()})
+        self._open_bar = {name: values[-1] for name, values in bars.items()}
+        if len(starts) > 1:
+            completed.append({name: values[:-1] for name, values in bars.items()})
+        if not completed:
+            return None
+        return {name: np.concatenate([part[name] for part in completed]) for name in ['TIME', *BAR_FIELDS]}
+
+    def flush(self) -> Optional[Dict[str, np.ndarray]]:
+        """Returns the bar still open (as a one-bar chunk) and resets it."""
+        if self._open_bar is None:
+            return None
+        bar, self._open_bar = self._open_bar, None
+        return {name: np.array([bar[name]]) for name in ['TIME', *BAR_FIELDS]}
+
+
+def tick_columns(chunk: pd.DataFrame, price_column: Optional[str] = None,
+                 size_column: Optional[str] = None):
+    """Returns (price, size) arrays of a normalized tick frame (see PRICE_COLUMNS/SIZE_COLUMNS)."""
+    price_name = price_column.upper() if price_column else next(
+        (name for name in PRICE_COLUMNS if name in chunk.columns), None)
+    if price_name is not None:
+        price = chunk[price_name].to_numpy(dtype=float)
+    elif "BID" in chunk.columns and "ASK" in chunk.columns:
+        price = (chunk["BID"].to_numpy(dtype=float) + chunk["ASK"].to_numpy(dtype=float)) / 2.0
+    else:
+        raise ValueError(f"No price column in ticks: {list(chunk.columns)}")
+    size_name = size_column.upper() if size_column else next(
+        (name for name in SIZE_COLUMNS if name in chunk.columns), None)
+    size = chunk[size_name].to_numpy(dtype=float) if size_name else np.zeros(len(chunk))
+    return price, size
+
+
+def _tick_arrays(chunk: pd.DataFrame, price_column: Optional[str], size_column: Optional[str]):
+    # (int64 UTC ns timestamps, price, size, time zone name or None) of a tick frame
+    index = chunk.index
+    tz = str(index.tz) if index.tz is not None else None
+    if tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    price, size = tick_columns(chunk, price_column, size_column)
+    return index.as_unit("ns").asi8, price, size, tz
+
+
+def _bar_frame(parts: List[Dict[str, np.ndarray]], tz: Optional[str]) -> pd.DataFrame:
+    parts = [part for part in parts if part is not None]
+    columns = {name: np.concatenate([part[name] for part in parts]) if parts else np.empty(0)
+               for name in ['TIME', *BAR_FIELDS]}
+    index = pd.DatetimeIndex(columns.pop('TIME').astype(np.int64).view("M8[ns]"), name="date")
+    if tz is not None:
+        index = index.tz_localize("UTC").tz_convert(tz)
+    return pd.DataFrame(columns, index=index)
+
+
+def aggregate_ticks(chunks: Iterable[pd.DataFrame], specs: Union[str, BarSpec, Sequence[Union[str, BarSpec]]],
+                    price_column: Optional[str] = None,
+                    size_column: Optional[str] = None) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    Aggregates tick chunks into bars, in one pass for several intervals.
+
+    Args:
+        chunks: Tick frames in time order, indexed by timestamp (e.g. from
+            market_store.iter_csv_chunks).
+        specs: One bar interval or a list of them (see parse_bar_spec).
+        price_column: Price column (default: see PRICE_COLUMNS).
+        size_column: Size column (default: see SIZE_COLUMNS).
+
+    Returns:
+        OHLCV(+TICKS) DataFrame for a single spec, or spec key -> DataFrame.
+    """
+    single = isinstance(specs, (str, BarSpec))
+    aggregators = [TickAggregator(spec) for spec in ([specs] if single else specs)]
+    parts: Dict[str, List] = {aggregator.spec.key: [] for aggregator in aggregators}
+    tz = None
+    for chunk in chunks:
+        times, price, size, tz = _tick_arrays(chunk, price_column, size_column)
+        for aggregator in aggregators:
+            parts[aggregator.spec.key].append(aggregator.update(times, price, size))
+    for aggregator in aggregators:
+        parts[aggregator.spec.key].append(aggregator.flush())
+    frames = {key: _bar_frame(values, tz) for key, values in parts.items()}
+    return next(iter(frames.values())) if single else frames
+
+
+def _source_signature(path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "options": options}
+
+
+def build_bars(path: str, root: str, symbol: str, specs: Union[str, Sequence[str]],
+               chunksize: int = 1_000_000, force: bool = False, price_column: Optional[str] = None,
+               size_column: Optional[str] = None, **csv_options) -> Dict[str, str]:
+    """
+    Builds (or reuses) bars of a tick CSV in the columnar store.
+
+    Intervals already built from the same file (same path, size and
+    modification time, same options) are skipped; the missing ones are
+    aggregated in a single chunked pass over the ticks.
+
+    Args:
+        path: Tick CSV, sorted by time.
+        root: Market-data store directory.
+        symbol: Base symbol; bars are stored as bar_symbol(symbol, spec).
+        specs: One bar interval or a list of them (see parse_bar_spec).
+        chunksize: Ticks read per chunk.
+        force: Rebuild even when cached bars exist.
+        price_column: Price column (default: see PRICE_COLUMNS).
+        size_column: Size column (default: see SIZE_COLUMNS).
+        **csv_options: timestamp_column, date_format, tz (see iter_csv_chunks).
+
+    Returns:
+        Bar spec key -> stored symbol name, readable with MarketStore(root).load().
+    """
+    specs = [parse_bar_spec(spec) for spec in ([specs] if isinstance(specs, str) else specs)]
+    source = _source_signature(path, {"price_column": price_column, "size_column": size_column, **csv_options})
+    names = {spec.key: bar_symbol(symbol, spec) for spec in specs}
+
+    missing = []
+    for spec in specs:
+        try:
+            cached = read_meta(root, names[spec.key]).get("source") == source
+        except ValueError:
+            cached = False
+        if force or not cached:
+            missing.append(spec)
+    if missing:
+        chunks = iter_csv_chunks(path, chunksize, **csv_options)
+        frames = aggregate_ticks(chunks, missing, price_column, size_column)
+        for spec in missing:
+            write_symbol(root, names[spec.key], frames[spec.key], extra={"source": source, "bars": spec.key})
+    return names
+
+
+def iter_bar_chunks(chunks: Iterable[pd.DataFrame], spec: Union[str, BarSpec], price_column: Optional[str] = None,
+                    size_column: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Streams bars as they complete, e.g. straight into run_streaming_backtest
+    without storing them.
+    """
+    aggregator = TickAggregator(spec)
+    tz = None
+    for chunk in chunks:
+        times, price, size, tz = _tick_arrays(chunk, price_column, size_column)
+        bars = aggregator.update(times, price, size)
+        if bars is not None:
+            yield _bar_frame([bars], tz)
+    bars = aggregator.flush()
+    if bars is not None:
+        yield _bar_frame([bars], tz)
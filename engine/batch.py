@@ -0,0 +1,271 @@
+# engine/batch.py
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backtester import METRIC_NAMES, backtest_matrix
+from .data_utils import OHLCV_FIELDS, data_fingerprint
+from .dsl_parser import parse_dsl_to_ast
+from .evaluator import compute_indicator_set, evaluate_signals
+from .indicator_cache import IndicatorCache
+from .job_store import JobStore, open_job
+from .optimizer import optimize_ast
+from .results_store import ResultsStore
+from .shared_data import DatasetHandle, SharedDataset, attach_dataset
+from .strategy_cache import ast_hash, canonicalize_ast
+
+
+def frame_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Returns the OHLCV columns of a DataFrame as contiguous float arrays."""
+    return {field: np.ascontiguousarray(df[field].to_numpy(dtype=float))
+            for field in OHLCV_FIELDS if field in df}
+
+
+def indicator_union(asts: Sequence[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Merges the hoisted indicators of several optimized ASTs (temporary names are canonical)."""
+    nodes: Dict[str, Dict[str, Any]] = {}
+    for ast in asts:
+        nodes.update(ast["indicators"])
+    return nodes
+
+
+def signal_matrices(asts: Sequence[Dict[str, Any]], columns: Dict[str, np.ndarray],
+                    indicators: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluates optimized ASTs into entry/exit matrices shaped (bars x strategies).
+
+    Identical comparisons across strategies (e.g. CLOSE > SMA(CLOSE, 20)) are
+    evaluated once.
+    """
+    n = len(columns["CLOSE"])
+    entries = np.empty((n, len(asts)), dtype=bool)
+    exits = np.empty((n, len(asts)), dtype=bool)
+    memo: Dict[str, np.ndarray] = {}
+    for column, ast in enumerate(asts):
+        entries[:, column], exits[:, column] = evaluate_signals(ast, columns, indicators, n, memo)
+    return entries, exits
+
+
+# --- Worker side ---
+
+# Dataset arrays installed once per worker process by _init_worker
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_worker(handle: DatasetHandle, periods_per_year: int):
+    # OHLCV columns and precomputed indicators are views onto one shared mapping
+    arrays = attach_dataset(handle).arrays
+    columns = {field: values for field, values in arrays.items() if field in OHLCV_FIELDS}
+    indicators = {name: values for name, values in arrays.items() if name not in OHLCV_FIELDS}
+    _WORKER_STATE.update(columns=columns, indicators=indicators, periods_per_year=periods_per_year)
+
+
+def _evaluate_chunk(asts: List[Dict[str, Any]], state: Optional[Dict[str, Any]] = None) -> Dict[str, np.ndarray]:
+    # One batched backtest over a chunk of strategies
+    state = state or _WORKER_STATE
+    entries, exits = signal_matrices(asts, state["columns"], state["indicators"])
+    return backtest_matrix(state["columns"]["CLOSE"], entries, exits, periods_per_year=state["periods_per_year"])
+
+
+def iter_backtest_optimized(asts: Sequence[Dict[str, Any]], df: pd.DataFrame, processes: Optional[int] = None,
+                            chunk_size: int = 512, indicator_cache: Optional[IndicatorCache] = None,
+                            periods_per_year: int = 252) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+    """
+    Backtests many optimized ASTs on one dataset, yielding chunk by chunk.
+
+    The union of their indicators is computed once in the calling process
+    and shared with the workers, together with the OHLCV columns, through one
+    SharedDataset; the strategies are then evaluated and backtested in chunks
+    of chunk_size columns, spread over worker processes.
+
+    Args:
+        asts: ASTs returned by optimize_ast.
+        df: OHLCV DataFrame.
+        processes: Worker processes (None: os.cpu_count(); 1: run in-process).
+        chunk_size: Strategies per (bars x chunk_size) signal matrix.
+        indicator_cache: Optional IndicatorCache shared with other runs.
+        periods_per_year: Bars per year used to annualize Sharpe/Sortino.
+
+    Yields:
+        (offset, metrics) in input order: the position of the chunk's first
+        AST and metric name -> array with one value per AST of the chunk.
+    """
+    if not asts:
+        return
+    columns = frame_columns(df)
+    fingerprint = data_fingerprint(df) if indicator_cache is not None else None
+    indicators = compute_indicator_set(indicator_union(asts), columns, cache=indicator_cache,
+                                       fingerprint=fingerprint, index=df.index)
+
+    offsets = range(0, len(asts), chunk_size)
+    chunks = [list(asts[start:start + chunk_size]) for start in offsets]
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(chunks) == 1:
+        state = {"columns": columns, "indicators": indicators, "periods_per_year": periods_per_year}
+        for start, chunk in zip(offsets, chunks):
+            yield start, _evaluate_chunk(chunk, state)
+    else:
+        with SharedDataset.from_arrays({**columns, **indicators}) as shared, \
+                ProcessPoolExecutor(max_workers=min(processes, len(chunks)), initializer=_init_worker,
+                                    initargs=(shared.handle, periods_per_year)) as pool:
+            # map() yields in submission order, keeping columns aligned with the input
+            yield from zip(offsets, pool.map(_evaluate_chunk, chunks))
+
+
+def backtest_optimized(asts: Sequence[Dict[str, Any]], df: pd.DataFrame, processes: Optional[int] = None,
+                       chunk_size: int = 512, indicator_cache: Optional[IndicatorCache] = None,
+                       periods_per_year: int = 252) -> Dict[str, np.ndarray]:
+    """
+    Backtests many optimized ASTs on one dataset (see iter_backtest_optimized).
+
+    Returns:
+        Metric name -> array with one value per AST, in input order.
+    """
+    results = [metrics for _, metrics in iter_backtest_optimized(
+        asts, df, processes=processes, chunk_size=chunk_size, indicator_cache=indicator_cache,
+        periods_per_year=periods_per_year)]
+    if not results:
+        columns = frame_columns(df)
+        return _evaluate_chunk([], {"columns": columns, "indicators": {}, "periods_per_year": periods_per_year})
+    return {key: np.concatenate([chunk[key] for chunk in results]) for key in results[0]}
+
+
+def backtest_checkpointed(asts: Sequence[Dict[str, Any]], keys: Sequence[str], df: pd.DataFrame,
+                          store: Optional[JobStore] = None,
+                          labels: Optional[Sequence[Dict[str, Any]]] = None, **options) -> Dict[str, np.ndarray]:
+    """
+    backtest_optimized() with completed strategies persisted to a JobStore.
+
+    Strategies whose key is already in the store are not run again; the
+    others are appended to the store as each chunk finishes, so an
+    interrupted job resumes where it stopped.
+
+    Args:
+        asts: ASTs returned by optimize_ast.
+        keys: One unique, stable key per AST.
+        df: OHLCV DataFrame.
+        store: JobStore to resume from and write to (None: plain backtest_optimized).
+        labels: Optional JSON-serializable fields stored with each AST's
+            metrics (e.g. its parameters), for reading partial results.
+        **options: Passed to iter_backtest_optimized.
+
+    Returns:
+        Metric name -> array with one value per AST, in input order.
+    """
+    if store is None:
+        return backtest_optimized(asts, df, **options)
+    pending = [position for position, key in enumerate(keys) if key not in store]
+    for start, metrics in iter_backtest_optimized([asts[position] for position in pending], df, **options):
+        count = len(next(iter(metrics.values())))
+        positions = pending[start:start + count]
+        store.append_many(
+            (keys[position], {**(labels[position] if labels else {}),
+                              **{name: values[column].item() for name, values in metrics.items()}})
+            for column, position in enumerate(positions))
+    records = [store.get(key) for key in keys]
+    return {name: np.array([record[name] for record in records]) for name in METRIC_NAMES}
+
+
+class BatchPlan:
+    """
+    A list of DSL strategies compiled into one evaluation plan.
+
+    Each strategy is parsed, canonicalized and optimized once. Strategies
+    with the same canonical AST share a column, and all columns share one
+    indicator set, so evaluating the plan computes e.g. SMA(CLOSE, 20) once
+    no matter how many rules use it.
+    """
+
+    def __init__(self, strategies: Sequence[str]):
+        self.strategies = list(strategies)
+        unique: "OrderedDict[str, int]" = OrderedDict()
+        self.asts: List[Dict[str, Any]] = []
+        columns = []
+        for position, text in enumerate(self.strategies):
+            try:
+                canonical = canonicalize_ast(parse_dsl_to_ast(text))
+            except ValueError as e:
+                raise ValueError(f"Strategy {position}: {e}")
+            key = ast_hash(canonical)
+            if key not in unique:
+                unique[key] = len(self.asts)
+                self.asts.append(optimize_ast(canonical))
+            columns.append(unique[key])
+        self.keys = list(unique)
+        first = {column: position for position, column in reversed(list(enumerate(columns)))}
+        self._labels = [{"strategy": self.strategies[first[column]]} for column in range(len(self.asts))]
+        # Input strategy -> column of the (deduplicated) signal matrices
+        self.column_index = np.asarray(columns, dtype=np.intp)
+        self.indicators = indicator_union(self.asts)
+
+    def __len__(self):
+        return len(self.strategies)
+
+    def signal_matrices(self, df: pd.DataFrame,
+                        indicator_cache: Optional[IndicatorCache] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (entries, exits) shaped (bars x strategies), one column per input strategy."""
+        columns = frame_columns(df)
+        fingerprint = data_fingerprint(df) if indicator_cache is not None else None
+        indicators = compute_indicator_set(self.indicators, columns, cache=indicator_cache,
+                                           fingerprint=fingerprint, index=df.index)
+        entries, exits = signal_matrices(self.asts, columns, indicators)
+        return entries[:, self.column_index], exits[:, self.column_index]
+
+    def run(self, df: pd.DataFrame, processes: Optional[int] = None, chunk_size: int = 512,
+            indicator_cache: Optional[IndicatorCache] = None, periods_per_year: int = 252,
+            checkpoint: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Backtests the plan (see backtest_optimized); arrays have one value per
+        input strategy. With a checkpoint path, completed strategies are
+        persisted there and skipped when the job is rerun.
+        """
+        with open_job(checkpoint, "batch", df, periods_per_year=periods_per_year) as store:
+            metrics = backtest_checkpointed(self.asts, self.keys, df, store, labels=self._labels,
+                                            processes=processes, chunk_size=chunk_size,
+                                            indicator_cache=indicator_cache, periods_per_year=periods_per_year)
+        return {key: values[self.column_index] for key, values in metrics.items()}
+
+
+def run_batch(strategies: Sequence[str], df: pd.DataFrame, metric: Optional[str] = None,
+              ascending: bool = False, processes: Optional[int] = None, chunk_size: int = 512,
+              indicator_cache: Optional[IndicatorCache] = None, periods_per_year: int = 252,
+              checkpoint: Optional[str] = None,
+              results_store: Optional[ResultsStore] = None) -> pd.DataFrame:
+    """
+    Backtests a list of DSL strategies against one dataset.
+
+    Args:
+        strategies: DSL strategy texts.
+        df: OHLCV DataFrame.
+        metric: Optional compute_metrics key to sort by (default: input order).
+        ascending: Sort order for metric.
+        processes: Worker processes (None: os.cpu_count(); 1: run in-process).
+        chunk_size: Strategies per batched backtest.
+        indicator_cache: Optional IndicatorCache shared with other runs.
+        periods_per_year: Bars per year used to annualize Sharpe/Sortino.
+        checkpoint: Optional JSON-lines path; completed strategies are
+            appended there and skipped when the job is restarted.
+        results_store: Optional ResultsStore; one row per input strategy is
+            appended to it, keyed by the canonical AST hash.
+
+    Returns:
+        DataFrame with a 'strategy' column followed by the metrics, one row
+        per input strategy.
+    """
+    if metric is not None and metric not in METRIC_NAMES:
+        raise ValueError(f"Unknown metric: {metric}")
+    plan = BatchPlan(strategies)
+    table = pd.DataFrame({"strategy": plan.strategies})
+    for key, values in plan.run(df, processes=processes, chunk_size=chunk_size, indicator_cache=indicator_cache,
+                                periods_per_year=periods_per_year, checkpoint=checkpoint).items():
+        table[key] = values
+    if results_store is not None:
+        results_store.append_frame(table, [plan.keys[column] for column in plan.column_index],
+                                   strategy_column="strategy")
+    if metric is None:
+        return table
+    return table.sort_values(metric, ascending=ascending, kind="mergesort").reset_index(drop=True)
@@ -0,0 +1,194 @@
+# engine/catalog.py
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .market_store import MarketStore, TimeLike, read_meta, slice_frame
+
+
+class SymbolData(NamedTuple):
+    # One symbol held in memory: metadata, timestamps and columns
+    meta: dict
+    timestamps: np.ndarray
+    columns: Dict[str, np.ndarray]
+    nbytes: int
+
+
+class SymbolCatalog:
+    """
+    Lazily loaded view of a columnar market-data store (engine.market_store).
+
+    Listing symbols and their coverage reads only the per-symbol metadata.
+    A symbol's columns are read into memory on first access and kept in an
+    LRU bounded by max_bytes of array data; symbols larger than the budget
+    are returned without being cached. prefetch() loads symbols on a small
+    thread pool ahead of use (file reads and copies release the GIL), and a
+    get() for a symbol being prefetched waits for that load instead of
+    starting a second one. Returned frames share the cached arrays, treat
+    them as read-only.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 1024 * 1024 * 1024, prefetch_workers: int = 2):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.prefetch_workers = prefetch_workers
+        self._store = MarketStore(root)
+        self._entries: "OrderedDict[str, SymbolData]" = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, symbol):
+        return symbol in self._entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.current_bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions, "pending": len(self._pending)}
+
+    # --- Metadata ---
+
+    def symbols(self) -> List[str]:
+        return self._store.symbols()
+
+    def coverage(self, symbols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Date coverage of the stored symbols, from metadata alone.
+
+        Returns:
+            DataFrame indexed by symbol with 'start', 'end', 'rows' and 'fields'.
+        """
+        rows = []
+        for symbol in (self.symbols() if symbols is None else symbols):
+            meta = read_meta(self.root, symbol)
+            rows.append({"symbol": symbol, "start": pd.Timestamp(meta["start"]) if meta.get("start") else None,
+                         "end": pd.Timestamp(meta["end"]) if meta.get("end") else None,
+                         "rows": meta["rows"], "fields": tuple(meta["fields"])})
+        return pd.DataFrame(rows, columns=["symbol", "start", "end", "rows", "fields"]).set_index("symbol")
+
+    # --- Loading ---
+
+    def _read(self, symbol: str) -> SymbolData:
+        # Copies the mapped files into memory; runs on prefetch threads too
+        meta, timestamps, columns = MarketStore(self.root).open(symbol)
+        timestamps = np.array(timestamps)
+        columns = {field: np.array(values) for field, values in columns.items()}
+        for values in [timestamps, *columns.values()]:
+            values.setflags(write=False)
+        nbytes = timestamps.nbytes + sum(values.nbytes for values in columns.values())
+        return SymbolData(meta, timestamps, columns, nbytes)
+
+    def _put(self, symbol: str, data: SymbolData):
+        # Caller holds the lock
+        if symbol in self._entries:
+            self.current_bytes -= self._entries.pop(symbol).nbytes
+        if data.nbytes > self.max_bytes:
+            return
+        self._entries[symbol] = data
+        self.current_bytes += data.nbytes
+        while self.current_bytes > self.max_bytes:
+            self.current_bytes -= self._entries.popitem(last=False)[1].nbytes
+            self.evictions += 1
+
+    def data(self, symbol: str) -> SymbolData:
+        """Returns the in-memory arrays of a symbol, loading them on first access."""
+        with self._lock:
+            data = self._entries.get(symbol)
+            if data is not None:
+                self.hits += 1
+                self._entries.move_to_end(symbol)
+                return data
+            self.misses += 1
+            future = self._pending.get(symbol)
+        if future is not None:
+            return future.result()
+        data = self._read(symbol)
+        with self._lock:
+            self._put(symbol, data)
+        return data
+
+    def get(self, symbol: str, start: TimeLike = None, end: TimeLike = None,
+            fields: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Bars of a symbol with start <= timestamp < end (see market_store.slice_frame).
+
+        Returns:
+            DataFrame whose columns are views onto the cached arrays.
+        """
+        data = self.data(symbol)
+        return slice_frame(data.meta, data.timestamps, data.columns, start, end, fields)
+
+    def _load_async(self, symbol: str) -> SymbolData:
+        try:
+            data = self._read(symbol)
+            with self._lock:
+                self._put(symbol, data)
+            return data
+        finally:
+            with self._lock:
+                self._pending.pop(symbol, None)
+
+    def prefetch(self, symbols: Iterable[str]) -> List[Future]:
+        """
+        Starts loading symbols in the background; cached or already pending
+        symbols are skipped.
+
+        Returns:
+            The futures of the loads started by this call.
+        """
+        futures = []
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.prefetch_workers,
+                                                    thread_name_prefix="catalog-prefetch")
+            for symbol in symbols:
+                if symbol in self._entries or symbol in self._pending:
+                    continue
+                read_meta(self.root, symbol)
+                future = self._executor.submit(self._load_async, symbol)
+                self._pending[symbol] = future
+                futures.append(future)
+        return futures
+
+    def iter_symbols(self, symbols: Sequence[str], start: TimeLike = None, end: TimeLike = None,
+                     lookahead: int = 2) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        Yields (symbol, frame) in order while the next lookahead symbols are
+        prefetched, so a batch job overlaps loading with its own work.
+        """
+        symbols = list(symbols)
+        for position, symbol in enumerate(symbols):
+            self.prefetch(symbols[position + 1:position + 1 + lookahead])
+            yield symbol, self.get(symbol, start, end)
+
+    def frames(self, symbols: Sequence[str], start: TimeLike = None, end: TimeLike = None) -> Dict[str, pd.DataFrame]:
+        """Loads several symbols (in parallel) into a dict, e.g. for run_portfolio."""
+        self.prefetch(symbols)
+        return {symbol: self.get(symbol, start, end) for symbol in symbols}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def close(self):
+        """Waits for pending prefetches and stops the prefetch threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -1,4 +1,5 @@
-from .data_utils import calculate_sma # Import helper functions
+from .indicators import get_indicator, indicator_inputs, resolve_params # Indicator registry
+from .optimizer import optimize_ast
 
 # Dictionary to map DSL operators to Python/Pandas operators
 OP_MAP = {
@@ -12,19 +13,44 @@ OP_MAP = {
     "OR": "|",
 }
 
-# Mapping indicator names to the required function call syntax
-INDICATOR_MAP = {
-    "SMA": "calculate_sma",  # Uses the helper function from data_utils
-    # "RSI": "calculate_rsi", # Placeholder for RSI (needs implementation in data_utils)
+# Indicator call syntax per target. Which indicators exist, which columns they
+# read and their default parameters all come from the engine.indicators registry.
+# Both helpers consult the optional session IndicatorCache passed to the
+# generated function (pandas: data_utils.calculate_indicator returns a Series;
+# numpy: indicator_cache.lookup_indicator returns an ndarray).
+INDICATOR_CALLS = {
+    "pandas": "calculate_indicator(df, {name!r}, {field!r}, {params}, cache=indicator_cache, fingerprint=fingerprint)",
+    "numpy": "lookup_indicator(indicator_cache, fingerprint, {name!r}, {fields}, {inputs}, {param_tuple})",
 }
 
+# Higher-timeframe indicators (e.g. SMA@W(CLOSE, 20)) go through engine.timeframes,
+# which resamples the bars once per timeframe and aligns the result to the base index
+TIMEFRAME_INDICATOR_CALLS = {
+    "pandas": "calculate_indicator(df, {name!r}, {field!r}, {params}, cache=indicator_cache, fingerprint=fingerprint, timeframe={timeframe!r})",
+    "numpy": "lookup_timeframe_indicator(indicator_cache, fingerprint, {name!r}, {fields}, {inputs}, {param_tuple}, {timeframe!r}, index)",
+}
+
+# Supported code generation targets
+TARGETS = ("pandas", "numpy", "live")
+
+# Version of the generated source. Part of the on-disk strategy cache key
+# (engine.strategy_cache), so sources written by an older generator are never
+# reloaded: bump it whenever the templates, the optimizer output they consume
+# or the helpers they call change.
+CODEGEN_VERSION = 6
+
+# The NumPy target passes one contiguous array per OHLCV column, in this order
+ARRAY_FIELDS = ("OPEN", "HIGH", "LOW", "CLOSE", "VOLUME")
+
 
 # engine/code_generator.py (Inside _generate_expression function)
 
 # engine/code_generator.py (Inside _generate_expression function)
 
-def _generate_expression(node):
+def _generate_expression(node, target="pandas"):
     # This assumes the AST is passed as a dictionary.
+    # target="pandas" references df['FIELD'] columns; target="numpy" references
+    # the per-column ndarray arguments of calculate_signal_arrays by name.
 
     if not isinstance(node, dict):
         # Handle cases where the node is still a raw token or tree fragment
@@ -68,9 +94,11 @@ def _generate_expression(node):
         # We must confirm the DSL Parser is correctly implemented.
 
         # Let's assume the Code Generator can be fixed by just recursing into the next node:
-        return _generate_expression(node.get('value') or node.get('content')) # <-- This is a common pattern
+        return _generate_expression(node.get('value') or node.get('content'), target) # <-- This is a common pattern
 
     elif node_type == "series":
+        if target in ("numpy", "live"):
+            return node['data']
         return f"df['{node['data']}']"
     
     elif node_type == "value":
@@ -79,31 +107,114 @@ def _generate_expression(node):
     elif node_type == "indicator":
         name = node['name']
         params = node['params']
-        func = INDICATOR_MAP.get(name)
-        if not func:
-            raise ValueError(f"Unknown indicator: {name}")
+        get_indicator(name)  # raises ValueError("Unknown indicator: ...")
+        field = params[0]
+        values = resolve_params(name, params[1:])
+        for value in values:
+            if isinstance(value, dict):
+                raise ValueError(f"Unbound template parameter: ${value['name']}")
+        numbers = ", ".join(repr(p) for p in values)
         # Call the indicator function with the parameters
-        # For SMA(CLOSE, 20), this generates: calculate_sma(df['CLOSE'], 20)
-        field_ref = f"df['{params[0]}']"
-        period = params[1]
-        return f"{func}({field_ref}, {period})"
+        # For SMA(CLOSE, 20), this generates: calculate_indicator(df, 'SMA', 'CLOSE', 20)
+        # (or compute_indicator('SMA', (CLOSE,), (20,)) for the NumPy target)
+        columns = indicator_inputs(name, field)
+        inputs = f"({columns[0]},)" if len(columns) == 1 else f"({', '.join(columns)})"
+        calls = TIMEFRAME_INDICATOR_CALLS if node.get('timeframe') else INDICATOR_CALLS
+        return calls[target].format(name=name, field=field, inputs=inputs, fields=repr(columns),
+                                    params=numbers, param_tuple=repr(tuple(values)),
+                                    timeframe=node.get('timeframe'))
+    
+    elif node_type == "temp":
+        # Indicator hoisted by optimize_ast into a precomputed variable
+        return node['name']
+    
+    elif node_type == "constant":
+        # Comparison folded by optimize_ast to a scalar
+        return str(bool(node['data']))
+    
+    elif node_type == "param":
+        # Template placeholders must be bound (engine.sweep.bind_params) first
+        raise ValueError(f"Unbound template parameter: ${node['name']}")
     
     elif node_type == "comparison":
-        left = _generate_expression(node['left'])
-        right = _generate_expression(node['right'])
+        left = _generate_expression(node['left'], target)
+        right = _generate_expression(node['right'], target)
         op = OP_MAP.get(node['op'], node['op'])
         return f"({left} {op} {right})"
     
     elif node_type == "binary_op":
-        left = _generate_expression(node['left'])
-        right = _generate_expression(node['right'])
+        left = _generate_expression(node['left'], target)
+        right = _generate_expression(node['right'], target)
         op = OP_MAP.get(node['op'], node['op'])
         return f"({left} {op} {right})"
     
     else:
         # If the node type is still 'condition' here, the Code Generator logic needs the fix above.
         raise ValueError(f"Unknown AST node type: {node_type} or incorrect data type passed.")
-def generate_python_strategy(ast: dict) -> str:
+def _collect_fields(node, fields):
+    # Records every OHLCV column an expression reads (directly or via an indicator)
+    if not isinstance(node, dict):
+        return fields
+    node_type = node.get("type")
+    if node_type == "series":
+        fields.add(node['data'])
+    elif node_type == "indicator":
+        fields.update(indicator_inputs(node['name'], node['params'][0]))
+    for key in ("left", "right", "value", "content"):
+        if key in node:
+            _collect_fields(node[key], fields)
+    return fields
+
+
+def _uses_timeframes(node) -> bool:
+    # True when any indicator of the expression has a timeframe qualifier
+    if not isinstance(node, dict):
+        return False
+    if node.get("type") == "indicator" and node.get("timeframe"):
+        return True
+    return any(_uses_timeframes(node[key]) for key in ("left", "right", "value", "content") if key in node)
+
+
+def _fingerprint_condition(ast: dict) -> str:
+    # Timeframe indicators always fingerprint the data, so that they share one
+    # resampled copy per timeframe (engine.timeframes.RESAMPLE_CACHE)
+    nodes = [ast.get('entry'), ast.get('exit'), *ast.get('indicators', {}).values()]
+    if any(_uses_timeframes(node) for node in nodes):
+        return "fingerprint is None"
+    return "indicator_cache is not None and fingerprint is None"
+
+
+def _generate_indicator_block(ast: dict, target: str) -> str:
+    # Assignment lines for the temporaries hoisted by optimize_ast (if any)
+    lines = [
+        f"    {name} = {_generate_expression(node, target)}\n"
+        for name, node in ast.get('indicators', {}).items()
+    ]
+    return "".join(lines)
+
+
+def generate_python_strategy(ast: dict, target: str = "pandas") -> str:
+    """
+    Generates the source of a 'calculate_signals(df)' function from the AST.
+
+    Args:
+        ast: Dictionary AST produced by parse_dsl_to_ast.
+        target: "pandas" (default) emits Series arithmetic on df columns;
+            "numpy" emits a 'calculate_signal_arrays' function over raw
+            contiguous ndarrays plus a thin 'calculate_signals' wrapper;
+            "live" emits a 'LiveStrategy' class evaluating one bar per
+            on_bar() call in constant time (plus a replaying 'calculate_signals').
+
+    Returns:
+        Python source code as a string.
+    """
+    if target == "numpy":
+        return _generate_numpy_strategy(ast)
+    if target == "live":
+        return _generate_live_strategy(ast)
+    if target != "pandas":
+        raise ValueError(f"Unknown code generation target: {target}. Expected one of {TARGETS}")
+
     # Check for the dictionary keys before passing them to the recursive function
     entry_node = ast.get('entry')
     exit_node = ast.get('exit')
@@ -113,6 +224,8 @@ def generate_python_strategy(ast: dict) -> str:
     
     entry_expression = _generate_expression(entry_node) if entry_node else 'False'
     exit_expression = _generate_expression(exit_node) if exit_node else 'False'
+    indicator_block = _generate_indicator_block(ast, "pandas")
+    fingerprint_condition = _fingerprint_condition(ast)
     # The generated code must define a function named 'calculate_signals'
     # It must also import necessary indicator helpers defined in data_utils.
     
@@ -122,15 +235,19 @@ def generate_python_strategy(ast: dict) -> str:
     generated_code = f"""
 from pandas import DataFrame
 from numpy import nan
-from engine.data_utils import calculate_sma
+from engine.data_utils import calculate_indicator, data_fingerprint
 
-def calculate_signals(df: DataFrame) -> DataFrame:
+def calculate_signals(df: DataFrame, indicator_cache=None, fingerprint=None) -> DataFrame:
     # --- Strategy Logic Generated from AST ---
+    # Pass an IndicatorCache to share indicator arrays with other strategies.
+    if {fingerprint_condition}:
+        fingerprint = data_fingerprint(df)
     
     # 1. Calculate the required indicators on the DataFrame.
     #    NOTE: Indicators are calculated automatically within the generated expression
-    #    string by calling functions like 'calculate_sma'.
-    
+    #    string by calling functions like 'calculate_indicator', or hoisted below
+    #    when the AST went through optimize_ast.
+{indicator_block}
     signals = DataFrame(index=df.index, data={{'entry': nan, 'exit': nan}})
     
     # 2. Apply the rules to generate boolean signals.
@@ -139,4 +256,166 @@ def calculate_signals(df: DataFrame) -> DataFrame:
     
     return signals.fillna(False)
 """
-    return generated_code
\ No newline at end of file
+    return generated_code
+
+
+def _generate_numpy_strategy(ast: dict) -> str:
+    """Generates the NumPy-target source (see generate_python_strategy)."""
+    entry_node = ast.get('entry')
+    exit_node = ast.get('exit')
+
+    entry_expression = _generate_expression(entry_node, "numpy") if entry_node else 'False'
+    exit_expression = _generate_expression(exit_node, "numpy") if exit_node else 'False'
+
+    # Only the columns the rules actually read (plus CLOSE, which fixes the
+    # bar count) are converted to arrays
+    used_fields = _collect_fields(exit_node, _collect_fields(entry_node, {"CLOSE"}))
+    for node in ast.get('indicators', {}).values():
+        _collect_fields(node, used_fields)
+    indicator_block = _generate_indicator_block(ast, "numpy")
+    fingerprint_condition = _fingerprint_condition(ast)
+    fields = tuple(field for field in ARRAY_FIELDS if field in used_fields)
+    arguments = ", ".join(ARRAY_FIELDS)
+
+    generated_code = f"""
+from numpy import ascontiguousarray
+from pandas import DataFrame
+from engine.data_utils import data_fingerprint, to_signal_mask
+from engine.indicator_cache import lookup_indicator
+from engine.timeframes import lookup_timeframe_indicator
+
+USED_FIELDS = {fields!r}
+
+def calculate_signal_arrays({arguments}, indicator_cache=None, fingerprint=None, index=None):
+    # --- Strategy Logic Generated from AST (NumPy target) ---
+    # Each argument is a contiguous float ndarray (or None when unused).
+    # Indicators are looked up in indicator_cache (keyed by the dataset
+    # fingerprint) before being computed. index holds the bar timestamps,
+    # needed by higher-timeframe indicators only.
+    n = len(CLOSE)
+{indicator_block}    entry = to_signal_mask({entry_expression}, n)
+    exit = to_signal_mask({exit_expression}, n)
+    return entry, exit
+
+def calculate_signals(df: DataFrame, as_frame: bool = True, indicator_cache=None, fingerprint=None):
+    arrays = [
+        ascontiguousarray(df[field].to_numpy(dtype=float)) if field in USED_FIELDS else None
+        for field in {ARRAY_FIELDS!r}
+    ]
+    if {fingerprint_condition}:
+        fingerprint = data_fingerprint(df)
+    entry, exit = calculate_signal_arrays(*arrays, indicator_cache=indicator_cache, fingerprint=fingerprint,
+                                          index=df.index)
+    if not as_frame:
+        return entry, exit
+    return DataFrame({{'entry': entry, 'exit': exit}}, index=df.index)
+"""
+    return generated_code
+
+
+def _generate_live_strategy(ast: dict) -> str:
+    """Generates the live-target source (see generate_python_strategy)."""
+    # Every indicator must be a hoisted temporary: each one owns per-bar state
+    if 'indicators' not in ast:
+        ast = optimize_ast(ast)
+    entry_node = ast.get('entry')
+    exit_node = ast.get('exit')
+
+    entry_expression = _generate_expression(entry_node, "live") if entry_node else 'False'
+    exit_expression = _generate_expression(exit_node, "live") if exit_node else 'False'
+
+    used_fields = _collect_fields(exit_node, _collect_fields(entry_node, {"CLOSE"}))
+    state_lines, update_lines = [], []
+    for name, node in ast['indicators'].items():
+        if node.get('timeframe'):
+            raise ValueError(f"Timeframe indicators (@{node['timeframe']}) are not supported by the live target")
+        values = resolve_params(node['name'], node['params'][1:])
+        for value in values:
+            if isinstance(value, dict):
+                raise ValueError(f"Unbound template parameter: ${value['name']}")
+        columns = indicator_inputs(node['name'], node['params'][0])
+        used_fields.update(columns)
+        state_lines.append(f"        self.{name} = live_indicator({node['name']!r}, {tuple(values)!r})\n")
+        update_lines.append(f"        {name} = self.{name}.update({', '.join(columns)})\n")
+    fields = tuple(field for field in ARRAY_FIELDS if field in used_fields)
+    arguments = ", ".join(ARRAY_FIELDS)
+
+    generated_code = f"""
+from numpy import array
+from pandas import DataFrame
+from engine.indicators import live_indicator
+
+USED_FIELDS = {fields!r}
+
+class LiveStrategy:
+    # --- Strategy Logic Generated from AST (live target) ---
+    # on_bar() takes one bar's values (unused fields may be None) and
+    # updates every indicator's running state once, so the cost per bar
+    # does not depend on the length of the history.
+
+    def __init__(self, position=False):
+        self.position = position
+        self.bars = 0
+{''.join(state_lines)}
+    def on_bar(self, {arguments}):
+{''.join(update_lines)}        entry = bool({entry_expression})
+        exit = bool({exit_expression})
+        # Same position rules as compute_positions: a bar with both signals flips
+        if entry and exit:
+            self.position = not self.position
+        elif entry:
+            self.position = True
+        elif exit:
+            self.position = False
+        self.bars += 1
+        return entry, exit, self.position
+
+def calculate_signals(df: DataFrame, as_frame: bool = True):
+    # Replays the history bar by bar through a fresh LiveStrategy
+    strategy = LiveStrategy()
+    n = len(df)
+    columns = [
+        df[field].to_numpy(dtype=float).tolist() if field in USED_FIELDS else [None] * n
+        for field in {ARRAY_FIELDS!r}
+    ]
+    signals = [strategy.on_bar(*bar)[:2] for bar in zip(*columns)]
+    entry = array([signal[0] for signal in signals], dtype=bool)
+    exit = array([signal[1] for signal in signals], dtype=bool)
+    if not as_frame:
+        return entry, exit
+    return DataFrame({{'entry': entry, 'exit': exit}}, index=df.index)
+"""
+    return generated_code
+
+
+def generate_live_rules(ast: dict):
+    """
+    Generates the scalar rules of a strategy over externally updated indicators.
+
+    Used when many live strategies share one set of indicator states
+    (engine.live_service): the indicators are updated elsewhere and their
+    current values passed in.
+
+    Args:
+        ast: Dictionary AST (optimized or not).
+
+    Returns:
+        (source, names): source defining 'evaluate_rules(OPEN, HIGH, LOW,
+        CLOSE, VOLUME, *indicator values) -> (entry, exit)', and the
+        indicator temporary names in argument order (keys of the optimized
+        AST's 'indicators').
+    """
+    if 'indicators' not in ast:
+        ast = optimize_ast(ast)
+    entry_node = ast.get('entry')
+    exit_node = ast.get('exit')
+    entry_expression = _generate_expression(entry_node, "live") if entry_node else 'False'
+    exit_expression = _generate_expression(exit_node, "live") if exit_node else 'False'
+    names = tuple(ast['indicators'])
+    arguments = ", ".join(ARRAY_FIELDS + names)
+
+    generated_code = f"""
+def evaluate_rules({arguments}):
+    return bool({entry_expression}), bool({exit_expression})
+"""
+    return generated_code, names
@@ -1,7 +1,14 @@
 # engine/data_utils.py
+import hashlib
+import zlib
+
 import pandas as pd
 import numpy as np
 
+from .indicators import indicator_inputs
+from .indicator_cache import lookup_indicator
+from .timeframes import lookup_timeframe_indicator
+
 # Sample Data from the assignment [cite: 129-132]
 SAMPLE_DATA = """
 date, open, high, low, close, volume
@@ -33,15 +40,77 @@ date, open, high, low, close, volume
 """
 # ... add more synthetic data here for meaningful backtest results ...
 
+OHLCV_FIELDS = ("OPEN", "HIGH", "LOW", "CLOSE", "VOLUME")
+
+# Parsed SAMPLE_DATA, built on the first load_data() call
+_SAMPLE_FRAME = None
+
 def load_data():
-    df = pd.read_csv(pd.io.common.StringIO(SAMPLE_DATA), parse_dates=['date']).set_index('date')
-    df.columns = [col.strip().upper() for col in df.columns] # Normalize column names (strip whitespace and uppercase)
-    return df
+    # The sample CSV is parsed once; callers get their own copy to modify.
+    # Real histories are loaded from the columnar store (engine.market_store).
+    global _SAMPLE_FRAME
+    if _SAMPLE_FRAME is None:
+        df = pd.read_csv(pd.io.common.StringIO(SAMPLE_DATA), parse_dates=['date']).set_index('date')
+        df.columns = [col.strip().upper() for col in df.columns] # Normalize column names (strip whitespace and uppercase)
+        _SAMPLE_FRAME = df
+    return _SAMPLE_FRAME.copy()
 
 def calculate_sma(series, period):
     # This is a helper for the CODE GENERATOR to use.
     return series.rolling(period).mean()
 
-# Add a placeholder for RSI calculation...
-# def calculate_rsi(series, period):
-#     ...
\ No newline at end of file
+def calculate_indicator(df, name, field, *params, cache=None, fingerprint=None, timeframe=None):
+    # Generic helper for the CODE GENERATOR: computes any registered indicator
+    # (engine.indicators) on the DataFrame columns it needs and returns a Series.
+    # With an IndicatorCache and the data_fingerprint of df, the array is shared
+    # with every other strategy run on the same data. A timeframe (e.g. 'W-SUN')
+    # computes it on resampled bars aligned back to df.index (engine.timeframes).
+    fields = indicator_inputs(name, field)
+    inputs = [df[column].to_numpy(dtype=float) for column in fields]
+    if timeframe is not None:
+        values = lookup_timeframe_indicator(cache, fingerprint, name, fields, inputs, params, timeframe, df.index)
+    else:
+        values = lookup_indicator(cache, fingerprint, name, fields, inputs, params)
+    return pd.Series(values, index=df.index)
+
+def to_signal_mask(values, length):
+    # Broadcasts a generated expression (array or scalar, e.g. the folded
+    # '0 > 1' placeholder) to a boolean array with one entry per bar.
+    mask = np.asarray(values, dtype=bool)
+    if mask.ndim == 0:
+        return np.full(length, bool(mask))
+    return mask
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Returns a cheap fingerprint of an OHLCV DataFrame.
+
+    Combines the row count, the first/last index labels, a CRC32 of the
+    timestamps and of each OHLCV column buffer, so any edit to the prices or
+    the dates changes the fingerprint while the cost stays a single pass over
+    the raw bytes. Interior timestamps matter to anything keyed on the
+    fingerprint that depends on the calendar (resample bins of timeframe
+    indicators, trade dates of cached results).
+
+    Args:
+        df: DataFrame as returned by load_data().
+
+    Returns:
+        Hex digest string.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(len(df)).encode())
+    if len(df):
+        digest.update(f"{df.index[0]}|{df.index[-1]}".encode())
+        stamps = df.index.asi8 if isinstance(df.index, pd.DatetimeIndex) else df.index.to_numpy()
+        if stamps.dtype.kind in "biufmM":
+            digest.update(zlib.crc32(np.ascontiguousarray(stamps).view(np.uint8)).to_bytes(4, "little"))
+        else:
+            digest.update(pd.util.hash_pandas_object(df.index, index=False).to_numpy().tobytes())
+    for field in OHLCV_FIELDS:
+        if field not in df.columns:
+            continue
+        values = np.ascontiguousarray(df[field].to_numpy(dtype=float))
+        digest.update(field.encode())
+        digest.update(zlib.crc32(values.view(np.uint8)).to_bytes(4, "little"))
+    return digest.hexdigest()
@@ -2,9 +2,12 @@
 from lark import Lark, Transformer, v_args
 from typing import Dict, Any
 
+from .indicators import INDICATORS, resolve_params
+from .timeframes import parse_timeframe
+
 # --- DSL GRAMMAR DEFINITION ---
 # This grammar is specifically designed to resolve the ambiguity between FIELDS and INDICATORS.
-GRAMMAR = r"""
+GRAMMAR_TEMPLATE = r"""
     start: strategy
 
     strategy: "ENTRY:" rule_set "EXIT:" rule_set
@@ -18,13 +21,16 @@ GRAMMAR = r"""
 
     comparison: expression OPERATOR expression
 
-    // EXPRESSION can be a price series, an indicator, or a number
+    // EXPRESSION can be a price series, an indicator, a number, or a $placeholder
     expression: FIELD 
               | indicator 
               | NUMBER
+              | PARAM
 
     // INDICATOR_NAME is used instead of generic IDENTIFIER to prevent token conflicts
-    indicator: INDICATOR_NAME "(" FIELD "," NUMBER ")"
+    // Trailing numeric parameters may be omitted and take the registry defaults.
+    // An optional @timeframe computes the indicator on resampled bars, e.g. SMA@W(CLOSE, 20)
+    indicator: INDICATOR_NAME [TIMEFRAME] "(" FIELD ("," (NUMBER | PARAM))* ")"
 
     // --- TERMINALS (Tokens) ---
     LOGIC_OP: "AND" | "OR"
@@ -32,16 +38,31 @@ GRAMMAR = r"""
     OPERATOR: ">=" | "<=" | ">" | "<" | "==" | "!=" | "GT" | "LT" | "GTE" | "LTE"
 
     // Explicitly define indicator function names to avoid conflict with fields
-    INDICATOR_NAME: "SMA" | "RSI"
+    // (filled in from the engine.indicators registry by build_grammar)
+    INDICATOR_NAME: {indicator_names}
 
     // FIELD names must be uppercase
     FIELD: "CLOSE" | "OPEN" | "HIGH" | "LOW" | "VOLUME" 
 
+    // Higher timeframe of an indicator (pandas offset: @D, @W, @4H, @W-FRI...)
+    TIMEFRAME: /@[0-9]*[A-Za-z]+(-[A-Za-z]+)?/
+
+    // Template placeholders (e.g. $fast) bound later by engine.sweep.bind_params
+    PARAM: /\$[A-Za-z_][A-Za-z0-9_]*/
+
     %import common.SIGNED_NUMBER -> NUMBER
     %import common.WS
     %ignore WS
 """
 
+def build_grammar() -> str:
+    """Returns the DSL grammar with INDICATOR_NAME listing every registered indicator."""
+    # Longest names first so e.g. MACDS is never lexed as MACD + S
+    names = sorted(INDICATORS, key=lambda name: (-len(name), name))
+    return GRAMMAR_TEMPLATE.replace("{indicator_names}", " | ".join(f'"{name}"' for name in names))
+
+GRAMMAR = build_grammar()
+
 @v_args(inline=True) # Allows rules to return their components directly
 class StrategyTransformer(Transformer):
     """Transforms the parsed Lark Tree into the final Abstract Syntax Tree (AST) structure."""
@@ -86,13 +107,21 @@ class StrategyTransformer(Transformer):
             "right": right
         }
 
-    def indicator(self, name, field, period):
-        """Builds an indicator function node (e.g., SMA(CLOSE, 20))."""
-        return {
+    def indicator(self, name, timeframe, field, *numbers):
+        """Builds an indicator function node (e.g., SMA(CLOSE, 20) or SMA@W(CLOSE, 20))."""
+        # Integral parameters stay ints (periods); omitted ones take the registry defaults.
+        # Placeholders are kept as 'param' nodes until the template is bound.
+        values = [n if isinstance(n, dict) else int(float(n)) if float(n).is_integer() else float(n)
+                  for n in numbers]
+        node = {
             "type": "indicator",
             "name": str(name),
-            "params": [str(field), int(period)]
+            "params": [str(field), *resolve_params(str(name), values)]
         }
+        # Base-timeframe indicators carry no key, so their ASTs (and hashes) are unchanged
+        if timeframe is not None:
+            node["timeframe"] = parse_timeframe(timeframe)
+        return node
 
     def expression(self, item):
         """Handles the final output type for a simple token (Field, Indicator, or Number)."""
@@ -110,12 +139,24 @@ class StrategyTransformer(Transformer):
     NUMBER = lambda self, n: str(n)
     FIELD = lambda self, f: str(f)
     INDICATOR_NAME = lambda self, i: str(i)
+    TIMEFRAME = lambda self, t: str(t)
     LOGIC_OP = lambda self, op: str(op)
+    PARAM = lambda self, p: {"type": "param", "name": str(p)[1:]}
 
 # --- Public Interface ---
 
 # Globalize the parser instance to prevent "Rule defined more than once" errors
 DSL_PARSER = Lark(GRAMMAR, parser='lalr')
+_PARSER_INDICATORS = frozenset(INDICATORS)
+
+def _get_parser() -> Lark:
+    """Returns the global parser, rebuilding it if indicators were registered since."""
+    global DSL_PARSER, GRAMMAR, _PARSER_INDICATORS
+    if frozenset(INDICATORS) != _PARSER_INDICATORS:
+        GRAMMAR = build_grammar()
+        DSL_PARSER = Lark(GRAMMAR, parser='lalr')
+        _PARSER_INDICATORS = frozenset(INDICATORS)
+    return DSL_PARSER
 
 def parse_dsl_to_ast(dsl_text: str) -> Dict[str, Any]:
     """
@@ -124,7 +165,7 @@ def parse_dsl_to_ast(dsl_text: str) -> Dict[str, Any]:
     
     try:
         # Step 1: Parse the DSL text into a raw Lark Tree
-        tree = DSL_PARSER.parse(dsl_text)
+        tree = _get_parser().parse(dsl_text)
         
         # Step 2: Transform the Tree into your final Python Dictionary AST
         # The StrategyTransformer's 'strategy' method returns the dict: {"entry":..., "exit":...}
@@ -135,4 +176,42 @@ def parse_dsl_to_ast(dsl_text: str) -> Dict[str, Any]:
         
     except Exception as e:
         # Raises informative errors for invalid syntax
-        raise ValueError(f"DSL Syntax Error: {e}")
\ No newline at end of file
+        raise ValueError(f"DSL Syntax Error: {e}")
+def _format_number(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def _render_node(node: Dict[str, Any]) -> str:
+    node_type = node.get("type")
+    if node_type == "condition":
+        return _render_node(node.get("value") or node.get("content"))
+    if node_type == "series":
+        return node["data"]
+    if node_type == "value":
+        return _format_number(node["data"])
+    if node_type == "param":
+        return f"${node['name']}"
+    if node_type == "indicator":
+        field, params = node["params"][0], node["params"][1:]
+        rendered = [f"${p['name']}" if isinstance(p, dict) else _format_number(p) for p in params]
+        timeframe = f"@{node['timeframe']}" if node.get("timeframe") else ""
+        return f"{node['name']}{timeframe}({', '.join([field] + rendered)})"
+    if node_type == "comparison":
+        # The grammar only has symbol forms of the (canonical) EQ/NEQ operators
+        op = {"EQ": "==", "NEQ": "!="}.get(node["op"], node["op"])
+        return f"{_render_node(node['left'])} {op} {_render_node(node['right'])}"
+    if node_type == "binary_op":
+        # Rule sets associate to the left, so only a nested right operand needs parentheses
+        right = _render_node(node["right"])
+        if node["right"].get("type") == "binary_op":
+            right = f"({right})"
+        return f"{_render_node(node['left'])} {node['op']} {right}"
+    raise ValueError(f"Cannot render AST node type: {node_type}")
+
+def ast_to_dsl(ast: Dict[str, Any]) -> str:
+    """
+    Renders an AST (as produced by parse_dsl_to_ast) back to DSL text.
+
+    parse_dsl_to_ast(ast_to_dsl(ast)) yields an equivalent AST.
+    """
+    return f"ENTRY: {_render_node(ast['entry'])} EXIT: {_render_node(ast['exit'])}"
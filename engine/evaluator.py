@@ -0,0 +1,125 @@
+# engine/evaluator.py
+"""
+Array interpreter for optimized strategy ASTs.
+
+Generated code (engine.code_generator) is the right tool for running one
+strategy many times; when many strategies run once each on the same data,
+as in parameter sweeps and batch screening, walking the optimized AST over precomputed indicator
+arrays avoids a parse/generate/exec round per strategy.
+"""
+import json
+from typing import Any, Dict, Mapping, MutableMapping, Optional, Tuple
+
+import numpy as np
+
+from .data_utils import to_signal_mask
+from .indicator_cache import IndicatorCache, lookup_indicator
+from .indicators import indicator_inputs
+from .optimizer import CONSTANT_OPS
+from .timeframes import Resampled, lookup_resampled, lookup_timeframe_indicator
+
+LOGIC_OPS = {
+    "AND": np.logical_and,
+    "OR": np.logical_or,
+}
+
+
+def compute_indicator_set(nodes: Mapping[str, Dict[str, Any]], columns: Mapping[str, np.ndarray],
+                          cache: Optional[IndicatorCache] = None,
+                          fingerprint: Optional[str] = None, index: Any = None) -> Dict[str, np.ndarray]:
+    """
+    Computes every hoisted indicator of one or more optimized ASTs.
+
+    Args:
+        nodes: Temporary name -> indicator node (the 'indicators' entry of
+            optimize_ast, or the union of several).
+        columns: OHLCV column name -> float ndarray.
+        cache: Optional IndicatorCache shared with other strategies.
+        fingerprint: data_fingerprint of the dataset the columns belong to.
+        index: Bar timestamps, required by higher-timeframe indicators
+            (nodes with a 'timeframe'); each timeframe is resampled once.
+
+    Returns:
+        Temporary name -> float ndarray.
+    """
+    arrays = {}
+    resampled: Dict[str, Resampled] = {}
+    for name, node in nodes.items():
+        field, params = node['params'][0], node['params'][1:]
+        fields = indicator_inputs(node['name'], field)
+        inputs = [columns[column] for column in fields]
+        timeframe = node.get('timeframe')
+        if timeframe:
+            if timeframe not in resampled:
+                resampled[timeframe] = lookup_resampled(fingerprint, index, timeframe)
+            arrays[name] = lookup_timeframe_indicator(cache, fingerprint, node['name'], fields, inputs, params,
+                                                      timeframe, index, resampled=resampled[timeframe])
+        else:
+            arrays[name] = lookup_indicator(cache, fingerprint, node['name'], fields, inputs, params)
+    return arrays
+
+
+def evaluate_node(node: Dict[str, Any], columns: Mapping[str, np.ndarray],
+                  indicators: Mapping[str, np.ndarray],
+                  memo: Optional[MutableMapping[str, np.ndarray]] = None) -> Any:
+    """
+    Evaluates one node of an optimized AST.
+
+    Args:
+        node: Node produced by optimize_ast (indicators already hoisted).
+        columns: OHLCV column name -> float ndarray.
+        indicators: Temporary name -> float ndarray (see compute_indicator_set).
+        memo: Optional dict shared across strategies evaluated on the same
+            data; each distinct comparison is then evaluated only once.
+
+    Returns:
+        A float or boolean ndarray, or a scalar for 'value'/'constant' nodes.
+    """
+    node_type = node.get("type")
+    if node_type == "series":
+        return columns[node['data']]
+    if node_type == "value":
+        return node['data']
+    if node_type == "constant":
+        return bool(node['data'])
+    if node_type == "temp":
+        return indicators[node['name']]
+    if node_type == "comparison":
+        key = json.dumps(node, sort_keys=True) if memo is not None else None
+        if key is not None and key in memo:
+            return memo[key]
+        left = evaluate_node(node['left'], columns, indicators)
+        right = evaluate_node(node['right'], columns, indicators)
+        result = CONSTANT_OPS[node['op']](left, right)
+        if key is not None:
+            memo[key] = result
+        return result
+    if node_type == "binary_op":
+        left = evaluate_node(node['left'], columns, indicators, memo)
+        right = evaluate_node(node['right'], columns, indicators, memo)
+        return LOGIC_OPS[node['op']](left, right)
+    if node_type == "param":
+        raise ValueError(f"Unbound template parameter: ${node['name']}")
+    raise ValueError(f"Unknown AST node type: {node_type}")
+
+
+def evaluate_signals(optimized: Dict[str, Any], columns: Mapping[str, np.ndarray],
+                     indicators: Mapping[str, np.ndarray], n: int,
+                     memo: Optional[MutableMapping[str, np.ndarray]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluates the entry and exit rules of an optimized AST.
+
+    Args:
+        optimized: AST returned by optimize_ast.
+        columns: OHLCV column name -> float ndarray.
+        indicators: Temporary name -> float ndarray, covering every
+            temporary the AST references.
+        n: Number of bars (scalar rules are broadcast to this length).
+        memo: Optional comparison memo (see evaluate_node).
+
+    Returns:
+        (entry, exit) boolean ndarrays of length n.
+    """
+    entry = to_signal_mask(evaluate_node(optimized['entry'], columns, indicators, memo), n)
+    exit = to_signal_mask(evaluate_node(optimized['exit'], columns, indicators, memo), n)
+    return entry, exit
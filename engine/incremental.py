@@ -0,0 +1,218 @@
+# engine/incremental.py
+"""
+Incremental backtest re-runs for histories that grow at the end.
+
+An IncrementalBacktest persists everything needed to continue a backtest
+after its last bar: the StreamingBacktest state (indicator stream states,
+which carry each indicator's warmup window, open position, equity, entry
+price), the closed trades and the per-bar equity and position arrays.
+When the history has new bars appended, only those bars are evaluated;
+the result is identical to run_backtest on the full history.
+
+State directory layout (one per strategy and series):
+
+    state.pkl      pickled dict: strategy hash, bars, prefix checksums,
+                   StreamingBacktest, closed trade columns and the open trade
+    equity.f8      float64 equity per bar (appended)
+    position.u1    uint8 position per bar (appended)
+"""
+import os
+import pickle
+import zlib
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .backtester import _build_results
+from .batch import frame_columns
+from .dsl_parser import parse_dsl_to_ast
+from .streaming import StreamingBacktest
+from .strategy_cache import ast_hash
+
+STATE_FILE = "state.pkl"
+EQUITY_FILE = "equity.f8"
+POSITION_FILE = "position.u1"
+
+# Checksum entry of the timestamps (the others are keyed by column name)
+INDEX_CHECKSUM = "_index"
+
+# Closed trades are kept as one array per column
+TRADE_COLUMNS = ("entry_bar", "exit_bar", "entry_price", "exit_price", "profit_loss")
+
+
+def _prefix_checksums(df: pd.DataFrame, start: int, stop: int,
+                      previous: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    # CRC32 of the timestamps and of each column over bars [0, stop), chained
+    # from the checksums of bars [0, start): the saved equity, trade log and
+    # indicator states (EMA, RSI... depend on every earlier bar) all derive
+    # from the whole evaluated prefix
+    part = df.iloc[start:stop]
+    stamps = part.index.asi8 if isinstance(part.index, pd.DatetimeIndex) else part.index.to_numpy()
+    columns = {INDEX_CHECKSUM: stamps, **frame_columns(part)}
+    previous = previous or {}
+    return {name: zlib.crc32(np.ascontiguousarray(values).view(np.uint8), previous.get(name, 0))
+            for name, values in columns.items()}
+
+
+def _append(path: str, values: np.ndarray, keep: int, itemsize: int):
+    # Truncates any bytes past the `keep` committed items (a run interrupted
+    # before its state was saved), then appends the new ones
+    with open(path, "ab") as f:
+        f.truncate(keep * itemsize)
+        f.write(np.ascontiguousarray(values).tobytes())
+
+
+class IncrementalBacktest:
+    """
+    Backtest of one strategy on one series that re-runs incrementally.
+
+    The first run() evaluates the whole history and saves the state under
+    path. Later runs on the same history with bars appended evaluate only
+    the new bars, continuing indicators, position, equity and the trade log
+    from the saved state. If any bar evaluated before changed (checked with
+    CRC32s of the timestamps and columns of the whole saved prefix, a pass
+    over the raw bytes), or the history got shorter, the backtest is
+    recomputed from scratch.
+    """
+
+    def __init__(self, strategy: Union[str, Dict[str, Any]], path: str):
+        self.ast = parse_dsl_to_ast(strategy) if isinstance(strategy, str) else strategy
+        self.key = ast_hash(self.ast)
+        self.path = path
+        # Bars evaluated by the last run() and whether it started over
+        self.last_run: Dict[str, Any] = {}
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _fresh_state(self) -> Dict[str, Any]:
+        return {"key": self.key, "bars": 0, "checksums": None,
+                "backtest": StreamingBacktest(self.ast), "open_trade": None,
+                "trades": {key: np.empty(0, dtype=np.int64 if key.endswith("_bar") else float)
+                           for key in TRADE_COLUMNS}}
+
+    def load_state(self) -> Dict[str, Any]:
+        """Returns the saved state, or a fresh one when nothing was saved yet."""
+        if not os.path.exists(self._file(STATE_FILE)):
+            return self._fresh_state()
+        with open(self._file(STATE_FILE), "rb") as f:
+            state = pickle.load(f)
+        if state["key"] != self.key:
+            raise ValueError(f"State in {self.path} belongs to another strategy")
+        return state
+
+    def _save_state(self, state: Dict[str, Any]):
+        tmp = self._file(STATE_FILE) + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._file(STATE_FILE))
+
+    def _resumable(self, state: Dict[str, Any], df: pd.DataFrame) -> bool:
+        bars = state["bars"]
+        if bars == 0 or len(df) < bars:
+            return False
+        return state.get("checksums") == _prefix_checksums(df, 0, bars)
+
+    def run(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Backtests the strategy on df, evaluating only bars not seen before.
+
+        Args:
+            df: The full OHLCV history, the previous one with bars appended.
+
+        Returns:
+            Dictionary with the same layout (and values) as run_backtest.
+        """
+        state = self.load_state()
+        recomputed = not self._resumable(state, df)
+        if recomputed:
+            state = self._fresh_state()
+        start = state["bars"]
+        backtest: StreamingBacktest = state["backtest"]
+        previous_position = backtest.position
+
+        output = backtest.update(df.iloc[start:])
+        position = output["position"]
+        self._record_trades(state, df["CLOSE"].to_numpy(dtype=float)[start:], position, previous_position, start)
+
+        _append(self._file(EQUITY_FILE), output["equity"].astype(np.float64), start, 8)
+        _append(self._file(POSITION_FILE), position.astype(np.uint8), start, 1)
+        state["bars"] = len(df)
+        state["checksums"] = _prefix_checksums(df, start, len(df), state["checksums"])
+        self._save_state(state)
+
+        self.last_run = {"bars": len(df), "new_bars": len(df) - start, "recomputed": recomputed}
+        return self._results(state, df)
+
+    @staticmethod
+    def _record_trades(state: Dict[str, Any], close: np.ndarray, position: np.ndarray,
+                       previous_position: bool, offset: int):
+        # Pairs the chunk's exits with its entries, the first one possibly
+        # opened in an earlier run (extract_trades on the full history)
+        previous = np.concatenate(([previous_position], position[:-1]))
+        entry_bars = np.flatnonzero(position & ~previous)
+        exit_bars = np.flatnonzero(~position & previous)
+        entry_prices = close[entry_bars]
+        entry_bars = entry_bars + offset
+        if state["open_trade"] is not None:
+            entry_bars = np.concatenate(([state["open_trade"][0]], entry_bars))
+            entry_prices = np.concatenate(([state["open_trade"][1]], entry_prices))
+        closed = len(exit_bars)
+        exit_prices = close[exit_bars]
+        chunk = {"entry_bar": entry_bars[:closed], "exit_bar": exit_bars + offset,
+                 "entry_price": entry_prices[:closed], "exit_price": exit_prices,
+                 "profit_loss": (exit_prices / entry_prices[:closed]) - 1.0}
+        state["trades"] = {key: np.concatenate((state["trades"][key], values)) for key, values in chunk.items()}
+        state["open_trade"] = (int(entry_bars[closed]), float(entry_prices[closed])) \
+            if len(entry_bars) > closed else None
+
+    def _results(self, state: Dict[str, Any], df: pd.DataFrame) -> Dict[str, Any]:
+        bars = state["bars"]
+        equity_curve = np.fromfile(self._file(EQUITY_FILE), dtype=np.float64, count=bars)
+        position = np.fromfile(self._file(POSITION_FILE), dtype=np.uint8, count=bars).astype(bool)
+        trades = state["trades"]
+        # One take per date column instead of a label lookup per trade
+        trade_log = [
+            {
+                'entry_date': entry_date,
+                'entry_price': entry_price,
+                'exit_date': exit_date,
+                'exit_price': exit_price,
+                'profit_loss': profit_loss,
+            }
+            for entry_date, entry_price, exit_date, exit_price, profit_loss in zip(
+                list(df.index[trades["entry_bar"]]), trades["entry_price"].tolist(),
+                list(df.index[trades["exit_bar"]]), trades["exit_price"].tolist(), trades["profit_loss"].tolist())
+        ]
+        return _build_results(equity_curve, position, trades["profit_loss"], trade_log)
+
+    def reset(self):
+        """Deletes the saved state, so the next run() starts from scratch."""
+        for name in (STATE_FILE, EQUITY_FILE, POSITION_FILE):
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+
+
+def run_incremental(strategy: Union[str, Dict[str, Any]], df: pd.DataFrame, path: str,
+                    info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Backtests a strategy on a growing history, re-using the state saved
+    under path by the previous call (see IncrementalBacktest).
+
+    Args:
+        strategy: DSL text or parsed AST.
+        df: Full OHLCV history.
+        path: State directory of this strategy and series.
+        info: Optional dict updated with the run details ('bars',
+            'new_bars', 'recomputed').
+
+    Returns:
+        Dictionary with the same layout as run_backtest.
+    """
+    backtest = IncrementalBacktest(strategy, path)
+    results = backtest.run(df)
+    if info is not None:
+        info.update(backtest.last_run)
+    return results
@@ -0,0 +1,103 @@
+# engine/indicator_cache.py
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .indicators import compute_indicator, resolve_params
+
+IndicatorKey = Tuple[str, Tuple[str, ...], Tuple[float, ...], str]
+
+
+class IndicatorCache:
+    """
+    Session-wide memo of computed indicator arrays.
+
+    Entries are keyed by (indicator, input fields, params, dataset fingerprint)
+    so every strategy evaluated on the same data reuses e.g. SMA(CLOSE, 20)
+    instead of recomputing it. The cache is an LRU bounded by max_bytes of
+    array data. Cached arrays are returned read-only since they are shared.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.current_bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def invalidate(self, fingerprint: str):
+        """Drops every indicator computed on the dataset with this fingerprint."""
+        for key in [key for key in self._entries if key[-1] == fingerprint]:
+            self.current_bytes -= self._entries.pop(key).nbytes
+
+    def get_or_compute(self, key: IndicatorKey, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """Returns the cached array for key, calling compute() and storing the result on a miss."""
+        values = self._entries.get(key)
+        if values is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return values
+
+        self.misses += 1
+        values = np.asarray(compute(), dtype=float)
+        values.setflags(write=False)
+        if values.nbytes <= self.max_bytes:
+            self._entries[key] = values
+            self.current_bytes += values.nbytes
+            while self.current_bytes > self.max_bytes:
+                self.current_bytes -= self._entries.popitem(last=False)[1].nbytes
+                self.evictions += 1
+        return values
+
+
+# Session-wide default cache shared by every strategy that opts in
+INDICATOR_CACHE = IndicatorCache()
+
+
+def indicator_key(name: str, fields: Sequence[str], params: Sequence[float], fingerprint: str,
+                  timeframe: Optional[str] = None) -> IndicatorKey:
+    """Builds the cache key for an indicator on a dataset (optionally on a higher timeframe, e.g. 'SMA@W-SUN')."""
+    label = f"{name}@{timeframe}" if timeframe else name
+    return (label, tuple(fields), tuple(resolve_params(name, params)), fingerprint)
+
+
+def lookup_indicator(cache: Optional[IndicatorCache], fingerprint: Optional[str], name: str,
+                     fields: Sequence[str], inputs: Sequence[np.ndarray],
+                     params: Sequence[float]) -> np.ndarray:
+    """
+    Computes an indicator through the cache when one is given.
+
+    Used by generated strategies: without a cache (or without a dataset
+    fingerprint to key on) this is a plain compute_indicator() call.
+
+    Args:
+        cache: IndicatorCache to consult, or None.
+        fingerprint: data_fingerprint of the dataset the inputs belong to.
+        name: Registry name, e.g. "SMA".
+        fields: Names of the input columns (part of the key).
+        inputs: Input arrays, in the same order as fields.
+        params: Numeric indicator parameters.
+
+    Returns:
+        Float ndarray (read-only when it came from the cache).
+    """
+    if cache is None or fingerprint is None:
+        return compute_indicator(name, inputs, params)
+    key = indicator_key(name, fields, params, fingerprint)
+    return cache.get_or_compute(key, lambda: compute_indicator(name, inputs, params))
@@ -0,0 +1,667 @@
+# engine/indicators.py
+"""
+Vectorized indicator library with a pluggable registry.
+
+Every indicator operates on float ndarrays, runs in O(n) and returns an array
+of the same length with NaN for the warmup bars. Each registry entry declares
+which OHLCV columns it reads, its default parameters and its lookback (the
+number of leading bars without a valid value), so later stages can reason
+about warmup. The DSL grammar and the code generator are driven from
+INDICATORS; register_indicator() adds new entries at runtime.
+
+Indicators may also provide a streaming form, used to process histories
+chunk by chunk (engine.streaming): it carries whatever state the indicator
+needs across chunks and returns exactly the values of a full-history run.
+A live form updates one bar at a time in O(1) (ring buffers, running sums,
+recursive averages) for the per-bar evaluator of code_generator's "live"
+target.
+"""
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class IndicatorSpec(NamedTuple):
+    name: str
+    func: Callable[..., np.ndarray]
+    lookback: Callable[..., int]
+    # OHLCV columns passed to func; None means "the field named in the DSL"
+    inputs: Optional[Tuple[str, ...]] = None
+    defaults: Tuple[float, ...] = ()
+    # Chunked form: stream(state, *inputs, *params) -> (values, state); see stream_indicator
+    stream: Optional[Callable[..., Tuple[np.ndarray, Any]]] = None
+    # Per-bar form: live(*params) -> object whose update(*input values) returns the bar's value
+    live: Optional[Callable[..., Any]] = None
+
+
+INDICATORS: Dict[str, IndicatorSpec] = {}
+
+
+def register_indicator(name: str, func: Callable[..., np.ndarray], lookback: Callable[..., int],
+                       inputs: Optional[Tuple[str, ...]] = None,
+                       defaults: Tuple[float, ...] = (),
+                       stream: Optional[Callable[..., Tuple[np.ndarray, Any]]] = None,
+                       live: Optional[Callable[..., Any]] = None) -> IndicatorSpec:
+    """
+    Adds (or replaces) an indicator in the registry.
+
+    Args:
+        name: Upper-case DSL name, e.g. "SMA".
+        func: Function taking the input arrays followed by the numeric
+            parameters and returning a float ndarray.
+        lookback: Function taking the numeric parameters and returning the
+            number of leading NaN bars.
+        inputs: OHLCV columns the function reads (None: the DSL field).
+        defaults: Default numeric parameters, used when the DSL omits them.
+        stream: Optional chunked form taking the carried state (None for the
+            first chunk), the input chunks and the parameters, and returning
+            (values for the chunk, new state).
+        live: Optional per-bar form: called with the parameters, returns an
+            object whose update(*inputs) takes one float per input column
+            and returns the indicator value for that bar.
+
+    Returns:
+        The registered IndicatorSpec.
+    """
+    spec = IndicatorSpec(name.upper(), func, lookback, inputs, tuple(defaults), stream, live)
+    INDICATORS[spec.name] = spec
+    return spec
+
+
+def get_indicator(name: str) -> IndicatorSpec:
+    spec = INDICATORS.get(name)
+    if spec is None:
+        raise ValueError(f"Unknown indicator: {name}")
+    return spec
+
+
+def resolve_params(name: str, params: Sequence[float]) -> Tuple[float, ...]:
+    """Fills omitted parameters from the registry defaults."""
+    spec = get_indicator(name)
+    if len(params) > len(spec.defaults):
+        raise ValueError(f"{name} takes at most {len(spec.defaults)} parameter(s), got {len(params)}")
+    return tuple(params) + spec.defaults[len(params):]
+
+
+def indicator_inputs(name: str, field: str) -> Tuple[str, ...]:
+    """Returns the OHLCV columns an indicator reads for a given DSL field."""
+    spec = get_indicator(name)
+    return spec.inputs if spec.inputs is not None else (field,)
+
+
+def indicator_lookback(name: str, params: Sequence[float]) -> int:
+    """Returns the number of warmup bars (leading NaNs) for an indicator."""
+    return int(get_indicator(name).lookback(*resolve_params(name, params)))
+
+
+def compute_indicator(name: str, inputs: Sequence[np.ndarray], params: Sequence[float]) -> np.ndarray:
+    """
+    Computes a registered indicator.
+
+    Args:
+        name: Registry name, e.g. "RSI".
+        inputs: Input arrays in the order declared by the spec.
+        params: Numeric parameters (missing trailing ones take the defaults).
+
+    Returns:
+        Float ndarray aligned with the inputs.
+    """
+    spec = get_indicator(name)
+    arrays = [np.asarray(values, dtype=float) for values in inputs]
+    return spec.func(*arrays, *resolve_params(name, params))
+
+
+def stream_indicator(name: str, inputs: Sequence[np.ndarray], params: Sequence[float],
+                     state: Any = None) -> Tuple[np.ndarray, Any]:
+    """
+    Computes a registered indicator on the next chunk of a long history.
+
+    Args:
+        name: Registry name, e.g. "EMA".
+        inputs: Input chunks in the order declared by the spec.
+        params: Numeric parameters (missing trailing ones take the defaults).
+        state: State returned for the previous chunk (None for the first).
+
+    Returns:
+        (values, state): the values equal the matching slice of
+        compute_indicator() on the whole history; pass state to the next call.
+    """
+    spec = get_indicator(name)
+    if spec.stream is None:
+        raise ValueError(f"Indicator {name} has no streaming implementation")
+    arrays = [np.asarray(values, dtype=float) for values in inputs]
+    return spec.stream(state, *arrays, *resolve_params(name, params))
+
+
+def live_indicator(name: str, params: Sequence[float]) -> Any:
+    """
+    Creates the per-bar state of a registered indicator.
+
+    Args:
+        name: Registry name, e.g. "SMA".
+        params: Numeric parameters (missing trailing ones take the defaults).
+
+    Returns:
+        Object whose update(*inputs), given one float per input column,
+        returns the value compute_indicator() would give for that bar
+        (up to floating-point rounding of running sums).
+    """
+    spec = get_indicator(name)
+    if spec.live is None:
+        raise ValueError(f"Indicator {name} has no live implementation")
+    return spec.live(*resolve_params(name, params))
+
+
+# --- Kernels ---
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    # Windowed sum from block prefix/suffix sums (van Herk / Gil-Werman).
+    # Blocks of `window` bars are aligned to bar 0, so each sum only adds the
+    # values inside its own window: O(n), and unlike a global cumsum the
+    # rounding error does not grow with the length of the history.
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    window = int(window)
+    out = np.full(n, np.nan)
+    if window < 1 or window > n:
+        return out
+    pad = (-n) % window
+    blocks = np.concatenate((values, np.zeros(pad))).reshape(-1, window)
+    prefix = np.cumsum(blocks, axis=1).ravel()[:n]
+    suffix = np.cumsum(blocks[:, ::-1], axis=1)[:, ::-1].ravel()[:n]
+    end = np.arange(window - 1, n)
+    start = end - window + 1
+    out[window - 1:] = np.where(start % window == 0, prefix[end], suffix[start] + prefix[end])
+    return out
+
+
+def _ewm(values: np.ndarray, alpha: float) -> np.ndarray:
+    # Recursive exponential average y[t] = (1 - alpha) * y[t-1] + alpha * x[t],
+    # seeded with the first finite value; leading NaNs are preserved.
+    values = np.asarray(values, dtype=float)
+    out = np.full(len(values), np.nan)
+    finite = np.flatnonzero(np.isfinite(values))
+    if len(finite) == 0:
+        return out
+    start = finite[0]
+    out[start:] = pd.Series(values[start:]).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return out
+
+
+def _mask_warmup(values: np.ndarray, lookback: int) -> np.ndarray:
+    values[:max(int(lookback), 0)] = np.nan
+    return values
+
+
+# --- Built-in indicators ---
+
+def sma(values: np.ndarray, period: int) -> np.ndarray:
+    """Simple moving average."""
+    return _rolling_sum(values, period) / period
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """Exponential moving average (alpha = 2 / (period + 1)), NaN for the first period - 1 bars."""
+    return _mask_warmup(_ewm(values, 2.0 / (period + 1)), period - 1)
+
+
+def _first_finite(values: np.ndarray) -> Optional[float]:
+    finite = values[np.isfinite(values)]
+    return finite[0] if len(finite) else None
+
+
+def _stdev(values: np.ndarray, period: int, shift: float) -> np.ndarray:
+    shifted = values - shift
+    mean = _rolling_sum(shifted, period) / period
+    variance = _rolling_sum(shifted * shifted, period) / period - mean * mean
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+def stdev(values: np.ndarray, period: int) -> np.ndarray:
+    """Rolling population standard deviation."""
+    values = np.asarray(values, dtype=float)
+    # Shift by a representative value to limit cancellation in E[x^2] - E[x]^2
+    shift = _first_finite(values)
+    return _stdev(values, period, 0.0 if shift is None else shift)
+
+
+def rsi(values: np.ndarray, period: int) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing (alpha = 1 / period)."""
+    values = np.asarray(values, dtype=float)
+    out = np.full(len(values), np.nan)
+    if len(values) < 2:
+        return out
+    delta = np.diff(values)
+    avg_gain = _ewm(np.maximum(delta, 0.0), 1.0 / period)
+    avg_loss = _ewm(np.maximum(-delta, 0.0), 1.0 / period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strength = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    # No losses in the window: 100 if there were gains, neutral 50 if flat
+    strength = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), strength)
+    out[1:] = strength
+    return _mask_warmup(out, period)
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int) -> np.ndarray:
+    """Average True Range with Wilder smoothing."""
+    true_range = np.asarray(high, dtype=float) - np.asarray(low, dtype=float)
+    if len(true_range) > 1:
+        previous_close = close[:-1]
+        true_range[1:] = np.maximum.reduce((true_range[1:],
+                                            np.abs(high[1:] - previous_close),
+                                            np.abs(low[1:] - previous_close)))
+    return _mask_warmup(_ewm(true_range, 1.0 / period), period - 1)
+
+
+def bollinger_upper(values: np.ndarray, period: int, width: float) -> np.ndarray:
+    """Upper Bollinger band: SMA + width * rolling standard deviation."""
+    return sma(values, period) + width * stdev(values, period)
+
+
+def bollinger_lower(values: np.ndarray, period: int, width: float) -> np.ndarray:
+    """Lower Bollinger band: SMA - width * rolling standard deviation."""
+    return sma(values, period) - width * stdev(values, period)
+
+
+def macd(values: np.ndarray, fast: int, slow: int, signal: int) -> np.ndarray:
+    """MACD line: EMA(fast) - EMA(slow)."""
+    return ema(values, fast) - ema(values, slow)
+
+
+def macd_signal(values: np.ndarray, fast: int, slow: int, signal: int) -> np.ndarray:
+    """MACD signal line: EMA(signal) of the MACD line, started once the line is valid."""
+    line = macd(values, fast, slow, signal)
+    return _mask_warmup(_ewm(line, 2.0 / (signal + 1)), max(fast, slow) + signal - 2)
+
+
+def macd_histogram(values: np.ndarray, fast: int, slow: int, signal: int) -> np.ndarray:
+    """MACD histogram: MACD line minus its signal line."""
+    return macd(values, fast, slow, signal) - macd_signal(values, fast, slow, signal)
+
+
+# --- Streaming forms ---
+
+def _ewm_stream(values: np.ndarray, alpha: float, state: Any) -> Tuple[np.ndarray, Any]:
+    # State: None until the first finite input, then (output at the last
+    # observed input, number of NaN inputs since). Replaying that value and
+    # gap ahead of the chunk puts pandas' recursion in the same state as on
+    # the full history.
+    if state is None:
+        out = _ewm(values, alpha)
+        if np.isnan(out).all():
+            return out, None
+    else:
+        last, gap = state
+        seeded = np.concatenate(([last], np.full(gap, np.nan), values))
+        out = pd.Series(seeded).ewm(alpha=alpha, adjust=False).mean().to_numpy(copy=True)[1 + gap:]
+    observed = np.flatnonzero(~np.isnan(values))
+    if len(observed):
+        return out, (out[observed[-1]], len(values) - 1 - observed[-1])
+    return out, (state[0], state[1] + len(values))
+
+
+def _mask_stream(values: np.ndarray, offset: int, lookback: int) -> np.ndarray:
+    # _mask_warmup for a chunk starting at bar `offset` of the history
+    values[:max(int(lookback) - offset, 0)] = np.nan
+    return values
+
+
+def _window_stream(func: Callable[..., np.ndarray], window: int, state: Any,
+                   *inputs: np.ndarray) -> Tuple[np.ndarray, Any]:
+    # Runs func over the carried tail plus the new chunk. The tail keeps the
+    # last window - 1 bars and starts on a multiple of `window` bars from bar
+    # 0, so _rolling_sum's blocks line up with those of a full-history run
+    # and every value is bit-identical. State: (bars seen, tail arrays).
+    window = max(int(window), 1)
+    offset, tail = (0, None) if state is None else state
+    buffers = inputs if tail is None else [np.concatenate((old, new)) for old, new in zip(tail, inputs)]
+    carried = len(buffers[0]) - len(inputs[0])
+    out = func(*buffers)[carried:]
+    total = offset + len(inputs[0])
+    keep = max(total - (window - 1), 0) // window * window
+    return out, (total, [values[keep - (offset - carried):] for values in buffers])
+
+
+def _sma_stream(state, values, period):
+    return _window_stream(lambda chunk: sma(chunk, period), period, state, values)
+
+
+def _ema_stream(state, values, period):
+    offset, ewm_state = state or (0, None)
+    out, ewm_state = _ewm_stream(values, 2.0 / (period + 1), ewm_state)
+    return _mask_stream(out, offset, period - 1), (offset + len(values), ewm_state)
+
+
+def _stdev_stream(state, values, period):
+    # The variance shift is fixed by the first finite value of the history
+    shift, window_state = state or (None, None)
+    shift = _first_finite(values) if shift is None else shift
+    out, window_state = _window_stream(lambda chunk: _stdev(chunk, period, 0.0 if shift is None else shift),
+                                       period, window_state, values)
+    return out, (shift, window_state)
+
+
+def _bollinger_stream(upper: bool):
+    def stream(state, values, period, width):
+        shift, window_state = state or (None, None)
+        shift = _first_finite(values) if shift is None else shift
+
+        def bands(chunk):
+            mean = sma(chunk, period)
+            spread = width * _stdev(chunk, period, 0.0 if shift is None else shift)
+            return mean + spread if upper else mean - spread
+
+        out, window_state = _window_stream(bands, period, window_state, values)
+        return out, (shift, window_state)
+    return stream
+
+
+def _rsi_stream(state, values, period):
+    offset, previous, gain_state, loss_state = state or (0, None, None, None)
+    out = np.full(len(values), np.nan)
+    if len(values) == 0:
+        return out, state
+    delta = np.diff(values if previous is None else np.concatenate(([previous], values)))
+    avg_gain, gain_state = _ewm_stream(np.maximum(delta, 0.0), 1.0 / period, gain_state)
+    avg_loss, loss_state = _ewm_stream(np.maximum(-delta, 0.0), 1.0 / period, loss_state)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        strength = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    strength = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), strength)
+    out[len(values) - len(delta):] = strength
+    return _mask_stream(out, offset, period), (offset + len(values), values[-1], gain_state, loss_state)
+
+
+def _atr_stream(state, high, low, close, period):
+    offset, previous_close, ewm_state = state or (0, None, None)
+    if len(close) == 0:
+        return np.full(0, np.nan), state
+    true_range = high - low
+    if previous_close is None:
+        if len(true_range) > 1:
+            true_range[1:] = np.maximum.reduce((true_range[1:], np.abs(high[1:] - close[:-1]),
+                                                np.abs(low[1:] - close[:-1])))
+    else:
+        previous = np.concatenate(([previous_close], close[:-1]))
+        true_range = np.maximum.reduce((true_range, np.abs(high - previous), np.abs(low - previous)))
+    out, ewm_state = _ewm_stream(true_range, 1.0 / period, ewm_state)
+    return _mask_stream(out, offset, period - 1), (offset + len(close), close[-1], ewm_state)
+
+
+def _macd_stream(state, values, fast, slow, signal):
+    fast_state, slow_state = state or (None, None)
+    fast_line, fast_state = _ema_stream(fast_state, values, fast)
+    slow_line, slow_state = _ema_stream(slow_state, values, slow)
+    return fast_line - slow_line, (fast_state, slow_state)
+
+
+def _macd_signal_stream(state, values, fast, slow, signal):
+    offset, line_state, ewm_state = state or (0, None, None)
+    line, line_state = _macd_stream(line_state, values, fast, slow, signal)
+    out, ewm_state = _ewm_stream(line, 2.0 / (signal + 1), ewm_state)
+    out = _mask_stream(out, offset, max(fast, slow) + signal - 2)
+    return out, (offset + len(values), line_state, ewm_state)
+
+
+def _macd_histogram_stream(state, values, fast, slow, signal):
+    line_state, signal_state = state or (None, None)
+    line, line_state = _macd_stream(line_state, values, fast, slow, signal)
+    signal_line, signal_state = _macd_signal_stream(signal_state, values, fast, slow, signal)
+    return line - signal_line, (line_state, signal_state)
+
+
+# --- Live (per-bar) forms ---
+
+_NAN = float("nan")
+_INF = float("inf")
+
+
+class _LiveEWM:
+    # One step of pandas' ewm(alpha, adjust=False).mean(), same weights (also
+    # across NaN gaps), so it tracks _ewm bit for bit
+    __slots__ = ("alpha", "factor", "value", "old_weight")
+
+    def __init__(self, alpha: float):
+        # pandas converts alpha to a center of mass and back
+        alpha = 1.0 / (1.0 + (1.0 - alpha) / alpha)
+        self.alpha = alpha
+        self.factor = 1.0 - alpha
+        self.value = _NAN
+        self.old_weight = 1.0
+
+    def update(self, x: float) -> float:
+        if self.value != self.value:
+            if x == x:
+                self.value = x
+            return self.value
+        self.old_weight *= self.factor
+        if x == x:
+            if self.value != x:
+                self.value = (self.old_weight * self.value + self.alpha * x) / (self.old_weight + self.alpha)
+            self.old_weight = 1.0
+        return self.value
+
+
+class _LiveWindow:
+    # Ring buffer of the last `period` values with running sums of the finite
+    # ones (and of their squares). The sums are Neumaier-compensated, so each
+    # push is O(1) and their rounding error does not build up over a long
+    # history; NaNs and infinities are counted instead of summed, so leaving
+    # the window never subtracts them.
+    __slots__ = ("period", "ring", "pos", "bars", "nans", "positive", "negative",
+                 "total", "total_error", "squares", "squares_error")
+
+    def __init__(self, period: int):
+        self.period = max(int(period), 1)
+        self.ring = [0.0] * self.period
+        self.pos = 0
+        self.bars = 0
+        self.nans = 0
+        self.positive = 0
+        self.negative = 0
+        self.total = self.total_error = 0.0
+        self.squares = self.squares_error = 0.0
+
+    def _count(self, x: float, step: int) -> bool:
+        # Counts a non-finite value; False for a finite one
+        if x != x:
+            self.nans += step
+        elif x == _INF:
+            self.positive += step
+        elif x == -_INF:
+            self.negative += step
+        else:
+            return False
+        return True
+
+    def _add(self, x: float, square: float):
+        total = self.total + x
+        if abs(self.total) >= abs(x):
+            self.total_error += (self.total - total) + x
+        else:
+            self.total_error += (x - total) + self.total
+        self.total = total
+        squares = self.squares + square
+        if abs(self.squares) >= abs(square):
+            self.squares_error += (self.squares - squares) + square
+        else:
+            self.squares_error += (square - squares) + self.squares
+        self.squares = squares
+
+    def push(self, x: float) -> bool:
+        """Adds a value; True once the window is full and NaN-free."""
+        if self.bars >= self.period:
+            old = self.ring[self.pos]
+            if not self._count(old, -1):
+                self._add(-old, -old * old)
+        self.ring[self.pos] = x
+        if not self._count(x, 1):
+            self._add(x, x * x)
+        self.bars += 1
+        self.pos += 1
+        if self.pos == self.period:
+            self.pos = 0
+        return self.bars >= self.period and not self.nans
+
+    def sum(self) -> float:
+        """Sum of the window (infinite when it holds infinities, like np.sum)."""
+        if self.positive or self.negative:
+            return _NAN if self.positive and self.negative else (_INF if self.positive else -_INF)
+        return self.total + self.total_error
+
+    def sum_of_squares(self) -> float:
+        if self.positive or self.negative:
+            return _INF
+        return self.squares + self.squares_error
+
+
+class _LiveSMA:
+    __slots__ = ("window",)
+
+    def __init__(self, period: int):
+        self.window = _LiveWindow(period)
+
+    def update(self, x: float) -> float:
+        return self.window.sum() / self.window.period if self.window.push(x) else _NAN
+
+
+class _LiveStdev:
+    # Shifted by the first finite value, like stdev()
+    __slots__ = ("window", "shift")
+
+    def __init__(self, period: int):
+        self.window = _LiveWindow(period)
+        self.shift = None
+
+    def update(self, x: float) -> float:
+        if self.shift is None and x == x and abs(x) != _INF:
+            self.shift = x
+        if not self.window.push(x - (self.shift or 0.0)):
+            return _NAN
+        mean = self.window.sum() / self.window.period
+        variance = self.window.sum_of_squares() / self.window.period - mean * mean
+        # NaN (an infinity in the window) propagates, like np.maximum
+        return variance if variance != variance else max(variance, 0.0) ** 0.5
+
+
+class _LiveBollinger:
+    __slots__ = ("mean", "stdev", "width")
+
+    def __init__(self, period: int, width: float, upper: bool):
+        self.mean = _LiveSMA(period)
+        self.stdev = _LiveStdev(period)
+        self.width = width if upper else -width
+
+    def update(self, x: float) -> float:
+        return self.mean.update(x) + self.width * self.stdev.update(x)
+
+
+class _LiveEMA:
+    __slots__ = ("ewm", "lookback", "bars")
+
+    def __init__(self, period: int):
+        self.ewm = _LiveEWM(2.0 / (period + 1))
+        self.lookback = period - 1
+        self.bars = 0
+
+    def update(self, x: float) -> float:
+        value = self.ewm.update(x)
+        self.bars += 1
+        return value if self.bars > self.lookback else _NAN
+
+
+class _LiveRSI:
+    __slots__ = ("gains", "losses", "previous", "period", "bars")
+
+    def __init__(self, period: int):
+        self.gains = _LiveEWM(1.0 / period)
+        self.losses = _LiveEWM(1.0 / period)
+        self.previous = None
+        self.period = period
+        self.bars = 0
+
+    def update(self, x: float) -> float:
+        self.bars += 1
+        previous, self.previous = self.previous, x
+        if previous is None:
+            return _NAN
+        delta = x - previous
+        if delta != delta:
+            gain = loss = _NAN
+        else:
+            gain = delta if delta > 0.0 else 0.0
+            loss = -delta if delta < 0.0 else 0.0
+        avg_gain = self.gains.update(gain)
+        avg_loss = self.losses.update(loss)
+        if self.bars <= self.period:
+            return _NAN
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else 50.0
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+class _LiveATR:
+    __slots__ = ("ewm", "previous_close", "lookback", "bars")
+
+    def __init__(self, period: int):
+        self.ewm = _LiveEWM(1.0 / period)
+        self.previous_close = None
+        self.lookback = period - 1
+        self.bars = 0
+
+    def update(self, high: float, low: float, close: float) -> float:
+        true_range = high - low
+        if self.previous_close is not None:
+            # NaN-propagating max, like np.maximum.reduce
+            previous = self.previous_close
+            candidates = (true_range, abs(high - previous), abs(low - previous))
+            true_range = _NAN if any(value != value for value in candidates) else max(candidates)
+        self.previous_close = close
+        value = self.ewm.update(true_range)
+        self.bars += 1
+        return value if self.bars > self.lookback else _NAN
+
+
+class _LiveMACD:
+    __slots__ = ("fast", "slow", "signal", "lookback", "output", "bars")
+
+    def __init__(self, fast: int, slow: int, signal: int, output: str):
+        self.fast = _LiveEMA(fast)
+        self.slow = _LiveEMA(slow)
+        self.signal = _LiveEWM(2.0 / (signal + 1))
+        self.lookback = max(fast, slow) + signal - 2
+        self.output = output
+        self.bars = 0
+
+    def update(self, x: float) -> float:
+        line = self.fast.update(x) - self.slow.update(x)
+        if self.output == "line":
+            return line
+        signal = self.signal.update(line)
+        self.bars += 1
+        if self.bars <= self.lookback:
+            return _NAN
+        return signal if self.output == "signal" else line - signal
+
+
+register_indicator("SMA", sma, lambda period: period - 1, defaults=(20,), stream=_sma_stream, live=_LiveSMA)
+register_indicator("EMA", ema, lambda period: period - 1, defaults=(20,), stream=_ema_stream, live=_LiveEMA)
+register_indicator("RSI", rsi, lambda period: period, defaults=(14,), stream=_rsi_stream, live=_LiveRSI)
+register_indicator("STDEV", stdev, lambda period: period - 1, defaults=(20,), stream=_stdev_stream,
+                   live=_LiveStdev)
+register_indicator("ATR", atr, lambda period: period - 1, inputs=("HIGH", "LOW", "CLOSE"), defaults=(14,),
+                   stream=_atr_stream, live=_LiveATR)
+register_indicator("BBU", bollinger_upper, lambda period, width: period - 1, defaults=(20, 2),
+                   stream=_bollinger_stream(upper=True),
+                   live=lambda period, width: _LiveBollinger(period, width, upper=True))
+register_indicator("BBL", bollinger_lower, lambda period, width: period - 1, defaults=(20, 2),
+                   stream=_bollinger_stream(upper=False),
+                   live=lambda period, width: _LiveBollinger(period, width, upper=False))
+register_indicator("MACD", macd, lambda fast, slow, signal: max(fast, slow) - 1, defaults=(12, 26, 9),
+                   stream=_macd_stream, live=lambda fast, slow, signal: _LiveMACD(fast, slow, signal, "line"))
+register_indicator("MACDS", macd_signal, lambda fast, slow, signal: max(fast, slow) + signal - 2,
+                   defaults=(12, 26, 9), stream=_macd_signal_stream,
+                   live=lambda fast, slow, signal: _LiveMACD(fast, slow, signal, "signal"))
+register_indicator("MACDH", macd_histogram, lambda fast, slow, signal: max(fast, slow) + signal - 2,
+                   defaults=(12, 26, 9), stream=_macd_histogram_stream,
+                   live=lambda fast, slow, signal: _LiveMACD(fast, slow, signal, "histogram"))
@@ -0,0 +1,144 @@
+# engine/job_store.py
+import contextlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from .data_utils import data_fingerprint
+
+
+def _read_lines(path: str) -> Tuple[List[Dict[str, Any]], int]:
+    # Parsed records and the byte length of the intact prefix of the file.
+    # A torn final line (process killed mid-write) is ignored.
+    records, good = [], 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            good += len(line)
+    return records, good
+
+
+class JobStore:
+    """
+    Append-only JSON-lines checkpoint of a long-running job.
+
+    Each completed work unit is one line {"key": ..., ...} flushed (and by
+    default fsynced) as soon as it is appended, so a job killed partway can
+    be restarted with the same store and skip every key already present.
+    The optional first line records the job settings ("meta"); reopening a
+    store with different settings raises ValueError instead of silently
+    mixing results. Other processes can read partial results at any time
+    with read_job().
+    """
+
+    def __init__(self, path: str, meta: Optional[Dict[str, Any]] = None, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self.meta: Optional[Dict[str, Any]] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path):
+            lines, good = _read_lines(path)
+            if good < os.path.getsize(path):
+                # Drop the torn tail so new appends start on a clean line
+                with open(path, "r+b") as f:
+                    f.truncate(good)
+            for line in lines:
+                if "meta" in line:
+                    self.meta = line["meta"]
+                else:
+                    self._records[line["key"]] = line
+        self._file = open(path, "a", encoding="utf-8")
+
+        if meta is not None:
+            meta = json.loads(json.dumps(meta))
+            if self.meta is None and not self._records:
+                self.meta = meta
+                self._write([{"meta": meta}])
+            elif self.meta != meta:
+                self.close()
+                raise ValueError(f"Job store {path} was created with different settings: {self.meta} != {meta}")
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, key):
+        return key in self._records
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._records.get(key)
+
+    def keys(self) -> List[str]:
+        return list(self._records)
+
+    def records(self) -> List[Dict[str, Any]]:
+        return list(self._records.values())
+
+    def append(self, key: str, record: Dict[str, Any]):
+        """Persists one completed work unit."""
+        self.append_many([(key, record)])
+
+    def append_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        """Persists several completed work units with a single flush."""
+        lines = []
+        for key, record in items:
+            line = {"key": key, **record}
+            self._records[key] = line
+            lines.append(line)
+        self._write(lines)
+
+    def _write(self, lines: List[Dict[str, Any]]):
+        if not lines:
+            return
+        self._file.write("".join(json.dumps(line) + "\n" for line in lines))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.records())
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_job(path: str) -> pd.DataFrame:
+    """Reads the completed work units of a (possibly still running) job as a DataFrame."""
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    records, _ = _read_lines(path)
+    latest = {record["key"]: record for record in records if "key" in record}
+    return pd.DataFrame(list(latest.values()))
+
+
+def open_job(path: Optional[str], job: str, df: pd.DataFrame, **settings):
+    """
+    Opens the checkpoint store of a job, or a no-op context when path is None.
+
+    The store's meta line records the job type, the dataset fingerprint and
+    the given settings, so a checkpoint is only ever resumed by the same job
+    on the same data.
+
+    Returns:
+        Context manager yielding a JobStore (or None).
+    """
+    if path is None:
+        return contextlib.nullcontext()
+    return JobStore(path, meta={"job": job, "fingerprint": data_fingerprint(df), **settings})
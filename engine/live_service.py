@@ -0,0 +1,438 @@
+# engine/live_service.py
+"""
+Asyncio fan-out of one live bar stream to many strategies.
+
+A LiveService reads bars from a pluggable async source (replay_frame,
+replay_csv, socket_source or any async iterable of Bar) and evaluates every
+subscribed strategy on each bar. The indicators of all subscriptions are
+merged into one IndicatorGraph: an indicator used by several strategies
+(same name, field, parameters) has a single live state, updated once per
+bar, and each strategy's rules are compiled to a scalar function of the
+bar and the graph's current values (code_generator.generate_live_rules).
+
+Backpressure: bars are read into a bounded ingest queue, so a source that
+outruns the service is suspended (a socket stops being read and TCP flow
+control pushes back). Each subscription has its own bounded signal queue
+with an overflow policy: "drop_oldest" (default, a slow consumer sees the
+latest signals), "drop_newest", or "block" (the service waits for the
+consumer, which in turn stalls the source).
+
+Feeds re-send bars (e.g. after a reconnect): a bar whose timestamp is not
+after the last processed one is skipped, so no indicator advances twice.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .code_generator import ARRAY_FIELDS, generate_live_rules
+from .dsl_parser import parse_dsl_to_ast
+from .indicators import indicator_inputs, live_indicator
+from .market_store import iter_csv_chunks
+from .optimizer import optimize_ast
+
+# Subscription queue overflow policies
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+# Latency samples kept per LatencyStats for the percentiles
+LATENCY_WINDOW = 10_000
+
+
+class Bar(NamedTuple):
+    # One bar of the live feed; values in ARRAY_FIELDS order after the timestamp
+    timestamp: Any
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class Signal(NamedTuple):
+    # Decision of one strategy on one bar, as delivered to its subscriber
+    strategy: str
+    timestamp: Any
+    entry: bool
+    exit: bool
+    position: bool
+    # perf_counter() when the bar was read from the source
+    received: float
+
+
+class LatencyStats:
+    """Running latency summary: count, mean and max, percentiles over the last samples."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples: deque = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def summary(self) -> Dict[str, float]:
+        """Latencies in microseconds."""
+        if not self.count:
+            return {"count": 0, "mean_us": 0.0, "p50_us": 0.0, "p99_us": 0.0, "max_us": 0.0}
+        p50, p99 = np.percentile(np.fromiter(self.samples, dtype=float), (50, 99))
+        return {"count": self.count, "mean_us": self.total / self.count * 1e6, "p50_us": float(p50) * 1e6,
+                "p99_us": float(p99) * 1e6, "max_us": self.max * 1e6}
+
+
+class IndicatorGraph:
+    """
+    Deduplicated live indicator states shared by many strategies.
+
+    Nodes are keyed by the optimizer's temporary names, which are canonical
+    (ind_sma_close_20 is the same indicator in every strategy), and
+    reference counted: a node is created by the first strategy that uses it
+    and dropped with the last one. A node added while the feed is running
+    warms up from that bar on, unless it already existed.
+    """
+
+    def __init__(self):
+        # name -> (live state, positions of its inputs within a bar's values)
+        self._nodes: Dict[str, Tuple[Any, Tuple[int, ...]]] = {}
+        self._refs: Dict[str, int] = {}
+        self.values: Dict[str, float] = {}
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, name):
+        return name in self._nodes
+
+    def add(self, nodes: Dict[str, Dict[str, Any]]):
+        """Adds (or references) the hoisted indicators of one optimized AST."""
+        for name, node in nodes.items():
+            if node.get('timeframe'):
+                raise ValueError(f"Timeframe indicators (@{node['timeframe']}) are not supported live")
+            if name not in self._nodes:
+                field, params = node['params'][0], node['params'][1:]
+                inputs = tuple(ARRAY_FIELDS.index(column) for column in indicator_inputs(node['name'], field))
+                self._nodes[name] = (live_indicator(node['name'], params), inputs)
+                self.values[name] = np.nan
+            self._refs[name] = self._refs.get(name, 0) + 1
+
+    def remove(self, names: Iterable[str]):
+        """Releases one reference to each indicator, dropping unreferenced ones."""
+        for name in names:
+            self._refs[name] -= 1
+            if not self._refs[name]:
+                del self._refs[name], self._nodes[name], self.values[name]
+
+    def refs(self, name: str) -> int:
+        return self._refs.get(name, 0)
+
+    def update(self, values: Tuple[float, ...]) -> Dict[str, float]:
+        """Advances every indicator by one bar (OHLCV values in ARRAY_FIELDS order)."""
+        current = self.values
+        for name, (state, inputs) in self._nodes.items():
+            current[name] = state.update(*[values[position] for position in inputs])
+        return current
+
+
+class Subscription:
+    """
+    One strategy served by a LiveService.
+
+    Iterate it (async for signal in subscription) to receive its Signal
+    for every bar until it is unsubscribed or the feed ends.
+    """
+
+    def __init__(self, name: str, strategy: Union[str, Dict[str, Any]], queue_size: int = 256,
+                 overflow: str = "drop_oldest", position: bool = False):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}. Expected one of {OVERFLOW_POLICIES}")
+        ast = parse_dsl_to_ast(strategy) if isinstance(strategy, str) else strategy
+        self.name = name
+        self.optimized = optimize_ast(ast)
+        source, self.indicator_names = generate_live_rules(self.optimized)
+        namespace: Dict[str, Any] = {}
+        exec(source, namespace)
+        self.evaluate_rules = namespace["evaluate_rules"]
+        self.overflow = overflow
+        self.position = position
+        self.queue: "asyncio.Queue[Optional[Signal]]" = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+        # Put waiting for the consumer under "block", cancelled by close()
+        self._blocked: Optional[asyncio.Future] = None
+        self.bars = 0
+        self.delivered = 0
+        self.dropped = 0
+        # Bar read from the source -> signal taken by the consumer
+        self.latency = LatencyStats()
+
+    def evaluate(self, bar: Bar, indicators: Dict[str, float]) -> Signal:
+        """Evaluates the rules on one bar and advances the position (compute_positions rules)."""
+        entry, exit = self.evaluate_rules(*bar[1:], *[indicators[name] for name in self.indicator_names])
+        if entry and exit:
+            self.position = not self.position
+        elif entry:
+            self.position = True
+        elif exit:
+            self.position = False
+        self.bars += 1
+        return Signal(self.name, bar.timestamp, entry, exit, self.position, 0.0)
+
+    async def deliver(self, signal: Signal):
+        if self.overflow == "block":
+            self._blocked = asyncio.ensure_future(self.queue.put(signal))
+            try:
+                await self._blocked
+            except asyncio.CancelledError:
+                if not self.closed:
+                    raise
+                return
+            finally:
+                self._blocked = None
+        else:
+            if self.queue.full():
+                if self.overflow == "drop_newest":
+                    self.dropped += 1
+                    return
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.queue.put_nowait(signal)
+        self.delivered += 1
+
+    def close(self):
+        # The end-of-feed marker is always queued, displacing a signal if needed
+        self.closed = True
+        if self._blocked is not None:
+            self._blocked.cancel()
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(None)
+
+    async def get(self) -> Optional[Signal]:
+        """Next signal, or None once the subscription is closed."""
+        signal = await self.queue.get()
+        if signal is not None:
+            self.latency.record(time.perf_counter() - signal.received)
+        return signal
+
+    def __aiter__(self) -> AsyncIterator[Signal]:
+        return self._iterate()
+
+    async def _iterate(self):
+        while True:
+            signal = await self.get()
+            if signal is None:
+                return
+            yield signal
+
+    def stats(self) -> Dict[str, Any]:
+        return {"bars": self.bars, "delivered": self.delivered, "dropped": self.dropped,
+                "queued": self.queue.qsize(), "position": self.position, "latency": self.latency.summary()}
+
+
+class LiveService:
+    """
+    Serves many strategies from one bar stream (see the module docstring).
+
+    subscribe()/unsubscribe() may be called at any time, also while run()
+    is consuming the source; changes take effect from the next bar.
+    """
+
+    def __init__(self, source: AsyncIterable[Bar], ingest_queue_size: int = 1024,
+                 default_queue_size: int = 256):
+        self.source = source
+        self.ingest_queue_size = ingest_queue_size
+        self.default_queue_size = default_queue_size
+        self.graph = IndicatorGraph()
+        self.subscriptions: Dict[str, Subscription] = {}
+        self.bars = 0
+        # Duplicate or out-of-order bars skipped
+        self.skipped = 0
+        self.last_timestamp: Any = None
+        # Bar read from the source -> processing starts (time spent queued)
+        self.ingest_latency = LatencyStats()
+        # Bar read from the source -> every subscriber's signal queued
+        self.processing_latency = LatencyStats()
+        # Graph update alone
+        self.update_latency = LatencyStats()
+
+    def subscribe(self, name: str, strategy: Union[str, Dict[str, Any]], queue_size: Optional[int] = None,
+                  overflow: str = "drop_oldest") -> Subscription:
+        """
+        Adds a strategy to the feed.
+
+        Args:
+            name: Unique subscription name (reported in its signals).
+            strategy: DSL text or parsed AST.
+            queue_size: Signals buffered for the consumer (default_queue_size).
+            overflow: What to do when the consumer falls behind (OVERFLOW_POLICIES).
+
+        Returns:
+            The Subscription to iterate for signals.
+        """
+        if name in self.subscriptions:
+            raise ValueError(f"Already subscribed: {name}")
+        subscription = Subscription(name, strategy, queue_size or self.default_queue_size, overflow)
+        self.graph.add(subscription.optimized['indicators'])
+        self.subscriptions[name] = subscription
+        return subscription
+
+    def unsubscribe(self, name: str):
+        """Removes a strategy; its iterator ends and unshared indicators are dropped."""
+        subscription = self.subscriptions.pop(name, None)
+        if subscription is None:
+            raise ValueError(f"Not subscribed: {name}")
+        self.graph.remove(subscription.indicator_names)
+        subscription.close()
+
+    async def process_bar(self, bar: Bar, received: Optional[float] = None):
+        """
+        Updates the graph once and delivers every subscription's signal for one
+        bar; a bar not after the last processed one is skipped.
+        """
+        if self.last_timestamp is not None and bar.timestamp <= self.last_timestamp:
+            self.skipped += 1
+            return
+        self.last_timestamp = bar.timestamp
+        received = time.perf_counter() if received is None else received
+        start = time.perf_counter()
+        self.ingest_latency.record(start - received)
+        indicators = self.graph.update(bar[1:])
+        self.update_latency.record(time.perf_counter() - start)
+        for subscription in list(self.subscriptions.values()):
+            if subscription.closed:
+                # Unsubscribed while an earlier subscriber blocked this bar
+                continue
+            signal = subscription.evaluate(bar, indicators)._replace(received=received)
+            await subscription.deliver(signal)
+        self.bars += 1
+        self.processing_latency.record(time.perf_counter() - received)
+
+    async def _read(self, queue: asyncio.Queue):
+        try:
+            async for bar in self.source:
+                # Waits while the queue is full: backpressure on the source
+                await queue.put((bar, time.perf_counter()))
+        finally:
+            await queue.put(None)
+
+    async def run(self):
+        """Consumes the source until it ends, then closes every subscription."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.ingest_queue_size)
+        reader = asyncio.ensure_future(self._read(queue))
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                await self.process_bar(*item)
+                # Lets subscribers consume even when the source never blocks
+                await asyncio.sleep(0)
+            await reader
+        finally:
+            reader.cancel()
+            for name in list(self.subscriptions):
+                self.unsubscribe(name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"bars": self.bars, "skipped": self.skipped, "subscriptions": len(self.subscriptions),
+                "indicators": len(self.graph),
+                "ingest_latency": self.ingest_latency.summary(),
+                "processing_latency": self.processing_latency.summary(),
+                "update_latency": self.update_latency.summary(),
+                "strategies": {name: subscription.stats() for name, subscription in self.subscriptions.items()}}
+
+
+# --- Sources ---
+
+def _frame_bars(df: pd.DataFrame) -> Iterable[Bar]:
+    columns = [df[field].to_numpy(dtype=float).tolist() if field in df else [np.nan] * len(df)
+               for field in ARRAY_FIELDS]
+    return (Bar(timestamp, *values) for timestamp, *values in zip(df.index, *columns))
+
+
+async def replay_frame(df: pd.DataFrame, interval: float = 0.0) -> AsyncIterator[Bar]:
+    """
+    Replays an OHLCV frame as a live feed (a stand-in for a real source).
+
+    Args:
+        df: Bars in time order.
+        interval: Seconds between bars; 0 replays as fast as the service
+            consumes, still yielding to the event loop after every bar.
+    """
+    for bar in _frame_bars(df):
+        yield bar
+        await asyncio.sleep(interval)
+
+
+async def replay_csv(path: str, interval: float = 0.0, chunksize: int = 100_000,
+                     **csv_options) -> AsyncIterator[Bar]:
+    """Replays a CSV file chunk by chunk (see market_store.iter_csv_chunks for csv_options)."""
+    for chunk in iter_csv_chunks(path, chunksize=chunksize, **csv_options):
+        async for bar in replay_frame(chunk, interval):
+            yield bar
+
+
+def encode_bar(bar: Bar) -> bytes:
+    """One JSON line of the socket_source wire format."""
+    timestamp = bar.timestamp.isoformat() if hasattr(bar.timestamp, "isoformat") else bar.timestamp
+    return (json.dumps({"timestamp": timestamp, **dict(zip(ARRAY_FIELDS, bar[1:]))}) + "\n").encode()
+
+
+async def socket_source(host: str, port: int) -> AsyncIterator[Bar]:
+    """
+    Reads bars from a TCP socket, one JSON object per line (see encode_bar)
+    with a "timestamp" and the OHLCV fields, until the peer closes.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            record = json.loads(line)
+            yield Bar(pd.Timestamp(record["timestamp"]),
+                      *[float(record.get(field, np.nan)) for field in ARRAY_FIELDS])
+    finally:
+        writer.close()
+
+
+async def serve_bars(bars: Iterable[Bar], host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+    """
+    Starts a local TCP server writing bars to each client in the
+    socket_source format (a feed stand-in for testing and demos).
+    """
+    async def handle(reader, writer):
+        for bar in bars:
+            writer.write(encode_bar(bar))
+            await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+async def run_live(strategies: Dict[str, Union[str, Dict[str, Any]]], source: AsyncIterable[Bar],
+                   overflow: str = "block") -> Dict[str, List[Signal]]:
+    """
+    Runs strategies over a whole source and collects their signals
+    (every signal by default: the "block" policy never drops).
+
+    Returns:
+        Strategy name -> signals in bar order.
+    """
+    service = LiveService(source)
+    subscriptions = {name: service.subscribe(name, strategy, overflow=overflow)
+                     for name, strategy in strategies.items()}
+
+    async def collect(subscription):
+        return [signal async for signal in subscription]
+
+    consumers = [asyncio.ensure_future(collect(subscription)) for subscription in subscriptions.values()]
+    await service.run()
+    return dict(zip(subscriptions, await asyncio.gather(*consumers)))
@@ -0,0 +1,360 @@
+# engine/market_store.py
+"""
+Binary columnar store for OHLCV histories.
+
+Each symbol is a directory holding one contiguous .npy file per column
+(float64 prices and volume, int64 UTC nanosecond timestamps, sorted) plus a
+small meta.json. Column files carry the version recorded in meta.json
+(close.3.npy): a rewrite creates new files and commits them by replacing
+meta.json, so readers never see new columns beside old metadata and maps
+of the old files stay intact. Reads memory-map the files and binary-search the timestamp
+column, so loading a date range of a long minute series costs two
+searchsorted calls and only faults in the pages of the requested rows.
+
+CSV files are converted with ingest_csv(), or from the command line:
+
+    python -m engine.market_store data/store SPY spy_minutes.csv
+"""
+import argparse
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .data_utils import OHLCV_FIELDS
+
+# Column file name of the timestamps (fields use their own name)
+TIMESTAMP_COLUMN = "timestamps"
+META_FILE = "meta.json"
+
+# Column names recognized as the timestamp column of a CSV (after normalization)
+TIMESTAMP_COLUMNS = ("DATE", "DATETIME", "TIMESTAMP", "TIME")
+
+TimeLike = Union[str, pd.Timestamp, np.datetime64, None]
+
+
+def _save(path: str, values: np.ndarray):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.ascontiguousarray(values))
+    os.replace(tmp_path, path)
+
+
+def column_file(meta: dict, column: str) -> str:
+    """File name of a stored column in the version described by meta."""
+    if "version" not in meta:
+        # Symbols written before column files were versioned
+        return f"{column}.npy"
+    return f"{column}.{meta['version']}.npy"
+
+
+def write_symbol(root: str, symbol: str, df: pd.DataFrame, extra: Optional[dict] = None):
+    """
+    Writes (or replaces) one symbol from a DataFrame indexed by timestamp.
+
+    Every numeric column is stored as float64; the index is stored as UTC
+    nanoseconds and must be sorted and free of duplicates.
+
+    Args:
+        root: Store directory.
+        symbol: Symbol name (directory name).
+        df: OHLCV DataFrame with a DatetimeIndex.
+        extra: Optional JSON-serializable entries added to the symbol's metadata.
+    """
+    if not isinstance(df.index, pd.DatetimeIndex):
+        raise ValueError("Market data needs a DatetimeIndex")
+    if not df.index.is_monotonic_increasing or df.index.has_duplicates:
+        raise ValueError(f"Timestamps of {symbol} must be strictly increasing")
+    index = df.index
+    tz = str(index.tz) if index.tz is not None else None
+    if tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    fields = [column for column in df.columns if pd.api.types.is_numeric_dtype(df[column])]
+
+    directory = os.path.join(root, symbol)
+    os.makedirs(directory, exist_ok=True)
+    meta_path = os.path.join(directory, META_FILE)
+    previous = read_meta(root, symbol) if os.path.exists(meta_path) else {}
+    meta = {"fields": fields, "rows": len(df), "tz": tz, "index_name": df.index.name,
+            "start": df.index[0].isoformat() if len(df) else None,
+            "end": df.index[-1].isoformat() if len(df) else None, **(extra or {}),
+            "version": previous.get("version", 0) + 1}
+    # New column files first, under the new version; replacing meta.json commits them
+    _save(os.path.join(directory, column_file(meta, TIMESTAMP_COLUMN)), index.as_unit("ns").asi8)
+    for field in fields:
+        _save(os.path.join(directory, column_file(meta, field)), df[field].to_numpy(dtype=float))
+    tmp_path = os.path.join(directory, f"{META_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+    # Files of earlier versions (or of a write interrupted before its commit);
+    # open maps of them stay valid after the unlink
+    current = {column_file(meta, column) for column in [TIMESTAMP_COLUMN, *fields]}
+    for name in os.listdir(directory):
+        if name.endswith(".npy") and name not in current:
+            os.remove(os.path.join(directory, name))
+
+
+def iter_csv_chunks(path: str, chunksize: int = 1_000_000, timestamp_column: Optional[str] = None,
+                    date_format: Optional[str] = None, tz: Optional[str] = None,
+                    sorted_input: bool = True) -> Iterator[pd.DataFrame]:
+    """
+    Yields an OHLCV CSV as normalized frames of at most chunksize rows.
+
+    Column names are normalized like load_data() (stripped, upper-cased) and
+    the timestamp column becomes the index. Arguments are those of
+    read_csv_frame; with sorted_input, a timestamp going backwards raises
+    ValueError, since chunked consumers cannot re-sort the file.
+    """
+    last = None
+    for chunk in pd.read_csv(path, chunksize=chunksize, skipinitialspace=True):
+        chunk.columns = [str(column).strip().upper() for column in chunk.columns]
+        column = timestamp_column.strip().upper() if timestamp_column else next(
+            (name for name in TIMESTAMP_COLUMNS if name in chunk.columns), chunk.columns[0])
+        if column not in chunk.columns:
+            raise ValueError(f"Timestamp column {column} not found in {path}")
+        index = pd.DatetimeIndex(pd.to_datetime(chunk.pop(column), format=date_format), name=column.lower())
+        if tz is not None and index.tz is None:
+            index = index.tz_localize(tz)
+        if sorted_input and len(index):
+            if not index.is_monotonic_increasing or (last is not None and index[0] < last):
+                raise ValueError(f"{path} is not sorted by time; ingest it with ingest_csv() first")
+            last = index[-1]
+        yield chunk.set_axis(index, axis=0)
+
+
+def read_csv_frame(path: str, timestamp_column: Optional[str] = None, date_format: Optional[str] = None,
+                   tz: Optional[str] = None, chunksize: int = 1_000_000) -> pd.DataFrame:
+    """
+    Parses an OHLCV CSV into a sorted, de-duplicated DataFrame.
+
+    Column names are normalized like load_data() (stripped, upper-cased).
+    The file is read in chunks of chunksize rows to bound parser memory.
+
+    Args:
+        path: CSV file.
+        timestamp_column: Timestamp column (default: the first of
+            TIMESTAMP_COLUMNS present, else the first column).
+        date_format: Optional strftime format; speeds up parsing of long files.
+        tz: Time zone of naive timestamps in the file (None: keep naive).
+        chunksize: Rows parsed per chunk.
+
+    Returns:
+        DataFrame indexed by timestamp; for repeated timestamps the last row wins.
+    """
+    frames = list(iter_csv_chunks(path, chunksize, timestamp_column, date_format, tz, sorted_input=False))
+    if not frames:
+        raise ValueError(f"No rows in {path}")
+    df = pd.concat(frames)
+    df = df[~df.index.duplicated(keep="last")]
+    return df.sort_index(kind="mergesort")
+
+
+def ingest_csv(path: str, root: str, symbol: Optional[str] = None, **options) -> str:
+    """
+    Converts a CSV file into the columnar store.
+
+    Args:
+        path: CSV file.
+        root: Store directory.
+        symbol: Symbol name (default: the upper-cased file name without extension).
+        **options: Passed to read_csv_frame.
+
+    Returns:
+        The symbol written.
+    """
+    symbol = symbol or os.path.splitext(os.path.basename(path))[0].upper()
+    write_symbol(root, symbol, read_csv_frame(path, **options))
+    return symbol
+
+
+def read_meta(root: str, symbol: str) -> dict:
+    """
+    Reads the metadata of a stored symbol without mapping its columns.
+
+    Returns:
+        Dictionary with 'fields', 'rows', 'tz', 'index_name', the
+        'start'/'end' timestamps (ISO strings in the symbol's time zone) and
+        the 'version' of the column files (see column_file).
+    """
+    meta_path = os.path.join(root, symbol, META_FILE)
+    if not os.path.exists(meta_path):
+        raise ValueError(f"Unknown symbol: {symbol}")
+    with open(meta_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _bound(meta: dict, value: TimeLike) -> int:
+    # A time bound as stored (UTC nanoseconds)
+    stamp = pd.Timestamp(value)
+    if meta["tz"] is not None:
+        stamp = stamp.tz_localize(meta["tz"]) if stamp.tzinfo is None else stamp
+        stamp = stamp.tz_convert("UTC").tz_localize(None)
+    elif stamp.tzinfo is not None:
+        raise ValueError("Time zone aware bound for a symbol stored without time zone")
+    return stamp.as_unit("ns").value
+
+
+def locate(meta: dict, timestamps: np.ndarray, start: TimeLike = None, end: TimeLike = None) -> Tuple[int, int]:
+    """Row range [first, last) of the bars with start <= timestamp < end (binary search)."""
+    first = 0 if start is None else int(np.searchsorted(timestamps, _bound(meta, start), side="left"))
+    last = len(timestamps) if end is None else int(np.searchsorted(timestamps, _bound(meta, end), side="left"))
+    return first, max(first, last)
+
+
+def _frame_fields(meta: dict, columns: Dict[str, np.ndarray], fields: Optional[Sequence[str]]) -> List[str]:
+    # Requested fields, default all stored with OHLCV first
+    if fields is None:
+        fields = [field for field in OHLCV_FIELDS if field in meta["fields"]]
+        fields += [field for field in meta["fields"] if field not in fields]
+    missing = [field for field in fields if field not in columns]
+    if missing:
+        raise ValueError(f"Fields {missing} not stored")
+    return list(fields)
+
+
+def slice_frame(meta: dict, timestamps: np.ndarray, columns: Dict[str, np.ndarray], start: TimeLike = None,
+                end: TimeLike = None, fields: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Builds the DataFrame of the bars with start <= timestamp < end from stored arrays.
+
+    Args:
+        meta: Symbol metadata (see read_meta).
+        timestamps: Sorted UTC nanosecond timestamps.
+        columns: Field -> values aligned with timestamps.
+        start: First timestamp included (None: from the first bar).
+        end: First timestamp excluded (None: through the last bar).
+        fields: Columns to include (default: all stored, OHLCV first).
+
+    Returns:
+        DataFrame shaped like load_data(); its columns are views onto the arrays.
+    """
+    fields = _frame_fields(meta, columns, fields)
+    return frame_rows(meta, timestamps, columns, *locate(meta, timestamps, start, end), fields)
+
+
+def frame_rows(meta: dict, timestamps: np.ndarray, columns: Dict[str, np.ndarray], first: int, last: int,
+               fields: Sequence[str]) -> pd.DataFrame:
+    """DataFrame of rows [first, last) of stored arrays; columns are views."""
+    index = pd.DatetimeIndex(timestamps[first:last].view("M8[ns]"), name=meta["index_name"])
+    if meta["tz"] is not None:
+        index = index.tz_localize("UTC").tz_convert(meta["tz"])
+    return pd.DataFrame({field: columns[field][first:last] for field in fields}, index=index, copy=False)
+
+
+class MarketStore:
+    """
+    Read side of the columnar store: memory-mapped, date-sliced OHLCV loads.
+
+    Column files are mapped once per symbol version and reused by later
+    loads until the symbol is rewritten.
+    Returned frames and arrays are read-only views onto the mapped files.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._symbols: Dict[str, Tuple[dict, np.ndarray, Dict[str, np.ndarray]]] = {}
+
+    def symbols(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, META_FILE)))
+
+    def open(self, symbol: str) -> Tuple[dict, np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Returns (meta, timestamps, columns) of a symbol, all mapped read-only.
+
+        meta.json is re-read on every call and the maps are reused only while
+        it is unchanged, so a load after write_symbol rewrote the symbol sees
+        the new version; frames returned earlier keep the old maps.
+        """
+        meta = read_meta(self.root, symbol)
+        cached = self._symbols.get(symbol)
+        if cached is not None and cached[0] == meta:
+            return cached
+        directory = os.path.join(self.root, symbol)
+        try:
+            # Plain ndarray views of the maps (np.memmap results would leak into user code)
+            timestamps = np.asarray(np.load(os.path.join(directory, column_file(meta, TIMESTAMP_COLUMN)),
+                                            mmap_mode="r"))
+            columns = {field: np.asarray(np.load(os.path.join(directory, column_file(meta, field)), mmap_mode="r"))
+                       for field in meta["fields"]}
+        except FileNotFoundError:
+            # A concurrent rewrite committed a newer version and removed these files
+            if read_meta(self.root, symbol) == meta:
+                raise
+            return self.open(symbol)
+        self._symbols[symbol] = (meta, timestamps, columns)
+        return self._symbols[symbol]
+
+    def locate(self, symbol: str, start: TimeLike = None, end: TimeLike = None) -> Tuple[int, int]:
+        """Row range [first, last) of the bars with start <= timestamp < end."""
+        meta, timestamps, _ = self.open(symbol)
+        return locate(meta, timestamps, start, end)
+
+    def arrays(self, symbol: str, start: TimeLike = None, end: TimeLike = None,
+               fields: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Column views for start <= timestamp < end, without building a DataFrame."""
+        meta, timestamps, columns = self.open(symbol)
+        first, last = locate(meta, timestamps, start, end)
+        fields = fields or meta["fields"]
+        missing = [field for field in fields if field not in columns]
+        if missing:
+            raise ValueError(f"Fields {missing} not stored for {symbol}")
+        return {field: columns[field][first:last] for field in fields}
+
+    def load(self, symbol: str, start: TimeLike = None, end: TimeLike = None,
+             fields: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Loads the bars of a symbol with start <= timestamp < end (see slice_frame).
+
+        Returns:
+            DataFrame shaped like load_data(), backed by the mapped files.
+        """
+        meta, timestamps, columns = self.open(symbol)
+        return slice_frame(meta, timestamps, columns, start, end, fields)
+
+    def iter_chunks(self, symbol: str, chunk_size: int, start: TimeLike = None, end: TimeLike = None,
+                    fields: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yields the bars with start <= timestamp < end as consecutive frames of
+        at most chunk_size rows, each a view onto the mapped files.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        meta, timestamps, columns = self.open(symbol)
+        fields = _frame_fields(meta, columns, fields)
+        first, last = locate(meta, timestamps, start, end)
+        for row in range(first, last, chunk_size):
+            yield frame_rows(meta, timestamps, columns, row, min(row + chunk_size, last), fields)
+
+
+def load_market_data(root: str, symbol: str, start: TimeLike = None, end: TimeLike = None,
+                     fields: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Convenience wrapper for MarketStore(root).load(...)."""
+    return MarketStore(root).load(symbol, start, end, fields)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Convert OHLCV CSV files into the columnar market-data store.")
+    parser.add_argument("root", help="store directory")
+    parser.add_argument("symbol", help="symbol to write")
+    parser.add_argument("csv", nargs="+", help="CSV files (concatenated, later files win on duplicate timestamps)")
+    parser.add_argument("--timestamp-column", default=None)
+    parser.add_argument("--date-format", default=None)
+    parser.add_argument("--tz", default=None, help="time zone of naive timestamps")
+    args = parser.parse_args(argv)
+
+    frames = [read_csv_frame(path, timestamp_column=args.timestamp_column, date_format=args.date_format, tz=args.tz)
+              for path in args.csv]
+    df = pd.concat(frames)
+    df = df[~df.index.duplicated(keep="last")].sort_index(kind="mergesort")
+    write_symbol(args.root, args.symbol, df)
+    print(f"{args.symbol}: {len(df)} bars, {df.index[0]} .. {df.index[-1]}")
+
+
+if __name__ == "__main__":
+    main()
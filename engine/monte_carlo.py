@@ -0,0 +1,96 @@
+# engine/monte_carlo.py
+from typing import Any, Dict, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+# Supported resampling schemes for the trade sequence
+MONTE_CARLO_METHODS = ("bootstrap", "shuffle")
+
+DEFAULT_PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+
+def simulate_paths(trade_returns: np.ndarray, draws: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Computes equity statistics for a matrix of resampled trade sequences.
+
+    Args:
+        trade_returns: Per-trade returns (fractions).
+        draws: Integer matrix (simulations x trades) of indices into
+            trade_returns; each row is one simulated trade sequence.
+
+    Returns:
+        Dictionary with one value per simulation: 'final_return' and
+        'max_drawdown' (fractions of the running equity peak, which starts at
+        the initial capital).
+    """
+    equity = np.cumprod(1.0 + trade_returns[draws], axis=1)
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, 1.0, out=peak)
+    drawdown = np.max((peak - equity) / peak, axis=1, initial=0.0)
+    final = equity[:, -1] - 1.0 if equity.shape[1] else np.zeros(len(equity))
+    return {'final_return': final, 'max_drawdown': drawdown}
+
+
+def run_monte_carlo(trades: Union[Mapping[str, Any], Sequence[float], np.ndarray], simulations: int = 10000,
+                    method: str = "bootstrap", seed: Optional[int] = None,
+                    max_bytes: int = 64 * 1024 * 1024,
+                    percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+    """
+    Monte Carlo distribution of equity outcomes from a backtest's trades.
+
+    "bootstrap" draws each simulated sequence with replacement from the
+    closed trades; "shuffle" permutes them, which leaves the final return
+    unchanged and only reshuffles the path (drawdown) risk. Simulations run
+    in chunks sized so the (simulations x trades) working matrices stay
+    within about max_bytes.
+
+    Args:
+        trades: A run_backtest result dict (its 'trade_returns' are used) or
+            an array of per-trade returns.
+        simulations: Number of simulated trade sequences.
+        method: One of MONTE_CARLO_METHODS.
+        seed: Seed for numpy's default_rng; the same seed and max_bytes
+            reproduce the same simulations.
+        max_bytes: Approximate memory budget per chunk.
+        percentiles: Percentiles reported in the summary.
+
+    Returns:
+        Dictionary with the per-simulation 'final_return' and 'max_drawdown'
+        arrays, a 'summary' DataFrame (one row per percentile), and
+        'probability_of_loss' (share of simulations ending below the start).
+    """
+    if method not in MONTE_CARLO_METHODS:
+        raise ValueError(f"Unknown Monte Carlo method: {method}. Expected one of {MONTE_CARLO_METHODS}")
+    if simulations < 1:
+        raise ValueError("simulations must be positive")
+    returns = trades['trade_returns'] if isinstance(trades, Mapping) else trades
+    returns = np.asarray(returns, dtype=float)
+    count = len(returns)
+
+    rng = np.random.default_rng(seed)
+    # Index matrix, gathered returns, equity and peak are alive at the same time
+    rows = max(1, int(max_bytes // max(count * 32, 1)))
+    final_return = np.empty(simulations)
+    max_drawdown = np.empty(simulations)
+    for start in range(0, simulations, rows):
+        size = min(rows, simulations - start)
+        if method == "bootstrap":
+            draws = rng.integers(0, count, size=(size, count)) if count else np.zeros((size, 0), dtype=np.intp)
+        else:
+            draws = rng.permuted(np.broadcast_to(np.arange(count), (size, count)), axis=1)
+        paths = simulate_paths(returns, draws)
+        final_return[start:start + size] = paths['final_return']
+        max_drawdown[start:start + size] = paths['max_drawdown']
+
+    summary = pd.DataFrame({
+        'final_return': np.percentile(final_return, percentiles),
+        'max_drawdown': np.percentile(max_drawdown, percentiles),
+    }, index=pd.Index(percentiles, name="percentile"))
+
+    return {
+        'final_return': final_return,
+        'max_drawdown': max_drawdown,
+        'summary': summary,
+        'probability_of_loss': float(np.mean(final_return < 0)),
+    }
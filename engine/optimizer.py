@@ -0,0 +1,122 @@
+# engine/optimizer.py
+import operator
+from collections import OrderedDict
+from typing import Any, Dict
+
+# Python evaluators for comparisons between two constants (word and symbol forms)
+CONSTANT_OPS = {
+    "GT": operator.gt, ">": operator.gt,
+    "LT": operator.lt, "<": operator.lt,
+    "GTE": operator.ge, ">=": operator.ge,
+    "LTE": operator.le, "<=": operator.le,
+    "EQ": operator.eq, "==": operator.eq,
+    "NEQ": operator.ne, "!=": operator.ne,
+}
+
+
+def temp_name(node: Dict[str, Any]) -> str:
+    """Returns the variable name used for a hoisted indicator, e.g. 'ind_sma_close_20' or 'ind_sma_at_wmsun_close_20'."""
+    parts = [node['name']] + (["at", node['timeframe']] if node.get('timeframe') else [])
+    parts += [str(param) for param in node['params']]
+    name = "_".join(parts).lower()
+    return "ind_" + name.replace(".", "p").replace("-", "m")
+
+
+def _is_constant(node, value=None) -> bool:
+    if node.get("type") != "constant":
+        return False
+    return value is None or node["data"] is value
+
+
+def _optimize(node: Any, indicators: "OrderedDict[str, Dict[str, Any]]") -> Dict[str, Any]:
+    if not isinstance(node, dict):
+        raise ValueError(f"Invalid AST node type passed: {type(node)}")
+
+    node_type = node.get("type")
+
+    if node_type == "condition":
+        return _optimize(node.get("value") or node.get("content"), indicators)
+
+    # Common-subexpression elimination: every distinct indicator becomes one temporary
+    if node_type == "indicator":
+        name = temp_name(node)
+        indicators.setdefault(name, node)
+        return {"type": "temp", "name": name}
+
+    if node_type == "comparison":
+        left = _optimize(node["left"], indicators)
+        right = _optimize(node["right"], indicators)
+        # Constant folding: '0 > 1' becomes a scalar False, not a full array
+        if left.get("type") == "value" and right.get("type") == "value" and node["op"] in CONSTANT_OPS:
+            return {"type": "constant", "data": bool(CONSTANT_OPS[node["op"]](left["data"], right["data"]))}
+        return {"type": "comparison", "op": node["op"], "left": left, "right": right}
+
+    if node_type == "binary_op":
+        op = node["op"]
+        left = _optimize(node["left"], indicators)
+        right = _optimize(node["right"], indicators)
+
+        # Dead-branch pruning
+        if op == "AND":
+            if _is_constant(left, False) or _is_constant(right, False):
+                return {"type": "constant", "data": False}
+            if _is_constant(left, True):
+                return right
+            if _is_constant(right, True):
+                return left
+        elif op == "OR":
+            if _is_constant(left, True) or _is_constant(right, True):
+                return {"type": "constant", "data": True}
+            if _is_constant(left, False):
+                return right
+            if _is_constant(right, False):
+                return left
+
+        return {"type": "binary_op", "op": op, "left": left, "right": right}
+
+    return dict(node)
+
+
+def _collect_temps(node: Dict[str, Any], used: list) -> list:
+    # Temporaries still referenced after pruning, in order of first use
+    if node.get("type") == "temp":
+        if node["name"] not in used:
+            used.append(node["name"])
+    for key in ("left", "right"):
+        if key in node:
+            _collect_temps(node[key], used)
+    return used
+
+
+def optimize_ast(ast: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Optimization pass between parse_dsl_to_ast and code generation.
+
+    - Hoists each distinct indicator into a named temporary, so SMA(CLOSE, 20)
+      used by both rules is computed once. Temporaries still referenced after
+      pruning are listed, in order of first use, under the 'indicators' key;
+      references become 'temp' nodes.
+    - Folds comparisons between two numbers into 'constant' nodes.
+    - Prunes AND/OR branches decided by a constant.
+
+    Operand order is kept: the generated rules combine whole arrays with
+    '&' and '|', which evaluate both sides, and every indicator is already
+    computed once up front, so reordering would not save any work.
+
+    Args:
+        ast: Dictionary AST produced by parse_dsl_to_ast.
+
+    Returns:
+        New optimized AST accepted by generate_python_strategy.
+    """
+    indicators: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    optimized: Dict[str, Any] = {}
+    for key in ("entry", "exit"):
+        node = ast.get(key)
+        optimized[key] = _optimize(node, indicators) if node else {"type": "constant", "data": False}
+    # Indicators only referenced from pruned branches are dropped
+    used: list = []
+    for key in ("entry", "exit"):
+        _collect_temps(optimized[key], used)
+    optimized["indicators"] = {name: indicators[name] for name in used}
+    return optimized
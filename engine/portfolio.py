@@ -0,0 +1,158 @@
+# engine/portfolio.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .backtester import bar_returns, compute_metrics, extract_trades, run_backtest
+from .shared_data import DatasetHandle, attach_dataset, backtest_shared, close_all, share_frames
+from .strategy_cache import STRATEGY_CACHE, CompiledStrategy
+
+# Supported rules for combining per-symbol equity into one portfolio curve
+ALLOCATIONS = ("equal", "max_positions")
+
+
+# --- Worker side ---
+
+# Strategy installed once per worker process by _init_worker
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_worker(source: str):
+    # Generated functions cannot be pickled, so each worker execs the source once
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, "<portfolio strategy>", "exec"), namespace)
+    _WORKER_STATE["namespace"] = namespace
+
+
+def _backtest_symbol(handle: DatasetHandle) -> Dict[str, Any]:
+    # Workers read the symbol's columns straight from the shared mapping
+    return backtest_shared(attach_dataset(handle), _WORKER_STATE["namespace"])
+
+
+# --- Allocation ---
+
+def _slot_positions(position: np.ndarray, max_positions: int) -> np.ndarray:
+    # Greedy slot allocation: a held symbol keeps its slot until its own
+    # strategy exits; free slots go to new entries in symbol order. Symbols
+    # that find no free slot on their entry bar are skipped for that trade.
+    held = np.zeros_like(position)
+    previous_position = np.vstack((np.zeros((1, position.shape[1]), dtype=bool), position[:-1]))
+    new_entries = position & ~previous_position
+    kept = np.zeros(position.shape[1], dtype=bool)
+    for bar in range(len(position)):
+        kept = kept & position[bar]
+        candidates = new_entries[bar] & ~kept
+        free = max_positions - int(kept.sum())
+        kept = kept | (candidates & (np.cumsum(candidates) <= free))
+        held[bar] = kept
+    return held
+
+
+def _align_position(position: np.ndarray, symbol_index: pd.Index, index: pd.Index) -> np.ndarray:
+    # Carries a symbol's position across union dates missing from its own
+    # calendar (holidays, halts), so a held trade keeps its slot and return;
+    # flat before its first bar and after its last
+    if not len(symbol_index):
+        return np.zeros(len(index), dtype=bool)
+    aligned = pd.Series(position, index=symbol_index, dtype=float).reindex(index).ffill()
+    first, last = index.get_loc(symbol_index[0]), index.get_loc(symbol_index[-1])
+    inside = (np.arange(len(index)) >= first) & (np.arange(len(index)) <= last)
+    return (aligned.to_numpy() == 1.0) & inside
+
+
+def run_portfolio(strategy: Union[str, CompiledStrategy], data: Mapping[str, pd.DataFrame],
+                  allocation: str = "equal", max_positions: Optional[int] = None,
+                  processes: Optional[int] = None, periods_per_year: int = 252) -> Dict[str, Any]:
+    """
+    Backtests one strategy across a universe of symbols and combines the results.
+
+    Symbols are backtested independently across a process pool (each worker
+    compiles the strategy once and reads the OHLCV columns from shared
+    memory), then aligned on the union of their dates.
+
+    Allocation rules:
+        "equal": capital is split equally between all symbols up front and
+            each sleeve compounds on its own (no rebalancing).
+        "max_positions": capital is split into max_positions slots; each open
+            position holds 1/max_positions of equity (re-marked every bar)
+            and the rest stays in cash. Held symbols keep their slot until
+            their exit; new entries take free slots in symbol order.
+
+    Args:
+        strategy: DSL text or a CompiledStrategy (pandas or numpy target).
+        data: Symbol -> OHLCV DataFrame; iteration order sets slot priority.
+        allocation: One of ALLOCATIONS.
+        max_positions: Number of slots, required for "max_positions".
+        processes: Worker processes (None: os.cpu_count(); 1: run in-process).
+        periods_per_year: Bars per year used to annualize Sharpe/Sortino.
+
+    Returns:
+        Dictionary with the portfolio 'equity_curve' (Series on the union
+        index), the 'position' DataFrame of symbols held by the portfolio,
+        the aggregate 'metrics', a 'symbol_metrics' DataFrame (one row per
+        symbol, standalone backtest) and the per-symbol run_backtest
+        'results'.
+    """
+    if allocation not in ALLOCATIONS:
+        raise ValueError(f"Unknown allocation: {allocation}. Expected one of {ALLOCATIONS}")
+    if allocation == "max_positions" and (max_positions is None or max_positions < 1):
+        raise ValueError("allocation='max_positions' requires max_positions >= 1")
+    if not data:
+        raise ValueError("No symbols to backtest")
+
+    compiled = STRATEGY_CACHE.compile_dsl(strategy) if isinstance(strategy, str) else strategy
+    symbols = list(data)
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(symbols) == 1:
+        outputs = [run_backtest(data[symbol], compiled.calculate_signals(data[symbol])) for symbol in symbols]
+    else:
+        shared = share_frames(data)
+        try:
+            with ProcessPoolExecutor(max_workers=min(processes, len(symbols)), initializer=_init_worker,
+                                     initargs=(compiled.source,)) as pool:
+                outputs = list(pool.map(_backtest_symbol, [shared[symbol].handle for symbol in symbols]))
+        finally:
+            close_all(shared)
+    results = dict(zip(symbols, outputs))
+
+    # Align every symbol on the union of the dates
+    index = data[symbols[0]].index
+    for symbol in symbols[1:]:
+        index = index.union(data[symbol].index)
+    close = pd.DataFrame({symbol: data[symbol]['CLOSE'] for symbol in symbols}).reindex(index).ffill()
+    position = pd.DataFrame({symbol: _align_position(results[symbol]['position'], data[symbol].index, index)
+                             for symbol in symbols})
+    close_values = close.to_numpy(dtype=float)
+    position_values = position.to_numpy(dtype=bool)
+
+    if allocation == "equal":
+        sleeves = pd.DataFrame({symbol: pd.Series(results[symbol]['equity_curve'], index=data[symbol].index)
+                                for symbol in symbols}).reindex(index).ffill().fillna(1.0)
+        equity = sleeves.to_numpy().mean(axis=1)
+        held = position_values
+        invested = held.mean(axis=1)
+        trade_returns = np.concatenate([results[symbol]['trade_returns'] for symbol in symbols])
+    else:
+        held = _slot_positions(position_values, max_positions)
+        portfolio_returns = (held[:-1] * bar_returns(close_values)).sum(axis=1) / max_positions
+        equity = np.concatenate(([1.0], np.cumprod(1.0 + portfolio_returns)))
+        invested = held.sum(axis=1) / max_positions
+        trade_returns = np.concatenate([extract_trades(close_values[:, column], held[:, column])[4]
+                                        for column in range(len(symbols))])
+
+    metrics = compute_metrics(equity, held.any(axis=1), trade_returns, periods_per_year=periods_per_year)
+    metrics['exposure'] = float(invested.mean()) if len(invested) else 0.0
+    symbol_metrics = pd.DataFrame([results[symbol]['metrics'] for symbol in symbols], index=symbols)
+    symbol_metrics.index.name = "symbol"
+
+    return {
+        'equity_curve': pd.Series(equity, index=index),
+        'position': pd.DataFrame(held, index=index, columns=symbols),
+        'metrics': metrics,
+        'symbol_metrics': symbol_metrics,
+        'results': results,
+    }
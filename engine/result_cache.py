@@ -0,0 +1,151 @@
+# engine/result_cache.py
+import os
+import pickle
+import shutil
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .backtester import run_backtest
+from .data_utils import data_fingerprint
+from .strategy_cache import STRATEGY_CACHE, CompiledStrategy
+
+# Approximate in-memory size of one trade_log entry (dict + Timestamps + floats)
+TRADE_ENTRY_BYTES = 512
+
+
+def _result_nbytes(results: Dict[str, Any]) -> int:
+    # Arrays dominate; trade logs are estimated per entry
+    nbytes = sum(value.nbytes for value in results.values() if isinstance(value, np.ndarray))
+    return nbytes + TRADE_ENTRY_BYTES * len(results.get('trade_log', ())) + 1024
+
+
+class BacktestCache:
+    """
+    Memory-bounded LRU of backtest results keyed by (strategy hash, data fingerprint).
+
+    Entries are evicted least-recently-used first once the estimated size of
+    the cached results exceeds max_bytes. When cache_dir is given, results are
+    also pickled under cache_dir/<fingerprint>/<strategy key>.pkl and reloaded
+    on a memory miss. Cached result dictionaries are shared, treat them as
+    read-only.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, cache_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.current_bytes, "hits": self.hits,
+                "misses": self.misses, "disk_hits": self.disk_hits}
+
+    def get(self, strategy_key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        key = (strategy_key, fingerprint)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+        results = self._load_from_disk(strategy_key, fingerprint)
+        if results is not None:
+            self.disk_hits += 1
+            self._store(key, results)
+            return results
+
+        self.misses += 1
+        return None
+
+    def put(self, strategy_key: str, fingerprint: str, results: Dict[str, Any]):
+        self._store((strategy_key, fingerprint), results)
+        self._save_to_disk(strategy_key, fingerprint, results)
+
+    def invalidate(self, fingerprint: Optional[str] = None):
+        """
+        Drops cached results for one dataset fingerprint (both tiers), or
+        everything when no fingerprint is given. Call this when the data behind
+        a fingerprint is rewritten in place.
+        """
+        for key in [key for key in self._entries if fingerprint is None or key[1] == fingerprint]:
+            self.current_bytes -= self._entries.pop(key)[1]
+        if self.cache_dir:
+            targets = [fingerprint] if fingerprint else os.listdir(self.cache_dir)
+            for name in targets:
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+
+    def _store(self, key: Tuple[str, str], results: Dict[str, Any]):
+        if key in self._entries:
+            self.current_bytes -= self._entries.pop(key)[1]
+        nbytes = _result_nbytes(results)
+        if nbytes > self.max_bytes:
+            return
+        self._entries[key] = (results, nbytes)
+        self.current_bytes += nbytes
+        while self.current_bytes > self.max_bytes:
+            self.current_bytes -= self._entries.popitem(last=False)[1][1]
+
+    # --- On-disk tier ---
+
+    def _path(self, strategy_key: str, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, fingerprint, f"{strategy_key}.pkl")
+
+    def _load_from_disk(self, strategy_key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        path = self._path(strategy_key, fingerprint)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def _save_to_disk(self, strategy_key: str, fingerprint: str, results: Dict[str, Any]):
+        if not self.cache_dir:
+            return
+        path = self._path(strategy_key, fingerprint)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+
+# Process-wide default cache for dashboards and scripts
+BACKTEST_CACHE = BacktestCache()
+
+
+def cached_backtest(strategy: Union[str, CompiledStrategy], df: pd.DataFrame,
+                    cache: Optional[BacktestCache] = None,
+                    fingerprint: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Runs (or recalls) the backtest of a strategy on a dataset.
+
+    Args:
+        strategy: DSL text or a CompiledStrategy from the strategy cache.
+        df: OHLCV DataFrame.
+        cache: BacktestCache to use (defaults to BACKTEST_CACHE).
+        fingerprint: Precomputed data_fingerprint(df), to skip rehashing the
+            data when the same frame is reused across many strategies.
+
+    Returns:
+        The run_backtest result dictionary (shared; do not mutate).
+    """
+    cache = cache if cache is not None else BACKTEST_CACHE
+    compiled = STRATEGY_CACHE.compile_dsl(strategy) if isinstance(strategy, str) else strategy
+    fingerprint = fingerprint or data_fingerprint(df)
+
+    results = cache.get(compiled.key, fingerprint)
+    if results is None:
+        results = run_backtest(df, compiled.calculate_signals(df))
+        cache.put(compiled.key, fingerprint, results)
+    return results
@@ -0,0 +1,431 @@
+# engine/results_store.py
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Column names double as file names
+COLUMN_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Text columns stored next to the numeric ones; KEY_HASH_COLUMN indexes the keys
+TEXT_COLUMNS = ("key", "strategy")
+KEY_HASH_COLUMN = "_key_hash"
+
+# A bound for select(): (low, high) inclusive, either side None for open; a scalar means equality
+Bound = Union[Tuple[Optional[float], Optional[float]], float]
+
+
+def key_hashes(keys: Sequence[str]) -> np.ndarray:
+    """Returns a stable 64-bit hash of each key (the sort key of the key index)."""
+    digests = b"".join(hashlib.blake2b(key.encode(), digest_size=8).digest() for key in keys)
+    return np.frombuffer(digests, dtype="<u8").copy()
+
+
+def _valid_count(values: np.ndarray) -> int:
+    # Number of non-NaN entries of a sorted index (NaNs sort last)
+    if values.dtype.kind != "f":
+        return len(values)
+    return int(np.searchsorted(values, np.nan, side="left"))
+
+
+def _merge_sorted(older: Tuple[np.ndarray, np.ndarray],
+                  newer: Tuple[np.ndarray, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    # Merges two index runs; the newer run's rows all follow the older run's,
+    # so inserting after equal values keeps row order among ties
+    positions = np.searchsorted(older[0], newer[0], side="right")
+    return np.insert(older[0], positions, newer[0]), np.insert(older[1], positions, newer[1])
+
+
+def _ranked(rows: np.ndarray, values: np.ndarray, ascending: bool) -> np.ndarray:
+    # Rows ordered by value, ties by row id; never negates the values, which
+    # would wrap unsigned integers and is undefined for booleans
+    if ascending:
+        return rows[np.lexsort((rows, values))]
+    return rows[np.lexsort((-rows, values))[::-1]]
+
+
+def _save(path: str, values: np.ndarray):
+    # Written next to the target and renamed, so readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+
+class ResultsStore:
+    """
+    Columnar on-disk store of backtest results.
+
+    Every append writes one chunk directory holding a typed .npy file per
+    numeric column (parameters and metrics) plus the strategy keys and DSL
+    texts as UTF-8 blobs with offsets. Columns are memory-mapped on read, so
+    a query only touches the rows it returns.
+
+    Queries go through sorted indexes (sorted values + row order per
+    column) under <root>/indexes: range filters are binary searches and
+    top-k reads the ends of the index. An index is a list of sorted runs,
+    each covering a range of chunks: it is built on first use of a column,
+    every later append adds a run for its own chunk, and runs are merged
+    size-tiered (a run is merged into the previous one while that one is no
+    larger), so each row is rewritten O(log n) times and a column has
+    O(log n) runs; compact() merges them into one. Chunk and run files are
+    written under new names and are complete before the manifest, which is
+    replaced last, references them; a crash before that leaves only
+    unreferenced files that the next append overwrites.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._manifest_path = os.path.join(root, "manifest.json")
+        os.makedirs(os.path.join(root, "chunks"), exist_ok=True)
+        os.makedirs(os.path.join(root, "indexes"), exist_ok=True)
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"columns": {}, "text": [], "chunks": [], "indexes": {}}
+        if isinstance(self.manifest["indexes"], list):
+            # Single-file indexes of older stores are rebuilt on first use
+            self.manifest["indexes"] = {}
+        self._maps: Dict[Tuple[int, str], np.ndarray] = {}
+        # (column, first chunk, last chunk) -> memory-mapped run
+        self._runs: Dict[Tuple[str, int, int], Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self):
+        return int(sum(self.manifest["chunks"]))
+
+    @property
+    def columns(self) -> List[str]:
+        """Numeric column names (parameters and metrics)."""
+        return [name for name in self.manifest["columns"] if name != KEY_HASH_COLUMN]
+
+    # --- Writing ---
+
+    def append(self, keys: Sequence[str], columns: Mapping[str, Any],
+               strategies: Optional[Sequence[str]] = None):
+        """
+        Appends one chunk of results.
+
+        Args:
+            keys: One key per row (e.g. the strategy's ast_hash).
+            columns: Column name -> numeric array-like with one value per row.
+                The first append fixes the schema; later chunks must provide
+                the same columns with castable dtypes.
+            strategies: Optional DSL text per row.
+        """
+        keys = [str(key) for key in keys]
+        count = len(keys)
+        arrays = {}
+        for name, values in columns.items():
+            if not COLUMN_PATTERN.match(name) or name in TEXT_COLUMNS or name == KEY_HASH_COLUMN:
+                raise ValueError(f"Invalid results column name: {name}")
+            values = np.asarray(values)
+            if values.dtype.kind not in "biuf":
+                raise ValueError(f"Results column {name} is not numeric ({values.dtype})")
+            if values.shape != (count,):
+                raise ValueError(f"Results column {name} has {len(values)} values for {count} keys")
+            arrays[name] = values
+        arrays[KEY_HASH_COLUMN] = key_hashes(keys)
+        text = {"key": keys}
+        if strategies is not None:
+            if len(strategies) != count:
+                raise ValueError(f"{len(strategies)} strategies for {count} keys")
+            text["strategy"] = list(strategies)
+
+        schema = self.manifest["columns"]
+        if not self.manifest["chunks"]:
+            schema = {name: values.dtype.str for name, values in arrays.items()}
+        elif set(arrays) != set(schema) or set(text) != set(self.manifest["text"]):
+            raise ValueError(f"Results columns {sorted(columns)} do not match the store schema {self.columns}")
+        for name, dtype in schema.items():
+            if not np.can_cast(arrays[name].dtype, np.dtype(dtype), casting="same_kind"):
+                raise ValueError(f"Results column {name} ({arrays[name].dtype}) cannot be stored as {dtype}")
+            arrays[name] = arrays[name].astype(dtype, copy=False)
+        if count == 0:
+            return
+
+        chunk = len(self.manifest["chunks"])
+        directory = self._chunk_dir(chunk)
+        os.makedirs(directory, exist_ok=True)
+        for name, values in arrays.items():
+            _save(os.path.join(directory, f"{name}.npy"), values)
+        for name, strings in text.items():
+            blobs = [string.encode() for string in strings]
+            offsets = np.zeros(count + 1, dtype=np.int64)
+            np.cumsum([len(blob) for blob in blobs], out=offsets[1:])
+            _save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+            _save(os.path.join(directory, f"{name}.bytes.npy"), np.frombuffer(b"".join(blobs), dtype=np.uint8))
+
+        start = len(self)
+        chunks = self.manifest["chunks"] + [count]
+        indexes = {}
+        replaced = []
+        for name, runs in self.manifest["indexes"].items():
+            order = np.argsort(arrays[name], kind="stable")
+            self._write_run(name, chunk, chunk, arrays[name][order], order.astype(np.int64) + start)
+            indexes[name], merged = self._merge_runs(name, runs + [[chunk, chunk]], chunks)
+            replaced.extend((name, *run) for run in merged)
+        self.manifest["columns"] = schema
+        self.manifest["text"] = list(text)
+        self.manifest["chunks"] = chunks
+        self.manifest["indexes"] = indexes
+        self._write_manifest()
+        self._remove_runs(replaced)
+
+    def append_frame(self, table: pd.DataFrame, keys: Sequence[str], strategy_column: Optional[str] = None):
+        """Appends the numeric columns of a result table (e.g. from run_sweep) under the given keys."""
+        columns = {name: table[name].to_numpy() for name in table.columns
+                   if name != strategy_column and table[name].dtype.kind in "biuf"}
+        strategies = table[strategy_column].tolist() if strategy_column else None
+        self.append(keys, columns, strategies)
+
+    def _write_manifest(self):
+        tmp_path = f"{self._manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    # --- Column access ---
+
+    def _chunk_dir(self, chunk: int) -> str:
+        return os.path.join(self.root, "chunks", f"{chunk:06d}")
+
+    def _chunk_array(self, chunk: int, name: str) -> np.ndarray:
+        key = (chunk, name)
+        if key not in self._maps:
+            self._maps[key] = np.load(os.path.join(self._chunk_dir(chunk), f"{name}.npy"), mmap_mode="r")
+        return self._maps[key]
+
+    def _starts(self) -> np.ndarray:
+        return np.concatenate([[0], np.cumsum(self.manifest["chunks"], dtype=np.int64)])
+
+    def column(self, name: str) -> np.ndarray:
+        """Reads a whole numeric column (a full scan; queries use the indexes instead)."""
+        self._check_column(name)
+        dtype = np.dtype(self.manifest["columns"][name])
+        if not self.manifest["chunks"]:
+            return np.empty(0, dtype=dtype)
+        return np.concatenate([self._chunk_array(chunk, name) for chunk in range(len(self.manifest["chunks"]))])
+
+    def _gather(self, name: str, rows: np.ndarray) -> np.ndarray:
+        # Values of a numeric column at the given row ids, reading only their chunks
+        out = np.empty(len(rows), dtype=np.dtype(self.manifest["columns"][name]))
+        starts = self._starts()
+        chunks = np.searchsorted(starts, rows, side="right") - 1
+        for chunk in np.unique(chunks):
+            selected = chunks == chunk
+            out[selected] = self._chunk_array(int(chunk), name)[rows[selected] - starts[chunk]]
+        return out
+
+    def _gather_text(self, name: str, rows: np.ndarray) -> List[str]:
+        out: List[str] = [""] * len(rows)
+        starts = self._starts()
+        chunks = np.searchsorted(starts, rows, side="right") - 1
+        for chunk in np.unique(chunks):
+            offsets = self._chunk_array(int(chunk), f"{name}.offsets")
+            blob = self._chunk_array(int(chunk), f"{name}.bytes")
+            for position in np.flatnonzero(chunks == chunk):
+                row = rows[position] - starts[chunk]
+                out[position] = blob[offsets[row]:offsets[row + 1]].tobytes().decode()
+        return out
+
+    def _check_column(self, name: str):
+        if name not in self.manifest["columns"]:
+            raise ValueError(f"Unknown results column: {name}")
+
+    # --- Indexes ---
+
+    def _run_paths(self, name: str, first: int, last: int) -> Tuple[str, str]:
+        # A run is named by the chunks it covers
+        prefix = os.path.join(self.root, "indexes", f"{name}.{first:06d}-{last:06d}")
+        return f"{prefix}.values.npy", f"{prefix}.order.npy"
+
+    def create_index(self, name: str):
+        """Builds the sorted index of a column; later appends keep it up to date."""
+        self._check_column(name)
+        if name in self.manifest["indexes"]:
+            return
+        runs = []
+        if self.manifest["chunks"]:
+            values = self.column(name)
+            order = np.argsort(values, kind="stable").astype(np.int64)
+            last = len(self.manifest["chunks"]) - 1
+            self._write_run(name, 0, last, values[order], order)
+            runs.append([0, last])
+        self.manifest["indexes"][name] = runs
+        self._write_manifest()
+
+    def compact(self, name: Optional[str] = None):
+        """Merges the runs of one index (default: every index) into a single run."""
+        names = list(self.manifest["indexes"]) if name is None else [name]
+        replaced = []
+        for index_name in names:
+            if index_name not in self.manifest["indexes"]:
+                raise ValueError(f"No index on results column: {index_name}")
+            runs = self.manifest["indexes"][index_name]
+            if len(runs) < 2:
+                continue
+            merged = self._read_run(index_name, *runs[0])
+            for run in runs[1:]:
+                merged = _merge_sorted(merged, self._read_run(index_name, *run))
+            self._write_run(index_name, runs[0][0], runs[-1][1], *merged)
+            self.manifest["indexes"][index_name] = [[runs[0][0], runs[-1][1]]]
+            replaced.extend((index_name, *run) for run in runs)
+        self._write_manifest()
+        self._remove_runs(replaced)
+
+    def _write_run(self, name: str, first: int, last: int, values: np.ndarray, order: np.ndarray):
+        values_path, order_path = self._run_paths(name, first, last)
+        _save(values_path, values)
+        _save(order_path, order)
+        self._runs.pop((name, first, last), None)
+
+    def _read_run(self, name: str, first: int, last: int) -> Tuple[np.ndarray, np.ndarray]:
+        # (sorted values, row ids in that order); NaNs sort last
+        key = (name, first, last)
+        if key not in self._runs:
+            values_path, order_path = self._run_paths(name, first, last)
+            self._runs[key] = (np.load(values_path, mmap_mode="r"), np.load(order_path, mmap_mode="r"))
+        return self._runs[key]
+
+    def _merge_runs(self, name: str, runs: List[List[int]],
+                    chunks: Sequence[int]) -> Tuple[List[List[int]], List[List[int]]]:
+        # Size-tiered merging: the newest run is merged into the previous one
+        # while that one holds no more rows. Returns the new run list and the
+        # runs it no longer references (deleted once the manifest is written).
+        starts = np.concatenate([[0], np.cumsum(chunks, dtype=np.int64)])
+        replaced = []
+        while len(runs) > 1:
+            (first, middle), (following, last) = runs[-2], runs[-1]
+            if starts[middle + 1] - starts[first] > starts[last + 1] - starts[following]:
+                break
+            merged = _merge_sorted(self._read_run(name, first, middle), self._read_run(name, following, last))
+            self._write_run(name, first, last, *merged)
+            replaced.extend(runs[-2:])
+            runs = runs[:-2] + [[first, last]]
+        return runs, [run for run in replaced if run not in runs]
+
+    def _remove_runs(self, runs: Sequence[Tuple[str, int, int]]):
+        for name, first, last in runs:
+            self._runs.pop((name, first, last), None)
+            for path in self._run_paths(name, first, last):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _index(self, name: str) -> List[Tuple[np.ndarray, np.ndarray]]:
+        # Sorted runs of a column's index, oldest (lowest row ids) first
+        if name not in self.manifest["indexes"]:
+            self.create_index(name)
+        return [self._read_run(name, first, last) for first, last in self.manifest["indexes"][name]]
+
+    # --- Queries ---
+
+    def select(self, where: Mapping[str, Bound]) -> np.ndarray:
+        """
+        Row ids matching every range filter, via binary search on the indexes.
+
+        Args:
+            where: Column name -> (low, high) inclusive bounds (None for an
+                open side) or a single value for equality.
+
+        Returns:
+            Sorted array of row ids.
+        """
+        rows = None
+        for name, bound in where.items():
+            self._check_column(name)
+            low, high = bound if isinstance(bound, (tuple, list)) else (bound, bound)
+            parts = [np.empty(0, dtype=np.int64)]
+            for values, order in self._index(name):
+                start = 0 if low is None else int(np.searchsorted(values, low, side="left"))
+                end = _valid_count(values) if high is None else int(np.searchsorted(values, high, side="right"))
+                parts.append(order[start:end])
+            matched = np.sort(np.concatenate(parts))
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        if rows is None:
+            return np.arange(len(self), dtype=np.int64)
+        return rows
+
+    def rows(self, rows: Sequence[int], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Materializes rows by id: key, strategy text (when stored) and numeric columns.
+
+        Args:
+            rows: Row ids (e.g. from select()).
+            columns: Numeric columns to include (default: all).
+
+        Returns:
+            DataFrame indexed by row id.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        table = {name: self._gather_text(name, rows) for name in self.manifest["text"]}
+        for name in (self.columns if columns is None else columns):
+            self._check_column(name)
+            table[name] = self._gather(name, rows)
+        return pd.DataFrame(table, index=pd.Index(rows, name="row"))
+
+    def filter(self, where: Mapping[str, Bound], columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Rows matching every range filter (see select), in row order."""
+        return self.rows(self.select(where), columns)
+
+    def top(self, metric: str, k: int = 10, ascending: bool = False,
+            where: Optional[Mapping[str, Bound]] = None) -> pd.DataFrame:
+        """
+        The k best rows by a metric; NaN values are never returned.
+
+        Without filters this reads the k entries at one end of the metric's
+        index; with filters only the matching rows are ranked.
+
+        Args:
+            metric: Numeric column to rank by.
+            k: Number of rows.
+            ascending: True when lower values are better.
+            where: Optional range filters (see select).
+
+        Returns:
+            DataFrame of the selected rows, best first.
+        """
+        self._check_column(metric)
+        if where:
+            rows = self.select(where)
+            values = self._gather(metric, rows)
+            valid = ~np.isnan(values) if values.dtype.kind == "f" else np.ones(len(values), dtype=bool)
+            rows, values = rows[valid], values[valid]
+            ranked = _ranked(rows, values, ascending)[:max(k, 0)]
+        else:
+            # The k best of each run (plus the ties of its k-th value), then ranked together
+            rows, values = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.dtype(self.manifest["columns"][metric]))]
+            for run_values, order in self._index(metric):
+                valid = _valid_count(run_values)
+                if k <= 0 or valid == 0:
+                    continue
+                if ascending:
+                    end = int(np.searchsorted(run_values, run_values[min(k, valid) - 1], side="right"))
+                    start, end = 0, min(end, valid)
+                else:
+                    start = int(np.searchsorted(run_values, run_values[max(valid - k, 0)], side="left"))
+                    end = valid
+                rows.append(np.asarray(order[start:end]))
+                values.append(np.asarray(run_values[start:end]))
+            rows, values = np.concatenate(rows), np.concatenate(values)
+            ranked = _ranked(rows, values, ascending)[:max(k, 0)]
+        return self.rows(ranked)
+
+    def find(self, keys: Union[str, Sequence[str]]) -> pd.DataFrame:
+        """Rows stored under the given key(s), via the key-hash index."""
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        if not self.manifest["chunks"]:
+            return self.rows([])
+        hashes = key_hashes(keys)
+        parts = [np.empty(0, dtype=np.int64)]
+        for values, order in self._index(KEY_HASH_COLUMN):
+            starts = np.searchsorted(values, hashes, side="left")
+            ends = np.searchsorted(values, hashes, side="right")
+            parts.extend(order[start:end] for start, end in zip(starts, ends))
+        candidates = np.sort(np.concatenate(parts))
+        table = self.rows(candidates)
+        return table[table["key"].isin(keys)]
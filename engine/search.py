@@ -0,0 +1,370 @@
+# engine/search.py
+"""
+Genetic / random search over strategy ASTs.
+
+Individuals are dictionary ASTs of the shape produced by StrategyTransformer.
+Mutations swap comparison operators (from OP_MAP) and AND/OR, change
+indicator periods and numeric thresholds, and add or remove conditions;
+crossover exchanges subtrees between two parents. Every generation is
+evaluated through the batched backtest path, and a FitnessCache keyed by
+canonical AST hash guarantees a strategy is never backtested twice.
+"""
+import copy
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backtester import METRIC_NAMES
+from .batch import iter_backtest_optimized
+from .code_generator import OP_MAP
+from .dsl_parser import ast_to_dsl, parse_dsl_to_ast
+from .indicator_cache import IndicatorCache
+from .indicators import get_indicator
+from .job_store import JobStore, open_job
+from .optimizer import optimize_ast
+from .strategy_cache import ast_hash, canonicalize_ast
+
+# Operators mutations may swap in (equality tests on prices are never useful)
+COMPARISON_OPS = tuple(op for op in OP_MAP if op not in ("AND", "OR", "EQ", "NEQ"))
+LOGIC_OPS = ("AND", "OR")
+
+# Price-scaled indicators used when generating new conditions from scratch
+SEARCH_INDICATORS = ("SMA", "EMA")
+
+# Upper bound on comparisons per rule, so add-condition mutations cannot grow trees forever
+MAX_CONDITIONS = 6
+
+
+class FitnessCache:
+    """
+    Metrics of every evaluated strategy, keyed by canonical AST hash.
+
+    With a JobStore, the cache starts from the metrics already stored there
+    and every new entry is appended to it, so a search can be resumed.
+    """
+
+    def __init__(self, store: Optional[JobStore] = None):
+        self.store = store
+        self._entries: Dict[str, Dict[str, float]] = {}
+        self.hits = 0
+        self.misses = 0
+        if store is not None:
+            for record in store.records():
+                self._entries[record["key"]] = {name: record[name] for name in METRIC_NAMES}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def get(self, key: str) -> Optional[Dict[str, float]]:
+        metrics = self._entries.get(key)
+        if metrics is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return metrics
+
+    def peek(self, key: str) -> Optional[Dict[str, float]]:
+        """Like get(), without counting a hit or miss."""
+        return self._entries.get(key)
+
+    def put(self, key: str, metrics: Dict[str, float]):
+        self.put_many([(key, metrics, None)])
+
+    def put_many(self, items: Iterable[Tuple[str, Dict[str, float], Optional[str]]]):
+        """Stores (key, metrics, DSL text) triples; the text is only kept in the store."""
+        items = list(items)
+        for key, metrics, _ in items:
+            self._entries[key] = metrics
+        if self.store is not None:
+            self.store.append_many((key, {"strategy": text, **metrics}) for key, metrics, text in items)
+
+
+# --- Tree helpers ---
+
+Path = Tuple[str, ...]
+
+
+def _paths(node: Dict[str, Any], path: Path, types: Sequence[str], out: List[Path]) -> List[Path]:
+    # Paths (sequences of 'entry'/'exit'/'left'/'right' keys) to nodes of the given types
+    if node.get("type") in types:
+        out.append(path)
+    for key in ("left", "right"):
+        if key in node:
+            _paths(node[key], path + (key,), types, out)
+    return out
+
+
+def _find(ast: Dict[str, Any], types: Sequence[str]) -> List[Path]:
+    out: List[Path] = []
+    for rule in ("entry", "exit"):
+        _paths(ast[rule], (rule,), types, out)
+    return out
+
+
+def _get(ast: Dict[str, Any], path: Path) -> Dict[str, Any]:
+    node = ast
+    for key in path:
+        node = node[key]
+    return node
+
+
+def _set(ast: Dict[str, Any], path: Path, value: Dict[str, Any]):
+    _get(ast, path[:-1])[path[-1]] = value
+
+
+def _indicator_paths(ast: Dict[str, Any]) -> List[Tuple[Path, int]]:
+    # (comparison operand path, parameter position) of every numeric indicator parameter
+    out = []
+    for path in _find(ast, ("indicator",)):
+        for position, param in enumerate(_get(ast, path)["params"][1:], start=1):
+            if isinstance(param, (int, float)):
+                out.append((path, position))
+    return out
+
+
+def _random_period(rng: np.random.Generator, bounds: Tuple[int, int]) -> int:
+    # Log-uniform, so short and long lookbacks are sampled evenly
+    low, high = bounds
+    return int(round(math.exp(rng.uniform(math.log(low), math.log(high)))))
+
+
+def random_condition(rng: np.random.Generator, period_bounds: Tuple[int, int] = (2, 200)) -> Dict[str, Any]:
+    """Returns a random comparison of CLOSE or an indicator against a price-scaled indicator."""
+    def indicator():
+        name = SEARCH_INDICATORS[rng.integers(len(SEARCH_INDICATORS))]
+        params = list(get_indicator(name).defaults)
+        params[0] = _random_period(rng, period_bounds)
+        return {"type": "indicator", "name": name, "params": ["CLOSE", *params]}
+
+    left = {"type": "series", "data": "CLOSE"} if rng.random() < 0.5 else indicator()
+    op = COMPARISON_OPS[rng.integers(len(COMPARISON_OPS))]
+    return {"type": "comparison", "op": op, "left": left, "right": indicator()}
+
+
+def random_strategy(rng: np.random.Generator, period_bounds: Tuple[int, int] = (2, 200)) -> Dict[str, Any]:
+    return {"entry": random_condition(rng, period_bounds), "exit": random_condition(rng, period_bounds)}
+
+
+# --- Variation operators ---
+
+def mutate(ast: Dict[str, Any], rng: np.random.Generator,
+           period_bounds: Tuple[int, int] = (2, 200)) -> Dict[str, Any]:
+    """
+    Returns a copy of ast with one random mutation applied.
+
+    Mutations: swap a comparison operator, flip AND/OR, rescale an indicator
+    period or a numeric threshold, add a random condition, or drop one side
+    of an AND/OR.
+    """
+    ast = copy.deepcopy(ast)
+    comparisons = _find(ast, ("comparison",))
+    logic = _find(ast, ("binary_op",))
+    periods = _indicator_paths(ast)
+    values = _find(ast, ("value",))
+
+    choices = ["operator", "add"]
+    if periods:
+        choices.append("period")
+    if values:
+        choices.append("threshold")
+    if logic:
+        choices += ["logic", "remove"]
+    choice = choices[rng.integers(len(choices))]
+
+    if choice == "operator":
+        node = _get(ast, comparisons[rng.integers(len(comparisons))])
+        node["op"] = COMPARISON_OPS[rng.integers(len(COMPARISON_OPS))]
+    elif choice == "logic":
+        node = _get(ast, logic[rng.integers(len(logic))])
+        node["op"] = "OR" if node["op"] == "AND" else "AND"
+    elif choice == "period":
+        path, position = periods[rng.integers(len(periods))]
+        params = _get(ast, path)["params"]
+        value = params[position]
+        scaled = value * math.exp(rng.normal(0.0, 0.3))
+        if isinstance(value, int):
+            scaled = int(min(max(round(scaled), period_bounds[0]), period_bounds[1]))
+        params[position] = scaled
+    elif choice == "threshold":
+        node = _get(ast, values[rng.integers(len(values))])
+        node["data"] = float(node["data"]) * (1.0 + rng.normal(0.0, 0.1))
+    elif choice == "add":
+        rule = ("entry", "exit")[rng.integers(2)]
+        if len(_paths(ast[rule], (), ("comparison",), [])) < MAX_CONDITIONS:
+            ast[rule] = {"type": "binary_op", "op": LOGIC_OPS[rng.integers(2)],
+                         "left": ast[rule], "right": random_condition(rng, period_bounds)}
+    else:
+        path = logic[rng.integers(len(logic))]
+        node = _get(ast, path)
+        kept = node["left"] if rng.random() < 0.5 else node["right"]
+        if len(path) == 1:
+            ast[path[0]] = kept
+        else:
+            _set(ast, path, kept)
+    return ast
+
+
+def crossover(first: Dict[str, Any], second: Dict[str, Any], rng: np.random.Generator) -> Dict[str, Any]:
+    """Returns a copy of first with a random entry or exit subtree replaced by one from second."""
+    child = copy.deepcopy(first)
+    rule = ("entry", "exit")[rng.integers(2)]
+    types = ("comparison", "binary_op")
+    target = _paths(child[rule], (rule,), types, [])
+    donor = _paths(second[rule], (rule,), types, [])
+    target_path = target[rng.integers(len(target))]
+    subtree = copy.deepcopy(_get(second, donor[rng.integers(len(donor))]))
+    if len(target_path) == 1:
+        child[rule] = subtree
+    else:
+        _set(child, target_path, subtree)
+    return child
+
+
+# --- Search driver ---
+
+def run_search(df: pd.DataFrame, seeds: Sequence[str] = (), population_size: int = 50, generations: int = 20,
+               metric: str = "sharpe", ascending: bool = False, mutation_rate: float = 0.8,
+               crossover_rate: float = 0.5, elite: int = 2, tournament: int = 3,
+               max_evaluations: Optional[int] = None, time_limit: Optional[float] = None,
+               seed: Optional[int] = None, processes: Optional[int] = None,
+               fitness_cache: Optional[FitnessCache] = None,
+               indicator_cache: Optional[IndicatorCache] = None,
+               period_bounds: Tuple[int, int] = (2, 200), periods_per_year: int = 252,
+               checkpoint: Optional[str] = None) -> pd.DataFrame:
+    """
+    Evolves DSL strategies on one dataset.
+
+    Each generation keeps the `elite` best individuals and fills the rest by
+    tournament selection followed by crossover and/or mutation. New
+    individuals are canonicalized; those already in the fitness cache are
+    not backtested again, the rest are evaluated together through
+    backtest_optimized (in parallel across processes).
+
+    Args:
+        df: OHLCV DataFrame.
+        seeds: DSL strategies for the initial population (the remainder is
+            random).
+        population_size: Individuals per generation.
+        generations: Maximum number of generations.
+        metric: compute_metrics key used as fitness.
+        ascending: True when lower metric values are better.
+        mutation_rate: Probability that an offspring is mutated.
+        crossover_rate: Probability that an offspring comes from crossover.
+        elite: Best individuals copied unchanged into the next generation.
+        tournament: Tournament size for parent selection.
+        max_evaluations: Stop after this many backtests (cache hits are free).
+        time_limit: Stop starting new generations after this many seconds.
+        seed: Seed for numpy's default_rng.
+        processes: Worker processes for evaluation (None: os.cpu_count()).
+        fitness_cache: FitnessCache to share across runs (default: a new one).
+        indicator_cache: IndicatorCache for indicator arrays (default: a new
+            one, so periods revisited across generations are not recomputed).
+        period_bounds: Range for generated and mutated indicator periods.
+        periods_per_year: Bars per year used to annualize Sharpe/Sortino.
+        checkpoint: Optional JSON-lines path backing the fitness cache (when
+            fitness_cache is not given): evaluated strategies are appended as
+            each chunk finishes, and rerunning with the same seed replays the
+            finished generations from the store without backtesting them.
+
+    Returns:
+        DataFrame of every strategy seen in this run: its DSL text, canonical
+        key, the generation it first appeared in and its metrics, best first.
+    """
+    if metric not in METRIC_NAMES:
+        raise ValueError(f"Unknown metric: {metric}")
+    with open_job(checkpoint, "search", df, periods_per_year=periods_per_year) as store:
+        if fitness_cache is None:
+            fitness_cache = FitnessCache(store)
+        rng = np.random.default_rng(seed)
+        indicator_cache = indicator_cache if indicator_cache is not None else IndicatorCache()
+        started = time.monotonic()
+        evaluations = 0
+        seen: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+
+        def fitness(key: str) -> float:
+            value = fitness_cache.peek(key)[metric]
+            if value != value:  # NaN ranks last
+                return -math.inf
+            return -value if ascending else value
+
+        def evaluate(population: List[Dict[str, Any]], generation: int) -> List[str]:
+            # Canonicalizes, backtests the individuals not seen before, and
+            # returns the keys of the individuals that have a fitness
+            nonlocal evaluations
+            keyed = []
+            pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+            for individual in population:
+                canonical = canonicalize_ast(individual)
+                key = ast_hash(canonical)
+                seen.setdefault(key, (canonical, generation))
+                keyed.append(key)
+                if key not in pending and fitness_cache.get(key) is None:
+                    pending[key] = canonical
+            if max_evaluations is not None:
+                for key in list(pending)[max(max_evaluations - evaluations, 0):]:
+                    del pending[key]
+            if pending:
+                pending_keys = list(pending)
+                asts = [optimize_ast(canonical) for canonical in pending.values()]
+                workers = processes or os.cpu_count() or 1
+                for start, metrics in iter_backtest_optimized(asts, df, processes=processes,
+                                                              chunk_size=max(1, -(-len(asts) // workers)),
+                                                              indicator_cache=indicator_cache,
+                                                              periods_per_year=periods_per_year):
+                    chunk_keys = pending_keys[start:start + len(metrics[metric])]
+                    fitness_cache.put_many(
+                        (key, {name: values[column].item() for name, values in metrics.items()},
+                         ast_to_dsl(pending[key]) if fitness_cache.store is not None else None)
+                        for column, key in enumerate(chunk_keys))
+                evaluations += len(pending)
+            return [key for key in keyed if key in fitness_cache]
+
+        population = [parse_dsl_to_ast(text) for text in seeds][:population_size]
+        while len(population) < population_size:
+            population.append(mutate(population[rng.integers(len(population))], rng, period_bounds)
+                              if population and rng.random() < 0.5 else random_strategy(rng, period_bounds))
+        keys = evaluate(population, 0)
+
+        for generation in range(1, generations):
+            if not keys:
+                break
+            if time_limit is not None and time.monotonic() - started >= time_limit:
+                break
+            if max_evaluations is not None and evaluations >= max_evaluations:
+                break
+
+            ranked = sorted(dict.fromkeys(keys), key=fitness, reverse=True)
+            offspring = [seen[key][0] for key in ranked[:elite]]
+
+            def select() -> Dict[str, Any]:
+                contenders = [keys[i] for i in rng.integers(len(keys), size=tournament)]
+                return seen[max(contenders, key=fitness)][0]
+
+            while len(offspring) < population_size:
+                child = select()
+                if rng.random() < crossover_rate:
+                    child = crossover(child, select(), rng)
+                if rng.random() < mutation_rate:
+                    child = mutate(child, rng, period_bounds)
+                offspring.append(child)
+            keys = evaluate(offspring, generation)
+
+        rows = []
+        for key, (canonical, generation) in seen.items():
+            if key in fitness_cache:
+                rows.append({"strategy": ast_to_dsl(canonical), "key": key, "generation": generation,
+                             **fitness_cache.peek(key)})
+        table = pd.DataFrame(rows, columns=["strategy", "key", "generation", *METRIC_NAMES])
+        return table.sort_values(metric, ascending=ascending, kind="mergesort",
+                                 na_position="last").reset_index(drop=True)
@@ -0,0 +1,229 @@
+# engine/shared_data.py
+"""
+Zero-copy OHLCV datasets for worker processes.
+
+A SharedDataset writes the date index and the float columns of a dataset
+once into a memory-mapped file (under /dev/shm when available, so it lives
+in RAM). Workers receive only the small picklable DatasetHandle and attach
+read-only NumPy views onto the same pages instead of unpickling a copy of
+the DataFrame each.
+
+Lifetime: the creating process owns the file and removes it on close() (or
+when its `with` block exits); attached views in workers remain valid until
+the workers drop them, since the mapping outlives the directory entry.
+"""
+import mmap
+import os
+import tempfile
+import uuid
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backtester import run_backtest_arrays
+from .code_generator import ARRAY_FIELDS
+from .data_utils import OHLCV_FIELDS
+
+# Every array starts on a multiple of this many bytes
+ALIGNMENT = 64
+
+
+class DatasetHandle(NamedTuple):
+    path: str
+    length: int
+    fields: Tuple[str, ...]
+    index_dtype: str
+    index_tz: Optional[str] = None
+    index_name: Optional[str] = None
+
+
+def _shared_dir() -> str:
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def _layout(handle: DatasetHandle):
+    # Byte offset of the index followed by each field, and the total size
+    offsets = []
+    offset = 0
+    for itemsize in [np.dtype(handle.index_dtype).itemsize] + [8] * len(handle.fields):
+        offsets.append(offset)
+        offset += -(-itemsize * handle.length // ALIGNMENT) * ALIGNMENT
+    return offsets, max(offset, 1)
+
+
+class SharedDataset:
+    """
+    One dataset (index plus equal-length float columns) in a shared mapping.
+
+    Use SharedDataset.from_frame() in the parent and SharedDataset.attach()
+    (or attach_dataset()) in workers. Arrays returned by a worker-side
+    dataset are read-only views.
+    """
+
+    def __init__(self, handle: DatasetHandle, buffer: mmap.mmap, owner: bool):
+        self.handle = handle
+        self._buffer = buffer
+        self.owner = owner
+        offsets, _ = _layout(handle)
+        index_values = np.frombuffer(buffer, dtype=handle.index_dtype, count=handle.length, offset=offsets[0])
+        self.arrays: Dict[str, np.ndarray] = {
+            field: np.frombuffer(buffer, dtype=float, count=handle.length, offset=offset)
+            for field, offset in zip(handle.fields, offsets[1:])
+        }
+        self.index = self._build_index(index_values)
+
+    def __len__(self):
+        return self.handle.length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, fields: Optional[Sequence[str]] = None,
+                   extra: Optional[Mapping[str, np.ndarray]] = None) -> "SharedDataset":
+        """
+        Copies a DataFrame into a new shared mapping owned by the caller.
+
+        Args:
+            df: OHLCV DataFrame with a datetime or numeric index.
+            fields: Columns to share (default: the OHLCV columns present).
+            extra: Additional named arrays of the same length, e.g.
+                precomputed indicators.
+
+        Returns:
+            Owning SharedDataset; close() it (or use it as a context manager)
+            to remove the backing file.
+        """
+        fields = tuple(fields) if fields is not None else tuple(field for field in OHLCV_FIELDS if field in df)
+        columns = {field: df[field].to_numpy(dtype=float) for field in fields}
+        for name, values in (extra or {}).items():
+            columns[name] = np.asarray(values, dtype=float)
+        return cls.from_arrays(columns, df.index)
+
+    @classmethod
+    def from_arrays(cls, columns: Mapping[str, np.ndarray], index=None) -> "SharedDataset":
+        """Copies named equal-length float arrays (and an optional index) into a new shared mapping."""
+        length = len(next(iter(columns.values()))) if columns else len(index if index is not None else ())
+        index = pd.RangeIndex(length) if index is None else pd.Index(index)
+        if len(index) != length or any(len(values) != length for values in columns.values()):
+            raise ValueError("Shared dataset columns and index must all have the same length")
+        tz = getattr(index, "tz", None)
+        index_values = np.asarray(index.tz_convert("UTC").tz_localize(None) if tz else index)
+        if index_values.dtype.kind not in "iufmM":
+            raise ValueError(f"Shared dataset index must be numeric or datetime, got {index_values.dtype}")
+
+        handle = DatasetHandle(os.path.join(_shared_dir(), f"ats-{uuid.uuid4().hex}.bin"), length,
+                               tuple(columns), index_values.dtype.str, str(tz) if tz else None, index.name)
+        offsets, size = _layout(handle)
+        with open(handle.path, "wb+") as f:
+            f.truncate(size)
+            buffer = mmap.mmap(f.fileno(), size)
+        np.frombuffer(buffer, dtype=index_values.dtype, count=length, offset=offsets[0])[:] = index_values
+        for values, offset in zip(columns.values(), offsets[1:]):
+            np.frombuffer(buffer, dtype=float, count=length, offset=offset)[:] = values
+        dataset = cls(handle, buffer, owner=True)
+        for values in dataset.arrays.values():
+            values.setflags(write=False)
+        return dataset
+
+    @classmethod
+    def attach(cls, handle: DatasetHandle) -> "SharedDataset":
+        """Maps an existing dataset read-only (worker side)."""
+        _, size = _layout(handle)
+        with open(handle.path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        return cls(handle, buffer, owner=False)
+
+    def _build_index(self, values: np.ndarray) -> pd.Index:
+        if self.handle.index_tz:
+            # tz-aware indexes are stored as UTC wall times
+            index = pd.DatetimeIndex(values).tz_localize("UTC").tz_convert(self.handle.index_tz)
+        else:
+            index = pd.Index(values)
+        index.name = self.handle.index_name
+        return index
+
+    def frame(self, fields: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Returns a DataFrame whose columns are views onto the shared arrays (no copy)."""
+        fields = fields or [field for field in OHLCV_FIELDS if field in self.arrays]
+        return pd.DataFrame({field: self.arrays[field] for field in fields}, index=self.index, copy=False)
+
+    def close(self):
+        """Releases this process's mapping; the owner also removes the backing file."""
+        self.arrays = {}
+        self.index = None
+        try:
+            self._buffer.close()
+        except BufferError:
+            # Views are still referenced elsewhere; the mapping goes with them
+            pass
+        if self.owner and os.path.exists(self.handle.path):
+            os.remove(self.handle.path)
+
+
+def share_frames(data: Mapping[str, pd.DataFrame]) -> Dict[str, SharedDataset]:
+    """Creates one owning SharedDataset per symbol."""
+    shared: Dict[str, SharedDataset] = {}
+    try:
+        for symbol, df in data.items():
+            shared[symbol] = SharedDataset.from_frame(df)
+    except Exception:
+        close_all(shared)
+        raise
+    return shared
+
+
+def close_all(datasets: Mapping[str, SharedDataset]):
+    for dataset in datasets.values():
+        dataset.close()
+
+
+# --- Worker side ---
+
+# Datasets attached by this process, keyed by backing file path
+_ATTACHED: Dict[str, SharedDataset] = {}
+
+
+def attach_dataset(handle: DatasetHandle) -> SharedDataset:
+    """Attaches a dataset once per process and reuses the mapping afterwards."""
+    dataset = _ATTACHED.get(handle.path)
+    if dataset is None:
+        dataset = _ATTACHED[handle.path] = SharedDataset.attach(handle)
+    return dataset
+
+
+def detach_all():
+    """Closes every dataset attached by this process."""
+    while _ATTACHED:
+        _ATTACHED.popitem()[1].close()
+
+
+def shared_signals(dataset: SharedDataset, namespace: Mapping[str, Any]):
+    """
+    Runs a generated strategy on a shared dataset.
+
+    NumPy-target strategies receive the shared arrays directly through
+    calculate_signal_arrays; pandas-target strategies get a zero-copy frame.
+
+    Args:
+        dataset: Attached SharedDataset.
+        namespace: Namespace of the generated module (CompiledStrategy.namespace).
+
+    Returns:
+        (entry, exit) boolean ndarrays.
+    """
+    calculate_signal_arrays = namespace.get("calculate_signal_arrays")
+    if calculate_signal_arrays is not None:
+        return calculate_signal_arrays(*[dataset.arrays.get(field) for field in ARRAY_FIELDS], index=dataset.index)
+    signals = namespace["calculate_signals"](dataset.frame())
+    return (signals['entry'].to_numpy(dtype=bool), signals['exit'].to_numpy(dtype=bool))
+
+
+def backtest_shared(dataset: SharedDataset, namespace: Mapping[str, Any]) -> Dict[str, Any]:
+    """Backtests a generated strategy on a shared dataset (same result layout as run_backtest)."""
+    entry, exit = shared_signals(dataset, namespace)
+    return run_backtest_arrays(dataset.arrays["CLOSE"], entry, exit, index=dataset.index)
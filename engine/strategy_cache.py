@@ -0,0 +1,270 @@
+# engine/strategy_cache.py
+import hashlib
+import importlib.util
+import json
+import marshal
+import os
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from .dsl_parser import parse_dsl_to_ast
+from .code_generator import CODEGEN_VERSION, generate_python_strategy
+from .optimizer import optimize_ast
+
+# Symbol operators are stored under their word form so '>' and 'GT' hash alike
+OP_ALIASES = {
+    ">": "GT",
+    "<": "LT",
+    ">=": "GTE",
+    "<=": "LTE",
+    "==": "EQ",
+    "!=": "NEQ",
+}
+
+# 'a LT b' is rewritten as 'b GT a' (and LTE as GTE) so mirror forms coincide
+MIRROR_OPS = {
+    "LT": "GT",
+    "LTE": "GTE",
+}
+
+# Operators whose operands can be reordered freely
+COMMUTATIVE_COMPARISONS = ("EQ", "NEQ")
+COMMUTATIVE_LOGIC = ("AND", "OR")
+
+
+def _sort_key(node: Dict[str, Any]) -> str:
+    return json.dumps(node, sort_keys=True, separators=(",", ":"))
+
+
+def _flatten(node: Dict[str, Any], op: str, out: list) -> list:
+    # Collects the operands of a chain of the same associative operator
+    if node.get("type") == "binary_op" and node["op"] == op:
+        _flatten(node["left"], op, out)
+        _flatten(node["right"], op, out)
+    else:
+        out.append(node)
+    return out
+
+
+def _canonicalize(node: Any) -> Any:
+    if not isinstance(node, dict):
+        return node
+
+    node_type = node.get("type")
+
+    if node_type == "condition":
+        return _canonicalize(node.get("value") or node.get("content"))
+
+    if node_type == "value":
+        return {"type": "value", "data": float(node["data"])}
+
+    if node_type == "comparison":
+        op = OP_ALIASES.get(node["op"], node["op"])
+        left = _canonicalize(node["left"])
+        right = _canonicalize(node["right"])
+        if op in MIRROR_OPS:
+            op = MIRROR_OPS[op]
+            left, right = right, left
+        elif op in COMMUTATIVE_COMPARISONS and _sort_key(right) < _sort_key(left):
+            left, right = right, left
+        return {"type": "comparison", "op": op, "left": left, "right": right}
+
+    if node_type == "binary_op" and node["op"] in COMMUTATIVE_LOGIC:
+        op = node["op"]
+        operands = [_canonicalize(child) for child in _flatten(node, op, [])]
+        # Re-flatten: canonicalizing a child may have exposed a same-op chain
+        flat = []
+        for child in operands:
+            _flatten(child, op, flat)
+        # Sort and drop duplicates (A AND A == A), then rebuild left-nested
+        unique = OrderedDict((_sort_key(child), child) for child in sorted(flat, key=_sort_key))
+        children = list(unique.values())
+        result = children[0]
+        for child in children[1:]:
+            result = {"type": "binary_op", "op": op, "left": result, "right": child}
+        return result
+
+    return {key: _canonicalize(value) if isinstance(value, dict) else value
+            for key, value in node.items()}
+
+
+def canonicalize_ast(ast: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns a canonical copy of a strategy AST.
+
+    Symbol and word operators are unified, LT/LTE comparisons are mirrored to
+    GT/GTE, and the operands of EQ/NEQ and of AND/OR chains are put in a
+    stable order (duplicates within a chain are dropped). Strategies that only
+    differ in these respects canonicalize to the same dictionary.
+
+    Args:
+        ast: Dictionary AST produced by parse_dsl_to_ast.
+
+    Returns:
+        New dictionary AST; the input is not modified.
+    """
+    return {key: _canonicalize(value) for key, value in ast.items()}
+
+
+def _digest(canonical: Dict[str, Any]) -> str:
+    return hashlib.sha256(_sort_key(canonical).encode("utf-8")).hexdigest()
+
+
+def ast_hash(ast: Dict[str, Any]) -> str:
+    """Returns the SHA-256 hex digest of the canonical form of an AST."""
+    return _digest(canonicalize_ast(ast))
+
+
+class CompiledStrategy:
+    """A generated strategy ready to run: cache key, source and its calculate_signals callable."""
+
+    def __init__(self, key: str, source: str, calculate_signals: Callable, namespace: Dict[str, Any]):
+        self.key = key
+        self.source = source
+        self.calculate_signals = calculate_signals
+        self.namespace = namespace
+        self.from_cache = False
+
+    def __call__(self, df, **kwargs):
+        return self.calculate_signals(df, **kwargs)
+
+
+class StrategyCache:
+    """
+    LRU cache of compiled strategies keyed by canonical AST hash.
+
+    A second, smaller LRU maps raw DSL text to its key so a repeated strategy
+    skips parsing as well as code generation and exec(). When cache_dir is
+    given, generated source and marshalled bytecode are also kept on disk and
+    reused across processes; keys include code_generator.CODEGEN_VERSION, so
+    files written by another generator version are never loaded.
+    """
+
+    def __init__(self, max_entries: int = 128, cache_dir: Optional[str] = None, target: str = "pandas"):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.target = target
+        self._compiled: "OrderedDict[str, CompiledStrategy]" = OrderedDict()
+        self._text_keys: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._compiled)
+
+    def __contains__(self, key):
+        return key in self._compiled
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._compiled), "hits": self.hits,
+                "misses": self.misses, "disk_hits": self.disk_hits}
+
+    def clear(self):
+        self._compiled.clear()
+        self._text_keys.clear()
+
+    def compile_dsl(self, dsl_text: str) -> CompiledStrategy:
+        """Returns the compiled strategy for DSL text, parsing only on a cache miss."""
+        key = self._text_keys.get(dsl_text)
+        if key is not None and key in self._compiled:
+            self._text_keys.move_to_end(dsl_text)
+            return self._lookup(key)
+
+        compiled = self.compile_ast(parse_dsl_to_ast(dsl_text))
+        self._text_keys[dsl_text] = compiled.key
+        while len(self._text_keys) > self.max_entries * 4:
+            self._text_keys.popitem(last=False)
+        return compiled
+
+    def compile_ast(self, ast: Dict[str, Any]) -> CompiledStrategy:
+        """Returns the compiled strategy for an AST, generating code only on a cache miss."""
+        canonical = canonicalize_ast(ast)
+        key = f"{self.target}-v{CODEGEN_VERSION}-{_digest(canonical)}"
+        if key in self._compiled:
+            return self._lookup(key)
+
+        self.misses += 1
+        compiled = self._load_from_disk(key)
+        if compiled is None:
+            source = generate_python_strategy(optimize_ast(canonical), target=self.target)
+            code = compile(source, f"<strategy {key[:16]}>", "exec")
+            compiled = self._instantiate(key, source, code)
+            self._save_to_disk(key, source, code)
+        else:
+            self.disk_hits += 1
+
+        self._compiled[key] = compiled
+        while len(self._compiled) > self.max_entries:
+            self._compiled.popitem(last=False)
+        return compiled
+
+    def _lookup(self, key: str) -> CompiledStrategy:
+        self.hits += 1
+        self._compiled.move_to_end(key)
+        compiled = self._compiled[key]
+        compiled.from_cache = True
+        return compiled
+
+    @staticmethod
+    def _instantiate(key: str, source: str, code) -> CompiledStrategy:
+        namespace: Dict[str, Any] = {}
+        exec(code, namespace)
+        return CompiledStrategy(key, source, namespace["calculate_signals"], namespace)
+
+    # --- On-disk tier ---
+
+    def _paths(self, key: str):
+        tag = sys.implementation.cache_tag or "py"
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.py", f"{base}.{tag}.bin"
+
+    def _load_from_disk(self, key: str) -> Optional[CompiledStrategy]:
+        if not self.cache_dir:
+            return None
+        source_path, code_path = self._paths(key)
+        if not os.path.exists(source_path):
+            return None
+        with open(source_path, "r", encoding="utf-8") as f:
+            source = f.read()
+        code = None
+        if os.path.exists(code_path):
+            with open(code_path, "rb") as f:
+                blob = f.read()
+            magic = importlib.util.MAGIC_NUMBER
+            # Bytecode from another interpreter version is ignored, not trusted
+            if blob[:len(magic)] == magic:
+                code = marshal.loads(blob[len(magic):])
+        if code is None:
+            code = compile(source, f"<strategy {key[:16]}>", "exec")
+        compiled = self._instantiate(key, source, code)
+        compiled.from_cache = True
+        return compiled
+
+    def _save_to_disk(self, key: str, source: str, code):
+        if not self.cache_dir:
+            return
+        source_path, code_path = self._paths(key)
+        # Bytecode first: a reader only trusts an entry once its source exists
+        _atomic_write(code_path, importlib.util.MAGIC_NUMBER + marshal.dumps(code))
+        _atomic_write(source_path, source.encode("utf-8"))
+
+
+def _atomic_write(path: str, payload: bytes):
+    # Write-then-rename so concurrent readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+# Process-wide default cache used by the interactive and manual entry points
+STRATEGY_CACHE = StrategyCache()
+
+
+def compile_strategy(dsl_text: str) -> CompiledStrategy:
+    """Compiles DSL text through the process-wide STRATEGY_CACHE."""
+    return STRATEGY_CACHE.compile_dsl(dsl_text)
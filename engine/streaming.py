@@ -0,0 +1,211 @@
+# engine/streaming.py
+"""
+Out-of-core backtests over histories read chunk by chunk.
+
+A StreamingBacktest evaluates one strategy on consecutive chunks of bars
+(from MarketStore.iter_chunks, market_store.iter_csv_chunks or any iterable
+of OHLCV frames). Each chunk is evaluated vectorized; the indicator states
+(engine.indicators streaming forms), the open position, the equity and the
+metric accumulators are carried to the next chunk, so memory stays bounded
+by the chunk size however long the history is.
+
+Positions, equity, trades, drawdowns and exposure are bit-identical to
+run_backtest on the full history, for any chunk size and also with NaN
+CLOSE bars (their returns count as 0, see backtester.bar_returns, so the
+equity and the running peak stay finite); Sharpe and Sortino combine
+per-chunk moments and agree to floating-point rounding.
+"""
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .backtester import bar_returns, compute_positions
+from .batch import frame_columns
+from .dsl_parser import parse_dsl_to_ast
+from .evaluator import evaluate_signals
+from .indicators import indicator_inputs, stream_indicator
+from .optimizer import optimize_ast
+
+Chunk = Union[pd.DataFrame, Mapping[str, np.ndarray]]
+
+
+class StreamingBacktest:
+    """
+    Incremental long-only backtest of one strategy (same rules as run_backtest).
+
+    Feed chunks in time order with update(); result() can be called at any
+    point and reports the history seen so far.
+    """
+
+    def __init__(self, strategy: Union[str, Dict[str, Any]], periods_per_year: int = 252):
+        ast = parse_dsl_to_ast(strategy) if isinstance(strategy, str) else strategy
+        self.optimized = optimize_ast(ast)
+        for node in self.optimized['indicators'].values():
+            if node.get('timeframe'):
+                raise ValueError(f"Timeframe indicators (@{node['timeframe']}) cannot be streamed; "
+                                 "use run_backtest on the full history")
+        self.periods_per_year = periods_per_year
+        self.indicator_states: Dict[str, Any] = {name: None for name in self.optimized['indicators']}
+
+        # Backtest state after the last bar seen
+        self.bars = 0
+        self.position = False
+        self.close = np.nan
+        self.equity = 1.0
+        self.entry_price: Optional[float] = None
+
+        # Metric accumulators
+        self.peak = 1.0
+        self.max_drawdown = 0.0
+        self.last_high = 0
+        self.max_drawdown_duration = 0
+        self.bars_held = 0
+        self.return_count = 0
+        self.return_mean = 0.0
+        self.return_m2 = 0.0
+        self.downside_sum = 0.0
+        self.trade_returns = []
+
+    def _indicators(self, columns: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        arrays = {}
+        for name, node in self.optimized['indicators'].items():
+            field, params = node['params'][0], node['params'][1:]
+            inputs = [columns[column] for column in indicator_inputs(node['name'], field)]
+            arrays[name], self.indicator_states[name] = stream_indicator(
+                node['name'], inputs, params, self.indicator_states[name])
+        return arrays
+
+    def update(self, chunk: Chunk) -> Dict[str, np.ndarray]:
+        """
+        Processes the next chunk of bars.
+
+        Args:
+            chunk: OHLCV DataFrame, or column name -> array.
+
+        Returns:
+            Dictionary with the chunk's per-bar 'equity' and 'position'
+            arrays (not retained by the backtest).
+        """
+        columns = frame_columns(chunk) if isinstance(chunk, pd.DataFrame) else \
+            {field: np.asarray(values, dtype=float) for field, values in chunk.items()}
+        close = columns["CLOSE"]
+        n = len(close)
+        if n == 0:
+            return {'equity': np.empty(0), 'position': np.zeros(0, dtype=bool)}
+
+        entry, exit = evaluate_signals(self.optimized, columns, self._indicators(columns), n)
+        position = compute_positions(entry, exit, initial=self.position)
+
+        # Equity: the same running product as compute_equity, continued from the last bar
+        if self.bars:
+            closes = np.concatenate(([self.close], close))
+            held = np.concatenate(([self.position], position[:-1]))
+            start = self.equity
+        else:
+            closes, held, start = close, position[:-1], 1.0
+        growth = 1.0 + np.where(held, bar_returns(closes), 0.0)
+        curve = np.cumprod(np.concatenate(([start], growth)))
+        equity = curve[1:] if self.bars else curve
+
+        self._accumulate(equity, curve[:-1], position, close)
+        self.bars += n
+        self.position = bool(position[-1])
+        self.close = close[-1]
+        self.equity = equity[-1]
+        return {'equity': equity, 'position': position}
+
+    def _accumulate(self, equity: np.ndarray, previous_equity: np.ndarray, position: np.ndarray,
+                    close: np.ndarray):
+        # Drawdown depth and duration from the running peak
+        peak = np.maximum.accumulate(np.concatenate(([self.peak], equity)))[1:]
+        self.max_drawdown = max(self.max_drawdown, float(((peak - equity) / peak).max()))
+        bars = np.arange(self.bars, self.bars + len(equity))
+        last_high = np.maximum.accumulate(np.concatenate(([self.last_high], np.where(equity < peak, 0, bars))))[1:]
+        self.max_drawdown_duration = max(self.max_drawdown_duration, int((bars - last_high).max()))
+        self.peak = peak[-1]
+        self.last_high = int(last_high[-1])
+        self.bars_held += int(position.sum())
+
+        # Bar returns: combine the chunk's mean and squared deviations (Chan et al.)
+        returns = (equity[len(equity) - len(previous_equity):] / previous_equity) - 1.0
+        if len(returns):
+            count = self.return_count + len(returns)
+            mean = returns.mean()
+            delta = mean - self.return_mean
+            self.return_m2 += ((returns - mean) ** 2).sum() + delta * delta * self.return_count * len(returns) / count
+            self.return_mean += delta * len(returns) / count
+            self.return_count = count
+            self.downside_sum += float((np.minimum(returns, 0.0) ** 2).sum())
+
+        # Closed trades, pairing exits with the entry still open from an earlier chunk
+        previous = np.concatenate(([self.position], position[:-1]))
+        entry_prices = close[position & ~previous]
+        exit_prices = close[~position & previous]
+        if self.entry_price is not None:
+            entry_prices = np.concatenate(([self.entry_price], entry_prices))
+        self.trade_returns.append((exit_prices / entry_prices[:len(exit_prices)]) - 1.0)
+        self.entry_price = entry_prices[len(exit_prices)] if len(entry_prices) > len(exit_prices) else None
+
+    def metrics(self) -> Dict[str, float]:
+        """The compute_metrics block of the history seen so far."""
+        trade_returns = np.concatenate(self.trade_returns) if self.trade_returns else np.empty(0)
+        trades = len(trade_returns)
+        sharpe = sortino = 0.0
+        if self.return_count > 1:
+            std = np.sqrt(self.return_m2 / (self.return_count - 1))
+            downside = np.sqrt(self.downside_sum / self.return_count)
+            scale = np.sqrt(self.periods_per_year)
+            sharpe = float(self.return_mean / std * scale) if std > 0 else 0.0
+            sortino = float(self.return_mean / downside * scale) if downside > 0 else 0.0
+        return {
+            'total_return': float(self.equity - 1.0) if self.bars else 0.0,
+            'max_drawdown': self.max_drawdown,
+            'max_drawdown_duration': self.max_drawdown_duration,
+            'sharpe': sharpe,
+            'sortino': sortino,
+            'exposure': self.bars_held / self.bars if self.bars else 0.0,
+            'win_rate': float(np.sum(trade_returns > 0)) / trades if trades else 0.0,
+            'number_of_trades': trades,
+        }
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Backtest results in the run_backtest layout, without the per-bar
+        arrays and trade log (see update() and run_streaming_backtest).
+        """
+        metrics = self.metrics()
+        return {
+            'total_return': metrics['total_return'],
+            'max_drawdown': metrics['max_drawdown'],
+            'number_of_trades': metrics['number_of_trades'],
+            'trade_returns': np.concatenate(self.trade_returns) if self.trade_returns else np.empty(0),
+            'bars': self.bars,
+            'final_position': self.position,
+            'metrics': metrics,
+        }
+
+
+def run_streaming_backtest(strategy: Union[str, Dict[str, Any]], chunks: Iterable[Chunk],
+                           periods_per_year: int = 252,
+                           on_chunk: Optional[Callable[[Chunk, Dict[str, np.ndarray]], None]] = None) -> Dict[str, Any]:
+    """
+    Backtests a strategy over a history delivered in chunks.
+
+    Args:
+        strategy: DSL text or parsed AST.
+        chunks: OHLCV frames (or column dicts) in time order, e.g.
+            MarketStore(root).iter_chunks(symbol, 1_000_000).
+        periods_per_year: Bars per year used to annualize Sharpe/Sortino.
+        on_chunk: Optional callback receiving each chunk and its per-bar
+            'equity'/'position' arrays, e.g. to write the equity curve out.
+
+    Returns:
+        See StreamingBacktest.result().
+    """
+    backtest = StreamingBacktest(strategy, periods_per_year=periods_per_year)
+    for chunk in chunks:
+        output = backtest.update(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk, output)
+    return backtest.result()
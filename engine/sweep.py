@@ -0,0 +1,171 @@
+# engine/sweep.py
+import itertools
+import json
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import pandas as pd
+
+from .backtester import METRIC_NAMES
+from .batch import backtest_checkpointed
+from .dsl_parser import parse_dsl_to_ast
+from .indicator_cache import IndicatorCache
+from .job_store import open_job
+from .optimizer import optimize_ast
+from .results_store import ResultsStore
+from .strategy_cache import ast_hash
+
+PLACEHOLDER_PATTERN = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)")
+
+
+def _number(value: Any):
+    # Grid values may be numpy scalars; integral values stay ints (periods)
+    value = value.item() if hasattr(value, "item") else value
+    return int(value) if float(value).is_integer() else float(value)
+
+
+def template_params(ast: Any, names: Optional[List[str]] = None) -> List[str]:
+    """Returns the placeholder names of a template AST, in order of first appearance."""
+    names = [] if names is None else names
+    if isinstance(ast, dict):
+        if ast.get("type") == "param":
+            if ast["name"] not in names:
+                names.append(ast["name"])
+            return names
+        for value in ast.values():
+            template_params(value, names)
+    elif isinstance(ast, list):
+        for value in ast:
+            template_params(value, names)
+    return names
+
+
+def bind_params(ast: Any, values: Mapping[str, Any], in_indicator: bool = False) -> Any:
+    """
+    Returns a copy of a template AST with every placeholder replaced.
+
+    Placeholders used as comparison operands become 'value' nodes; those used
+    as indicator parameters become plain numbers.
+
+    Args:
+        ast: AST from parse_dsl_to_ast containing 'param' nodes.
+        values: Placeholder name (without '$') -> number.
+
+    Returns:
+        New AST without placeholders.
+    """
+    if isinstance(ast, dict):
+        if ast.get("type") == "param":
+            if ast["name"] not in values:
+                raise ValueError(f"No value given for template parameter: ${ast['name']}")
+            number = _number(values[ast["name"]])
+            return number if in_indicator else {"type": "value", "data": float(number)}
+        if ast.get("type") == "indicator":
+            return {**ast, "params": [bind_params(param, values, True) for param in ast["params"]]}
+        return {key: bind_params(value, values) for key, value in ast.items()}
+    if isinstance(ast, list):
+        return [bind_params(value, values, in_indicator) for value in ast]
+    return ast
+
+
+def render_template(template: str, values: Mapping[str, Any]) -> str:
+    """Substitutes placeholder values into template text (for display and logging)."""
+    return PLACEHOLDER_PATTERN.sub(lambda match: repr(_number(values[match.group(1)])), template)
+
+
+def expand_grid(grid: Mapping[str, Iterable]) -> List[Dict[str, Any]]:
+    """
+    Expands a parameter grid into its combinations.
+
+    Args:
+        grid: Placeholder name -> iterable of values (a list, range, np.arange...).
+
+    Returns:
+        One dict per combination, in itertools.product order of the grid keys.
+    """
+    names = list(grid)
+    axes = [[_number(value) for value in grid[name]] for name in names]
+    return [dict(zip(names, combination)) for combination in itertools.product(*axes)]
+
+
+def compile_grid(template: str, grid: Mapping[str, Iterable]):
+    """
+    Parses a DSL template once and binds every grid combination.
+
+    Args:
+        template: DSL text with $placeholders.
+        grid: Placeholder name -> iterable of values; must cover every
+            placeholder of the template.
+
+    Returns:
+        (names, combinations, optimized): the placeholder names, one value
+        dict per combination and the matching optimize_ast outputs.
+    """
+    ast = parse_dsl_to_ast(template)
+    names = template_params(ast)
+    missing = [name for name in names if name not in grid]
+    unknown = [name for name in grid if name not in names]
+    if missing or unknown:
+        raise ValueError(f"Grid does not match the template placeholders: missing {missing}, unknown {unknown}")
+
+    combinations = expand_grid({name: grid[name] for name in names})
+    optimized = [optimize_ast(bind_params(ast, values)) for values in combinations]
+    return names, combinations, optimized
+
+
+def run_sweep(template: str, grid: Mapping[str, Iterable], df: pd.DataFrame, metric: str = "sharpe",
+              ascending: bool = False, processes: Optional[int] = None, chunk_size: int = 256,
+              indicator_cache: Optional[IndicatorCache] = None,
+              periods_per_year: int = 252, checkpoint: Optional[str] = None,
+              results_store: Optional[ResultsStore] = None) -> pd.DataFrame:
+    """
+    Backtests every parameter combination of a DSL template.
+
+    The template is parsed once; each combination is bound and optimized,
+    the distinct indicators across all combinations are computed once, and
+    the combinations are backtested in chunks of chunk_size strategies
+    across worker processes.
+
+    Args:
+        template: DSL text with $placeholders, e.g.
+            "ENTRY: CLOSE > SMA(CLOSE, $fast) EXIT: CLOSE < SMA(CLOSE, $slow)".
+        grid: Placeholder name -> iterable of values; must cover every
+            placeholder of the template.
+        df: OHLCV DataFrame.
+        metric: compute_metrics key to sort the results by.
+        ascending: Sort order for metric (default: best = highest first).
+        processes: Worker processes (None: os.cpu_count(); 1: run in-process).
+        chunk_size: Strategies per batched backtest.
+        indicator_cache: Optional IndicatorCache shared with other runs.
+        periods_per_year: Bars per year used to annualize Sharpe/Sortino.
+        checkpoint: Optional JSON-lines path; each completed chunk of
+            combinations is appended there, and a restarted sweep (same
+            template and data) skips the combinations already stored. The
+            grid itself may grow between runs.
+        results_store: Optional ResultsStore; the results are appended to it
+            (keyed by the ast_hash of each bound strategy, with its DSL text)
+            before sorting.
+
+    Returns:
+        DataFrame with one row per combination: the placeholder values
+        followed by the metrics, sorted by metric. Ties keep grid order, so
+        the result does not depend on the number of processes.
+    """
+    if metric not in METRIC_NAMES:
+        raise ValueError(f"Unknown metric: {metric}")
+    names, combinations, optimized = compile_grid(template, grid)
+    keys = [json.dumps(values, sort_keys=True) for values in combinations]
+    with open_job(checkpoint, "sweep", df, template=template, periods_per_year=periods_per_year) as store:
+        metrics = backtest_checkpointed(optimized, keys, df, store, labels=combinations, processes=processes,
+                                        chunk_size=chunk_size, indicator_cache=indicator_cache,
+                                        periods_per_year=periods_per_year)
+
+    table = pd.DataFrame(combinations, columns=names)
+    for key, values in metrics.items():
+        table[key] = values
+    if results_store is not None:
+        ast = parse_dsl_to_ast(template)
+        results_store.append([ast_hash(bind_params(ast, values)) for values in combinations],
+                             {name: table[name].to_numpy() for name in table.columns},
+                             strategies=[render_template(template, values) for values in combinations])
+    return table.sort_values(metric, ascending=ascending, kind="mergesort").reset_index(drop=True)
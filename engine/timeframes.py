@@ -0,0 +1,270 @@
+# engine/timeframes.py
+"""
+Higher-timeframe indicators, e.g. SMA@W(CLOSE, 20) on daily bars.
+
+The base bars are resampled once per (dataset, timeframe): the resampled
+OHLCV columns and the alignment map back onto the base index are kept in a
+ResampleCache and shared by every indicator using that timeframe. An
+indicator is computed on the resampled bars and forward-aligned: each base
+bar sees the value of the last higher-timeframe bar that completed before
+its own bin started, so the still-forming bar never leaks into a signal.
+"""
+import re
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+from .indicator_cache import IndicatorCache, indicator_key
+from .indicators import compute_indicator
+
+# DSL timeframe text, e.g. "W", "1D", "4H", "15MIN", "W-FRI"
+TIMEFRAME_PATTERN = re.compile(r"^(\d*)([A-Za-z]+)(-[A-Za-z]+)?$")
+
+# Upper-case DSL units -> pandas offset aliases (pandas wants e.g. "h", "min", "ME")
+TIMEFRAME_ALIASES = {
+    "H": "h",
+    "MIN": "min",
+    "T": "min",
+    "S": "s",
+    "M": "ME",
+    "Q": "QE",
+    "Y": "YE",
+    "A": "YE",
+}
+
+# How each OHLCV column is aggregated into a higher-timeframe bar
+TIMEFRAME_AGGREGATIONS = {
+    "OPEN": "first",
+    "HIGH": "max",
+    "LOW": "min",
+    "CLOSE": "last",
+    "VOLUME": "sum",
+}
+
+
+def parse_timeframe(text: str) -> str:
+    """
+    Normalizes a timeframe qualifier to its canonical pandas offset string.
+
+    Args:
+        text: Timeframe as written in the DSL ("W", "1W", "4H", "W-FRI"...),
+            with or without the leading '@'.
+
+    Returns:
+        Canonical offset string, e.g. "W-SUN" for "1W" or "4h" for "4H".
+    """
+    match = TIMEFRAME_PATTERN.match(text.lstrip("@"))
+    if match is None:
+        raise ValueError(f"Invalid timeframe: {text}")
+    count, unit, anchor = match.groups()
+    unit = TIMEFRAME_ALIASES.get(unit.upper(), unit)
+    try:
+        return to_offset(f"{count}{unit}{(anchor or '').upper()}").freqstr
+    except ValueError:
+        raise ValueError(f"Invalid timeframe: {text}") from None
+
+
+class Resampled:
+    """
+    One dataset resampled to one timeframe.
+
+    starts holds the position of the first base bar of every non-empty bin;
+    positions maps each base bar to the last bin completed before its own
+    (-1 while none has). Columns are aggregated on first use and kept.
+    """
+
+    def __init__(self, starts: np.ndarray, positions: np.ndarray):
+        self.starts = starts
+        self.positions = positions
+        self.columns: Dict[str, np.ndarray] = {}
+
+    @property
+    def nbins(self) -> int:
+        return len(self.starts)
+
+    @property
+    def nbytes(self) -> int:
+        return self.starts.nbytes + self.positions.nbytes + sum(values.nbytes for values in self.columns.values())
+
+    def column(self, field: str, values: np.ndarray) -> np.ndarray:
+        """Returns base column values aggregated to this timeframe."""
+        resampled = self.columns.get(field)
+        if resampled is None:
+            resampled = aggregate_column(np.asarray(values, dtype=float), self.starts,
+                                         TIMEFRAME_AGGREGATIONS.get(field, "last"))
+            resampled.setflags(write=False)
+            self.columns[field] = resampled
+        return resampled
+
+    def align(self, values: np.ndarray) -> np.ndarray:
+        """Forward-aligns one value per bin back onto the base bars."""
+        aligned = np.asarray(values, dtype=float)[np.maximum(self.positions, 0)]
+        aligned[self.positions < 0] = np.nan
+        return aligned
+
+
+def aggregate_column(values: np.ndarray, starts: np.ndarray, how: str) -> np.ndarray:
+    """Aggregates the base bars of each bin (bins start at the given positions)."""
+    if not len(starts):
+        return np.empty(0)
+    if how == "first":
+        return values[starts]
+    if how == "last":
+        return values[np.append(starts[1:], len(values)) - 1]
+    if how == "max":
+        return np.maximum.reduceat(values, starts)
+    if how == "min":
+        return np.minimum.reduceat(values, starts)
+    if how == "sum":
+        return np.add.reduceat(values, starts)
+    raise ValueError(f"Unknown aggregation: {how}")
+
+
+def resample_index(index: Any, timeframe: str) -> Resampled:
+    """
+    Builds the bins and alignment map of a base index for a timeframe.
+
+    Args:
+        index: Bar timestamps in time order (DatetimeIndex, or int64 UTC ns).
+            Calendar timeframes (days, weeks...) follow the index time zone.
+        timeframe: Canonical timeframe (see parse_timeframe).
+
+    Returns:
+        Resampled without any aggregated column yet.
+    """
+    if index is None:
+        raise ValueError(f"Timeframe @{timeframe} needs the bar timestamps")
+    index = pd.DatetimeIndex(index)
+    positions = pd.Series(np.arange(len(index)), index=index)
+    starts = positions.resample(timeframe).first().dropna().to_numpy(dtype=np.int64)
+    # Bin of every base bar, minus one: the last bin that was complete when it opened
+    aligned = np.searchsorted(starts, np.arange(len(index)), side="right") - 2
+    return Resampled(starts, aligned)
+
+
+class ResampleCache:
+    """
+    Session-wide memo of resampled datasets, keyed by (fingerprint, timeframe).
+
+    Every higher-timeframe indicator on the same data shares the bins,
+    alignment map and aggregated columns of its timeframe. The cache is an
+    LRU bounded by max_bytes (the alignment map holds one int64 per base bar;
+    aggregated columns are small and not counted).
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Resampled]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.current_bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self.current_bytes = 0
+
+    def _pop(self, key: Hashable):
+        del self._entries[key]
+        self.current_bytes -= self._sizes.pop(key)
+
+    def invalidate(self, fingerprint: str):
+        """Drops every timeframe resampled from the dataset with this fingerprint."""
+        for key in [key for key in self._entries if key[0] == fingerprint]:
+            self._pop(key)
+
+    def get_or_compute(self, key: Tuple[str, str], compute: Callable[[], Resampled]) -> Resampled:
+        """Returns the cached entry for key, calling compute() and storing the result on a miss."""
+        resampled = self._entries.get(key)
+        if resampled is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return resampled
+
+        self.misses += 1
+        resampled = compute()
+        if resampled.nbytes <= self.max_bytes:
+            self._entries[key] = resampled
+            self._sizes[key] = resampled.nbytes
+            self.current_bytes += resampled.nbytes
+            while self.current_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+        return resampled
+
+
+# Session-wide default cache shared by every higher-timeframe indicator
+RESAMPLE_CACHE = ResampleCache()
+
+
+def lookup_resampled(fingerprint: Optional[str], index: Any, timeframe: str,
+                     cache: Optional[ResampleCache] = RESAMPLE_CACHE) -> Resampled:
+    """Resamples an index through the cache when there is a fingerprint to key on."""
+    if cache is None or fingerprint is None:
+        return resample_index(index, timeframe)
+    return cache.get_or_compute((fingerprint, timeframe), lambda: resample_index(index, timeframe))
+
+
+def lookup_timeframe_indicator(cache: Optional[IndicatorCache], fingerprint: Optional[str], name: str,
+                               fields: Sequence[str], inputs: Sequence[np.ndarray], params: Sequence[float],
+                               timeframe: str, index: Any,
+                               resample_cache: Optional[ResampleCache] = RESAMPLE_CACHE,
+                               resampled: Optional[Resampled] = None) -> np.ndarray:
+    """
+    Computes an indicator on a higher timeframe, aligned to the base bars.
+
+    The higher-timeframe counterpart of indicator_cache.lookup_indicator,
+    used by generated strategies and the array evaluator.
+
+    Args:
+        cache: IndicatorCache for the aligned result, or None.
+        fingerprint: data_fingerprint of the base dataset.
+        name: Registry name, e.g. "SMA".
+        fields: Names of the input columns (select the aggregation).
+        inputs: Base input arrays, in the same order as fields.
+        params: Numeric indicator parameters.
+        timeframe: Canonical timeframe (see parse_timeframe).
+        index: Base bar timestamps.
+        resample_cache: ResampleCache shared across indicators, or None.
+        resampled: Already resampled index to use instead of the caches
+            (e.g. shared within one compute_indicator_set call).
+
+    Returns:
+        Float ndarray with one value per base bar, NaN until enough
+        higher-timeframe bars have completed.
+    """
+    def compute():
+        bins = resampled if resampled is not None else \
+            lookup_resampled(fingerprint, index, timeframe, resample_cache)
+        columns = [bins.column(field, values) for field, values in zip(fields, inputs)]
+        return bins.align(compute_indicator(name, columns, params))
+
+    if cache is None or fingerprint is None:
+        return compute()
+    return cache.get_or_compute(indicator_key(name, fields, params, fingerprint, timeframe), compute)
+
+
+def timeframe_columns(df: pd.DataFrame, timeframe: str,
+                      fields: Sequence[str] = tuple(TIMEFRAME_AGGREGATIONS)) -> pd.DataFrame:
+    """
+    Resamples an OHLCV frame to a timeframe, one row per non-empty bin
+    (labelled by its first base bar), for inspection.
+    """
+    bins = resample_index(df.index, parse_timeframe(timeframe))
+    return pd.DataFrame({field: bins.column(field, df[field].to_numpy(dtype=float))
+                         for field in fields if field in df}, index=df.index[bins.starts])
@@ -0,0 +1,225 @@
+# engine/walk_forward.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .backtester import METRIC_NAMES, backtest_matrix, compute_metrics, run_backtest_arrays
+from .batch import frame_columns, indicator_union, signal_matrices
+from .data_utils import OHLCV_FIELDS, data_fingerprint
+from .evaluator import compute_indicator_set, evaluate_signals
+from .indicator_cache import IndicatorCache
+from .job_store import open_job
+from .shared_data import DatasetHandle, SharedDataset, attach_dataset
+from .sweep import compile_grid
+
+
+class Fold(NamedTuple):
+    # Bar ranges [start, end) of the in-sample and out-of-sample windows
+    train_start: int
+    train_end: int
+    test_start: int
+    test_end: int
+
+
+def walk_forward_folds(n: int, train_size: int, test_size: int, anchored: bool = False) -> List[Fold]:
+    """
+    Splits n bars into consecutive walk-forward folds.
+
+    Each out-of-sample window directly follows its in-sample window and the
+    windows advance by test_size bars, so the test windows tile the data
+    after the first train_size bars (the last one may be shorter).
+
+    Args:
+        n: Number of bars.
+        train_size: In-sample bars (the first window when anchored).
+        test_size: Out-of-sample bars per fold.
+        anchored: True grows the in-sample window from bar 0; False rolls a
+            fixed-size window forward.
+
+    Returns:
+        List of Fold ranges.
+    """
+    if train_size < 1 or test_size < 1:
+        raise ValueError("train_size and test_size must be positive")
+    folds = []
+    test_start = train_size
+    while test_start < n:
+        train_start = 0 if anchored else test_start - train_size
+        folds.append(Fold(train_start, test_start, test_start, min(test_start + test_size, n)))
+        test_start += test_size
+    return folds
+
+
+def _select(scores: np.ndarray, ascending: bool) -> int:
+    # Best score, first grid combination on ties; NaN scores rank last
+    order = np.argsort(scores if ascending else -scores, kind="stable")
+    return int(order[0])
+
+
+# --- Worker side ---
+
+# Dataset views and candidate strategies installed once per worker by _init_worker
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_worker(handle: DatasetHandle, asts: List[Dict[str, Any]], options: Dict[str, Any]):
+    arrays = attach_dataset(handle).arrays
+    _WORKER_STATE.update(
+        columns={field: values for field, values in arrays.items() if field in OHLCV_FIELDS},
+        indicators={name: values for name, values in arrays.items() if name not in OHLCV_FIELDS},
+        asts=asts, **options)
+
+
+def _run_fold(fold: Fold, state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # Optimizes on the in-sample window, then replays the winner out of sample.
+    # Indicators were computed once on the full history and are only sliced
+    # here, so in-sample windows also get warmed-up values at their start.
+    state = state or _WORKER_STATE
+    asts, chunk_size = state["asts"], state["chunk_size"]
+
+    def window(start: int, end: int):
+        columns = {field: values[start:end] for field, values in state["columns"].items()}
+        indicators = {name: values[start:end] for name, values in state["indicators"].items()}
+        return columns, indicators
+
+    columns, indicators = window(fold.train_start, fold.train_end)
+    scores = []
+    for start in range(0, len(asts), chunk_size):
+        entries, exits = signal_matrices(asts[start:start + chunk_size], columns, indicators)
+        metrics = backtest_matrix(columns["CLOSE"], entries, exits, periods_per_year=state["periods_per_year"])
+        scores.append(np.asarray(metrics[state["metric"]], dtype=float))
+    scores = np.concatenate(scores)
+    best = _select(scores, state["ascending"])
+
+    columns, indicators = window(fold.test_start, fold.test_end)
+    entry, exit = evaluate_signals(asts[best], columns, indicators, fold.test_end - fold.test_start)
+    results = run_backtest_arrays(columns["CLOSE"], entry, exit)
+    return {
+        'best': best,
+        'in_sample': float(scores[best]),
+        'equity_curve': results['equity_curve'],
+        'position': results['position'],
+        'trade_returns': results['trade_returns'],
+        'metrics': results['metrics'],
+    }
+
+
+def _run_folds(folds: List[Fold], columns: Dict[str, np.ndarray], indicators: Dict[str, np.ndarray],
+               asts: List[Dict[str, Any]], options: Dict[str, Any], processes: Optional[int]) -> Iterator[Dict[str, Any]]:
+    # Yields fold results in order, as soon as each one is available
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(folds) <= 1:
+        state = {"columns": columns, "indicators": indicators, "asts": asts, **options}
+        for fold in folds:
+            yield _run_fold(fold, state)
+        return
+    with SharedDataset.from_arrays({**columns, **indicators}) as shared, \
+            ProcessPoolExecutor(max_workers=min(processes, len(folds)), initializer=_init_worker,
+                                initargs=(shared.handle, asts, options)) as pool:
+        yield from pool.map(_run_fold, folds)
+
+
+def run_walk_forward(template: str, grid: Mapping[str, Iterable], df: pd.DataFrame, train_size: int,
+                     test_size: int, anchored: bool = False, metric: str = "sharpe", ascending: bool = False,
+                     processes: Optional[int] = None, chunk_size: int = 512,
+                     indicator_cache: Optional[IndicatorCache] = None,
+                     periods_per_year: int = 252, checkpoint: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Walk-forward optimization of a DSL template.
+
+    For every fold the grid combination with the best in-sample metric is
+    picked and backtested on the following out-of-sample window; the
+    out-of-sample equity curves are chained into one curve. Indicators for
+    the union of all combinations are computed once on the full history
+    (through indicator_cache when given) and shared with the fold workers,
+    so overlapping windows never recompute them. Every fold starts flat and
+    positions still open at the end of a test window are marked but not
+    counted as trades.
+
+    Args:
+        template: DSL text with $placeholders (see engine.sweep).
+        grid: Placeholder name -> iterable of values.
+        df: OHLCV DataFrame.
+        train_size: In-sample bars (first window when anchored).
+        test_size: Out-of-sample bars per fold.
+        anchored: Grow the in-sample window from the first bar instead of rolling it.
+        metric: compute_metrics key optimized in sample.
+        ascending: True when lower metric values are better.
+        processes: Worker processes (None: os.cpu_count(); 1: run in-process).
+        chunk_size: Strategies per batched in-sample backtest.
+        indicator_cache: Optional IndicatorCache shared with other runs.
+        periods_per_year: Bars per year used to annualize Sharpe/Sortino.
+        checkpoint: Optional JSON-lines path; each finished fold is appended
+            there and a restarted run with the same settings skips it.
+
+    Returns:
+        Dictionary with a 'folds' DataFrame (window dates, chosen parameters,
+        in-sample score and out-of-sample metrics per fold), the stitched
+        out-of-sample 'equity_curve' Series and its 'metrics'.
+    """
+    if metric not in METRIC_NAMES:
+        raise ValueError(f"Unknown metric: {metric}")
+    folds = walk_forward_folds(len(df), train_size, test_size, anchored)
+    if not folds:
+        raise ValueError(f"Not enough bars ({len(df)}) for an in-sample window of {train_size}")
+    _, combinations, optimized = compile_grid(template, grid)
+
+    columns = frame_columns(df)
+    fingerprint = data_fingerprint(df) if indicator_cache is not None else None
+    indicators = compute_indicator_set(indicator_union(optimized), columns, cache=indicator_cache,
+                                       fingerprint=fingerprint, index=df.index)
+    options = {"metric": metric, "ascending": ascending, "chunk_size": chunk_size,
+               "periods_per_year": periods_per_year}
+
+    grid_values = {name: list(dict.fromkeys(values[name] for values in combinations)) for name in combinations[0]}
+    with open_job(checkpoint, "walk_forward", df, template=template, grid=grid_values, train_size=train_size,
+                  test_size=test_size, anchored=anchored, metric=metric, ascending=ascending,
+                  periods_per_year=periods_per_year) as store:
+        keys = [f"{fold.train_start}-{fold.test_start}-{fold.test_end}" for fold in folds]
+        pending = [position for position, key in enumerate(keys) if store is None or key not in store]
+        outputs: Dict[str, Dict[str, Any]] = {}
+        for position, output in zip(pending, _run_folds([folds[position] for position in pending], columns,
+                                                        indicators, optimized, options, processes)):
+            outputs[keys[position]] = output
+            if store is not None:
+                store.append(keys[position], {
+                    **{name: value.tolist() if isinstance(value, np.ndarray) else value
+                       for name, value in output.items()},
+                    'position': output['position'].astype(int).tolist()})
+        for key in keys:
+            if key not in outputs:
+                record = store.get(key)
+                outputs[key] = {**record, 'equity_curve': np.asarray(record['equity_curve']),
+                                'position': np.asarray(record['position'], dtype=bool),
+                                'trade_returns': np.asarray(record['trade_returns'], dtype=float)}
+    outputs = [outputs[key] for key in keys]
+
+    # Chain the out-of-sample curves: each fold starts from the previous fold's final equity
+    curves, scale = [], 1.0
+    for output in outputs:
+        curves.append(output['equity_curve'] * scale)
+        scale = curves[-1][-1]
+    equity = np.concatenate(curves)
+    position = np.concatenate([output['position'] for output in outputs])
+    trade_returns = np.concatenate([output['trade_returns'] for output in outputs])
+    test_index = df.index[folds[0].test_start:]
+
+    rows = []
+    for number, (fold, output) in enumerate(zip(folds, outputs)):
+        rows.append({
+            'fold': number,
+            'train_start': df.index[fold.train_start], 'train_end': df.index[fold.train_end - 1],
+            'test_start': df.index[fold.test_start], 'test_end': df.index[fold.test_end - 1],
+            **combinations[output['best']],
+            f'in_sample_{metric}': output['in_sample'],
+            **output['metrics'],
+        })
+
+    return {
+        'folds': pd.DataFrame(rows),
+        'equity_curve': pd.Series(equity, index=test_index),
+        'metrics': compute_metrics(equity, position, trade_returns, periods_per_year=periods_per_year),
+    }
@@ -12,11 +12,9 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from engine.nl_parser import nl_to_dsl
-from engine.dsl_parser import parse_dsl_to_ast
-from engine.code_generator import generate_python_strategy
+from engine.strategy_cache import STRATEGY_CACHE
 from engine.backtester import run_backtest
 from engine.data_utils import load_data
-from numpy import nan
 
 
 def print_header(title):
@@ -179,9 +177,12 @@ def process_strategy(strategy):
     
     try:
         dsl_text = f"{dsl['entry']} {dsl['exit']}"
-        ast = parse_dsl_to_ast(dsl_text)
+        # Parses, generates and compiles once; repeats are served from the cache
+        compiled = STRATEGY_CACHE.compile_dsl(dsl_text)
         print_success("DSL Parser (Lark Grammar)")
         print("Abstract Syntax Tree built successfully")
+        if compiled.from_cache:
+            print_info("Reused compiled strategy from cache")
     except Exception as e:
         print_error(f"Failed to parse DSL: {e}")
         return
@@ -189,7 +190,7 @@ def process_strategy(strategy):
     print_section("STEP 3: GENERATING PYTHON CODE")
     
     try:
-        code = generate_python_strategy(ast)
+        code = compiled.source
         print_success("Code Generator")
         print(f"\nGenerated {len(code)} lines of Python code")
         print("\nFirst 300 characters of generated code:")
@@ -214,15 +215,7 @@ def process_strategy(strategy):
     print_section("STEP 5: EXECUTING STRATEGY")
     
     try:
-        exec_globals = {
-            'DataFrame': __import__('pandas').DataFrame,
-            'nan': nan,
-            'calculate_sma': __import__('engine.data_utils', fromlist=['calculate_sma']).calculate_sma,
-        }
-        exec_scope = {}
-        exec(code, exec_globals, exec_scope)
-        calculate_signals_func = exec_scope['calculate_signals']
-        signals = calculate_signals_func(df)
+        signals = compiled.calculate_signals(df)
         print_success("Strategy Execution")
         print("Signals generated successfully")
     except Exception as e:
@@ -235,26 +228,19 @@ def process_strategy(strategy):
         results = run_backtest(df, signals)
         print_success("Backtest Complete")
         
-        # Convert to float if needed (remove % sign if present)
-        total_return_str = results['total_return']
-        if isinstance(total_return_str, str):
-            total_return = float(total_return_str.replace('%', '').strip())
-        else:
-            total_return = float(total_return_str)
-            
-        max_drawdown_str = results['max_drawdown']
-        if isinstance(max_drawdown_str, str):
-            max_drawdown = float(max_drawdown_str.replace('%', '').strip())
-        else:
-            max_drawdown = float(max_drawdown_str)
-            
-        num_trades = int(results['number_of_trades']) if isinstance(results['number_of_trades'], str) else results['number_of_trades']
+        # Results are numeric (fractions); scale to percent for display
+        total_return = results['total_return'] * 100
+        max_drawdown = results['max_drawdown'] * 100
+        num_trades = results['number_of_trades']
+        metrics = results['metrics']
         
         print("\n" + "=" * 70)
         print("BACKTEST RESULTS")
         print("=" * 70)
         print(f"\nTotal Return:      {total_return:>10.2f}%")
         print(f"Max Drawdown:      {max_drawdown:>10.2f}%")
+        print(f"Sharpe Ratio:      {metrics['sharpe']:>10.2f}")
+        print(f"Exposure:          {metrics['exposure'] * 100:>10.2f}%")
         print(f"Number of Trades:  {num_trades:>10}")
         
         if num_trades == 0:
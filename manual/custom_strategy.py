@@ -14,12 +14,10 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from engine.nl_parser import nl_to_dsl
-from engine.dsl_parser import parse_dsl_to_ast
-from engine.code_generator import generate_python_strategy
-from engine.backtester import run_backtest
+from engine.strategy_cache import STRATEGY_CACHE
+from engine.backtester import run_backtest, format_results
 from engine.data_utils import load_data
 import pandas as pd
-from numpy import nan
 
 
 def run_custom_strategy(english_description):
@@ -54,8 +52,11 @@ def run_custom_strategy(english_description):
     print("=" * 70)
     try:
         dsl_text = f"{dsl_code['entry']} {dsl_code['exit']}"
-        ast = parse_dsl_to_ast(dsl_text)
+        # Parses, generates and compiles once; repeats are served from the cache
+        compiled = STRATEGY_CACHE.compile_dsl(dsl_text)
         print("[OK] Strategy parsed successfully!")
+        if compiled.from_cache:
+            print("[OK] Reused compiled strategy from cache")
         print()
     except Exception as e:
         print(f"[ERROR] Error parsing strategy: {e}")
@@ -66,7 +67,7 @@ def run_custom_strategy(english_description):
     print("[GENERATED PYTHON CODE]")
     print("=" * 70)
     try:
-        python_code = generate_python_strategy(ast)
+        python_code = compiled.source
         print("First 400 characters of generated code:")
         print(python_code[:400])
         print("...")
@@ -89,32 +90,15 @@ def run_custom_strategy(english_description):
     print("[RUNNING BACKTEST]")
     print("=" * 70)
     try:
-        # Create a globals dict with necessary imports for the exec environment
-        exec_globals = {
-            'DataFrame': __import__('pandas').DataFrame,
-            'nan': nan,
-            'calculate_sma': __import__('engine.data_utils', fromlist=['calculate_sma']).calculate_sma,
-        }
-        # Execute the generated code
-        exec_scope = {}
-        exec(python_code, exec_globals, exec_scope)
-        calculate_signals_func = exec_scope['calculate_signals']
-        signals = calculate_signals_func(df)
+        signals = compiled.calculate_signals(df)
         
         # Run backtest
         results = run_backtest(df, signals)
+        report = format_results(results)
         
-        # Handle string formatting with % sign
-        total_return_str = str(results['total_return']).replace('%', '')
-        max_drawdown_str = str(results['max_drawdown']).replace('%', '')
-        
-        total_return = float(total_return_str)
-        max_drawdown = float(max_drawdown_str)
-        num_trades = int(results['number_of_trades']) if isinstance(results['number_of_trades'], str) else results['number_of_trades']
-        
-        print(f"Total Return:     {total_return:.2f}%")
-        print(f"Max Drawdown:     {max_drawdown:.2f}%")
-        print(f"Number of Trades: {num_trades}")
+        print(f"Total Return:     {report['total_return']}")
+        print(f"Max Drawdown:     {report['max_drawdown']}")
+        print(f"Number of Trades: {report['number_of_trades']}")
         print(f"Status:           Success!")
         print()
         return results
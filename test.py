@@ -4,7 +4,7 @@
 from engine.nl_parser import nl_to_dsl
 from engine.dsl_parser import parse_dsl_to_ast
 from engine.code_generator import generate_python_strategy
-from engine.backtester import run_backtest # Assuming this is implemented now
+from engine.backtester import run_backtest, format_results # Assuming this is implemented now
 from engine.data_utils import load_data 
 import json
 from numpy import nan
@@ -54,7 +54,7 @@ try:
     exec_globals = {
         'DataFrame': __import__('pandas').DataFrame,
         'nan': __import__('numpy').nan,
-        'calculate_sma': __import__('engine.data_utils', fromlist=['calculate_sma']).calculate_sma,
+        'calculate_indicator': __import__('engine.data_utils', fromlist=['calculate_indicator']).calculate_indicator,
     }
     # Execute the generated string to define the calculate_signals function
     exec(strategy_code, exec_globals, exec_scope) 
@@ -69,9 +69,10 @@ try:
     print("\n####################")
     print("# Backtest Results #")
     print("####################")
-    print(f"Total Return:     {backtest_result['total_return']}")
-    print(f"Max Drawdown:     {backtest_result['max_drawdown']}")
-    print(f"Number of Trades: {backtest_result['number_of_trades']}")
+    report = format_results(backtest_result)
+    print(f"Total Return:     {report['total_return']}")
+    print(f"Max Drawdown:     {report['max_drawdown']}")
+    print(f"Number of Trades: {report['number_of_trades']}")
 
     if backtest_result['trade_log']:
         print("\nEntry/Exit Log (First Trade):")
@@ -0,0 +1,20 @@
+# tests/conftest.py
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def make_ohlcv():
+    """Factory for a random-walk OHLCV frame: make_ohlcv(bars, seed=0, freq="D")."""
+    def make(bars: int, seed: int = 0, freq: str = "D", start: str = "2020-01-01") -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+        close = 100.0 + np.cumsum(rng.normal(0.0, 1.0, bars))
+        return pd.DataFrame({
+            "OPEN": close + rng.normal(0.0, 0.2, bars),
+            "HIGH": close + rng.uniform(0.1, 1.0, bars),
+            "LOW": close - rng.uniform(0.1, 1.0, bars),
+            "CLOSE": close,
+            "VOLUME": rng.integers(1_000, 100_000, bars).astype(float),
+        }, index=pd.date_range(start, periods=bars, freq=freq))
+    return make
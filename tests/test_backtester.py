@@ -0,0 +1,115 @@
+# tests/test_backtester.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.backtester import backtest_matrix, compute_positions, run_backtest
+
+
+def _signals(df, entry, exit):
+    return pd.DataFrame({"entry": np.asarray(entry, dtype=bool), "exit": np.asarray(exit, dtype=bool)},
+                        index=df.index)
+
+
+def _assert_modes_agree(df, signals):
+    vectorized = run_backtest(df, signals, mode="vectorized")
+    loop = run_backtest(df, signals, mode="loop")
+    assert vectorized["total_return"] == pytest.approx(loop["total_return"], rel=1e-12, abs=1e-12)
+    assert vectorized["max_drawdown"] == pytest.approx(loop["max_drawdown"], rel=1e-12, abs=1e-12)
+    assert vectorized["number_of_trades"] == loop["number_of_trades"]
+    assert len(vectorized["trade_log"]) == len(loop["trade_log"])
+    for ours, reference in zip(vectorized["trade_log"], loop["trade_log"]):
+        assert ours["entry_date"] == reference["entry_date"]
+        assert ours["exit_date"] == reference["exit_date"]
+        assert ours["entry_price"] == reference["entry_price"]
+        assert ours["exit_price"] == reference["exit_price"]
+        assert ours["profit_loss"] == pytest.approx(reference["profit_loss"])
+    np.testing.assert_array_equal(vectorized["position"], loop["position"])
+    np.testing.assert_allclose(vectorized["equity_curve"], loop["equity_curve"], rtol=1e-12)
+    return vectorized
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorized_matches_loop_on_random_signals(make_ohlcv, seed):
+    df = make_ohlcv(300, seed=seed)
+    rng = np.random.default_rng(seed)
+    # Dense enough that entry and exit often fire on the same bar
+    _assert_modes_agree(df, _signals(df, rng.random(300) < 0.3, rng.random(300) < 0.3))
+
+
+def test_position_open_at_last_bar(make_ohlcv):
+    df = make_ohlcv(20)
+    entry = np.zeros(20, dtype=bool)
+    exit = np.zeros(20, dtype=bool)
+    entry[[2, 12]] = True
+    exit[8] = True
+    result = _assert_modes_agree(df, _signals(df, entry, exit))
+    # The trade opened on bar 12 is still held: marked in equity, not logged
+    assert result["number_of_trades"] == 1
+    assert result["position"][-1]
+    close = df["CLOSE"].to_numpy()
+    assert result["total_return"] == pytest.approx((close[8] / close[2]) * (close[-1] / close[12]) - 1.0)
+
+
+def test_entry_and_exit_on_the_same_bar(make_ohlcv):
+    df = make_ohlcv(10)
+    entry = np.array([1, 0, 0, 1, 0, 1, 0, 0, 1, 0], dtype=bool)
+    exit = np.array([0, 0, 0, 1, 0, 1, 1, 0, 1, 0], dtype=bool)
+    result = _assert_modes_agree(df, _signals(df, entry, exit))
+    # Long from bar 0; bar 3 flips flat, bar 5 flips long, bar 6 exits, bar 8 flips long
+    np.testing.assert_array_equal(result["position"], [1, 1, 1, 0, 0, 1, 0, 0, 1, 1])
+
+
+def test_compute_positions_single_signals():
+    entry = np.array([0, 1, 0, 1, 0, 0, 0, 1], dtype=bool)
+    exit = np.array([1, 0, 0, 0, 1, 1, 0, 0], dtype=bool)
+    # Exit while flat and entry while long change nothing
+    np.testing.assert_array_equal(compute_positions(entry, exit), [0, 1, 1, 1, 0, 0, 0, 1])
+
+
+def test_compute_positions_both_signals_toggle():
+    entry = np.array([1, 1, 1, 0, 1], dtype=bool)
+    exit = np.array([1, 1, 0, 1, 1], dtype=bool)
+    np.testing.assert_array_equal(compute_positions(entry, exit), [1, 0, 1, 0, 1])
+    np.testing.assert_array_equal(compute_positions(entry, exit, initial=True), [0, 1, 1, 0, 1])
+
+
+def test_compute_positions_matrix_matches_columns():
+    rng = np.random.default_rng(3)
+    entry = rng.random((200, 6)) < 0.2
+    exit = rng.random((200, 6)) < 0.2
+    matrix = compute_positions(entry, exit)
+    for column in range(6):
+        np.testing.assert_array_equal(matrix[:, column], compute_positions(entry[:, column], exit[:, column]))
+
+
+def test_nan_close_while_held_counts_as_flat(make_ohlcv):
+    df = make_ohlcv(50)
+    df.iloc[20:23, df.columns.get_loc("CLOSE")] = np.nan
+    entry = np.zeros(50, dtype=bool)
+    exit = np.zeros(50, dtype=bool)
+    entry[10] = True
+    exit[40] = True
+    result = _assert_modes_agree(df, _signals(df, entry, exit))
+
+    assert np.isfinite(result["equity_curve"]).all()
+    assert all(np.isfinite(value) for value in result["metrics"].values())
+    # Returns into and out of the missing bars count as 0
+    equity = result["equity_curve"]
+    assert (equity[20:24] == equity[19]).all()
+    close = df["CLOSE"].to_numpy()
+    expected = (close[19] / close[10]) * (close[40] / close[23]) - 1.0
+    assert result["total_return"] == pytest.approx(expected)
+
+
+def test_backtest_matrix_matches_run_backtest_with_nan_close(make_ohlcv):
+    df = make_ohlcv(120, seed=4)
+    df.iloc[30:35, df.columns.get_loc("CLOSE")] = np.nan
+    rng = np.random.default_rng(4)
+    entries = rng.random((120, 4)) < 0.2
+    exits = rng.random((120, 4)) < 0.2
+    matrix = backtest_matrix(df["CLOSE"].to_numpy(), entries, exits)
+    for column in range(4):
+        single = run_backtest(df, _signals(df, entries[:, column], exits[:, column]))
+        assert matrix["total_return"][column] == pytest.approx(single["total_return"])
+        assert matrix["max_drawdown"][column] == pytest.approx(single["max_drawdown"])
@@ -0,0 +1,104 @@
+# tests/test_bars.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.bars import TickAggregator, aggregate_ticks, iter_bar_chunks, parse_bar_spec
+
+SPECS = ["1min", "time:15s", "volume:500", "tick:7"]
+
+
+def _ticks(count=3000, seed=0, fractional=False):
+    rng = np.random.default_rng(seed)
+    # Bursts and gaps: repeated timestamps and minutes without any tick
+    steps = rng.choice([0, 0, 1, 2, 5, 90], size=count) * 1_000_000_000 + rng.integers(0, 3, size=count)
+    times = pd.Timestamp("2024-05-01 09:30", tz="America/New_York").value + np.cumsum(steps)
+    index = pd.DatetimeIndex(times.view("M8[ns]"), name="time").tz_localize("UTC").tz_convert("America/New_York")
+    size = rng.uniform(0.1, 9.9, size=count).round(1) if fractional else rng.integers(1, 200, size=count)
+    price = 100 + np.cumsum(rng.normal(0, 0.05, size=count)).round(2)
+    return pd.DataFrame({"PRICE": price, "SIZE": size.astype(float)}, index=index)
+
+
+def _split(ticks, bounds):
+    # Chunks ending at the given row positions; repeated positions give empty chunks
+    edges = [0, *bounds, len(ticks)]
+    return [ticks.iloc[start:end] for start, end in zip(edges[:-1], edges[1:])]
+
+
+def _splits(ticks, seed):
+    rng = np.random.default_rng(seed)
+    n = len(ticks)
+    return {
+        "single": [],
+        "every tick": list(range(1, n)),
+        "random": sorted(rng.integers(0, n, size=40)),
+        "empty chunks": [0, 0, 10, 10, 10, n // 2, n // 2, n, n],
+        # Inside a run of equal timestamps
+        "ties": [int(np.flatnonzero(ticks.index[1:] == ticks.index[:-1])[5]) + 1],
+    }
+
+
+@pytest.mark.parametrize("fractional", [False, True])
+@pytest.mark.parametrize("split", ["every tick", "random", "empty chunks", "ties"])
+def test_chunking_does_not_change_the_bars(split, fractional):
+    ticks = _ticks(fractional=fractional)
+    whole = aggregate_ticks([ticks], SPECS)
+    chunked = aggregate_ticks(_split(ticks, _splits(ticks, seed=1)[split]), SPECS)
+    for spec in SPECS:
+        key = parse_bar_spec(spec).key
+        assert len(whole[key]) > 20
+        pd.testing.assert_frame_equal(chunked[key], whole[key], check_exact=not fractional)
+        np.testing.assert_array_equal(chunked[key].index, whole[key].index)
+        for column in ["OPEN", "HIGH", "LOW", "CLOSE", "TICKS"]:
+            np.testing.assert_array_equal(chunked[key][column], whole[key][column])
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_streamed_bars_match(spec):
+    ticks = _ticks(seed=2)
+    chunks = _split(ticks, _splits(ticks, seed=3)["random"])
+    streamed = pd.concat(list(iter_bar_chunks(chunks, spec)))
+    pd.testing.assert_frame_equal(streamed, aggregate_ticks([ticks], spec), check_exact=True)
+
+
+def test_time_bars_match_resample():
+    ticks = _ticks(seed=4)
+    bars = aggregate_ticks(_split(ticks, _splits(ticks, seed=5)["random"]), "1min")
+    grouped = ticks.resample("1min")
+    expected = pd.DataFrame({
+        "OPEN": grouped["PRICE"].first(), "HIGH": grouped["PRICE"].max(), "LOW": grouped["PRICE"].min(),
+        "CLOSE": grouped["PRICE"].last(), "VOLUME": grouped["SIZE"].sum(), "TICKS": grouped["PRICE"].count(),
+    }).astype(float)
+    expected = expected[expected["TICKS"] > 0]
+    np.testing.assert_array_equal(bars.index, expected.index)
+    np.testing.assert_array_equal(bars.to_numpy(), expected.to_numpy())
+
+
+def test_volume_bars_close_on_the_threshold():
+    ticks = _ticks(seed=6)
+    bars = aggregate_ticks([ticks], "volume:500")
+    # Every bar but the last reached the threshold, and without its last tick it had not
+    cumulative = ticks["SIZE"].cumsum().to_numpy()
+    ends = np.cumsum(bars["TICKS"].to_numpy()).astype(int) - 1
+    np.testing.assert_array_equal(cumulative[ends[:-1]] // 500, np.arange(1, len(bars)))
+    np.testing.assert_array_equal(bars.index, ticks.index[ends])
+
+
+def test_late_ticks_are_rejected():
+    ticks = _ticks(seed=7)
+    aggregator = TickAggregator("1min")
+    times = ticks.index.tz_convert("UTC").tz_localize(None).as_unit("ns").asi8
+    price, size = ticks["PRICE"].to_numpy(), ticks["SIZE"].to_numpy()
+    aggregator.update(times[:100], price[:100], size[:100])
+    # A tick at the last timestamp seen is fine, an earlier one is not
+    aggregator.update(times[99:100], price[99:100], size[99:100])
+    with pytest.raises(ValueError):
+        aggregator.update(times[98:99], price[98:99], size[98:99])
+    with pytest.raises(ValueError):
+        aggregator.update(times[200:100:-1], price[200:100:-1], size[200:100:-1])
+
+
+@pytest.mark.parametrize("spec", ["weekly", "tick:2.5", "volume:-1", "range:5", "0s"])
+def test_invalid_specs(spec):
+    with pytest.raises(ValueError):
+        parse_bar_spec(spec)
@@ -0,0 +1,55 @@
+# tests/test_code_generator.py
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+
+from engine.code_generator import generate_python_strategy
+from engine.dsl_parser import parse_dsl_to_ast
+from engine.optimizer import optimize_ast
+
+STRATEGIES = {
+    "sma": "ENTRY: CLOSE > SMA(CLOSE, 20) AND VOLUME > 20000 EXIT: CLOSE < SMA(CLOSE, 50)",
+    "rsi": "ENTRY: RSI(CLOSE, 14) < 40 EXIT: RSI(CLOSE, 14) > 60",
+    "ema": "ENTRY: EMA(CLOSE, 10) > EMA(CLOSE, 30) EXIT: EMA(CLOSE, 10) < EMA(CLOSE, 30)",
+    "atr": "ENTRY: ATR(CLOSE, 14) < 1.5 AND CLOSE > OPEN EXIT: ATR(CLOSE, 14) > 1.6",
+    "macd": "ENTRY: MACD(CLOSE, 12, 26, 9) > MACDS(CLOSE, 12, 26, 9) EXIT: MACDH(CLOSE, 12, 26, 9) < 0",
+    "bollinger": "ENTRY: CLOSE < BBL(CLOSE, 20, 2) EXIT: CLOSE > BBU(CLOSE, 20, 2) OR HIGH > SMA(HIGH, 20)",
+    "stdev": "ENTRY: STDEV(CLOSE, 10) > 1 OR (LOW < 95 AND CLOSE > 90) EXIT: STDEV(CLOSE, 10) < 0.8",
+    "weekly": "ENTRY: CLOSE > SMA@W(CLOSE, 4) AND RSI@W(CLOSE, 3) < 80 EXIT: CLOSE < SMA@W(CLOSE, 4)",
+}
+
+
+def _signals(ast: Dict[str, Any], target: str, df):
+    namespace: Dict[str, Any] = {}
+    exec(generate_python_strategy(ast, target=target), namespace)
+    signals = namespace["calculate_signals"](df)
+    return signals["entry"].to_numpy(dtype=bool), signals["exit"].to_numpy(dtype=bool)
+
+
+@pytest.mark.parametrize("optimized", [False, True], ids=["raw", "optimized"])
+@pytest.mark.parametrize("name", list(STRATEGIES))
+def test_targets_agree(make_ohlcv, name, optimized):
+    df = make_ohlcv(400, seed=6)
+    ast = parse_dsl_to_ast(STRATEGIES[name])
+    if optimized:
+        ast = optimize_ast(ast)
+    entry, exit = _signals(ast, "pandas", df)
+    assert entry.any() and exit.any()
+
+    # Timeframe indicators have no live form
+    targets = ["numpy"] if name == "weekly" else ["numpy", "live"]
+    for target in targets:
+        target_entry, target_exit = _signals(ast, target, df)
+        np.testing.assert_array_equal(target_entry, entry, err_msg=target)
+        np.testing.assert_array_equal(target_exit, exit, err_msg=target)
+
+
+def test_live_target_rejects_timeframes():
+    with pytest.raises(ValueError):
+        generate_python_strategy(optimize_ast(parse_dsl_to_ast(STRATEGIES["weekly"])), target="live")
+
+
+def test_unknown_target():
+    with pytest.raises(ValueError):
+        generate_python_strategy(parse_dsl_to_ast(STRATEGIES["sma"]), target="cython")
@@ -0,0 +1,100 @@
+# tests/test_incremental.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.backtester import run_backtest
+from engine.incremental import EQUITY_FILE, POSITION_FILE, IncrementalBacktest, run_incremental
+from engine.strategy_cache import STRATEGY_CACHE
+
+STRATEGY = "ENTRY: EMA(CLOSE, 10) > SMA(CLOSE, 20) EXIT: RSI(CLOSE, 14) > 70 OR CLOSE < SMA(CLOSE, 20)"
+
+
+def _full(df, strategy=STRATEGY):
+    return run_backtest(df, STRATEGY_CACHE.compile_dsl(strategy).calculate_signals(df))
+
+
+def _assert_same(result, full):
+    np.testing.assert_array_equal(result["equity_curve"], full["equity_curve"])
+    np.testing.assert_array_equal(result["position"], full["position"])
+    assert result["trade_log"] == full["trade_log"]
+    for name, value in full["metrics"].items():
+        assert result["metrics"][name] == pytest.approx(value, rel=1e-12, abs=1e-15), name
+
+
+@pytest.mark.parametrize("nan_close", [False, True])
+def test_appended_bars_match_full_run(make_ohlcv, tmp_path, nan_close):
+    df = make_ohlcv(1500, seed=2)
+    if nan_close:
+        df.iloc[100:106, df.columns.get_loc("CLOSE")] = np.nan
+    info = {}
+    for stop in (600, 601, 900, 1500, 1500):
+        result = run_incremental(STRATEGY, df.iloc[:stop], str(tmp_path), info)
+        _assert_same(result, _full(df.iloc[:stop]))
+        assert info["bars"] == stop
+    # The last two calls resumed: 600 new bars, then none
+    assert info == {"bars": 1500, "new_bars": 0, "recomputed": False}
+
+
+@pytest.mark.parametrize("edit", ["close_early", "close_last", "timestamp"])
+def test_edited_prefix_forces_recompute(make_ohlcv, tmp_path, edit):
+    df = make_ohlcv(1000, seed=3)
+    run_incremental(STRATEGY, df.iloc[:800], str(tmp_path))
+
+    revised = df.copy()
+    if edit == "close_early":
+        # Far before the indicators' warmup window: e.g. a split adjustment
+        revised.iloc[5, revised.columns.get_loc("CLOSE")] *= 0.5
+    elif edit == "close_last":
+        revised.iloc[799, revised.columns.get_loc("CLOSE")] += 0.01
+    else:
+        stamps = revised.index.to_numpy().copy()
+        stamps[300] += np.timedelta64(1, "h")
+        revised.index = pd.DatetimeIndex(stamps)
+    info = {}
+    result = run_incremental(STRATEGY, revised, str(tmp_path), info)
+    assert info == {"bars": 1000, "new_bars": 1000, "recomputed": True}
+    _assert_same(result, _full(revised))
+
+
+def test_shorter_history_recomputes(make_ohlcv, tmp_path):
+    df = make_ohlcv(1000, seed=4)
+    run_incremental(STRATEGY, df, str(tmp_path))
+    info = {}
+    result = run_incremental(STRATEGY, df.iloc[:700], str(tmp_path), info)
+    assert info["recomputed"] and info["bars"] == 700
+    _assert_same(result, _full(df.iloc[:700]))
+
+
+def test_interrupted_run_is_truncated(make_ohlcv, tmp_path, monkeypatch):
+    df = make_ohlcv(1000, seed=5)
+    run_incremental(STRATEGY, df.iloc[:500], str(tmp_path))
+
+    # The per-bar files are appended, then the run dies before its state is saved
+    def crash(self, state):
+        raise OSError("interrupted")
+    with monkeypatch.context() as patch:
+        patch.setattr(IncrementalBacktest, "_save_state", crash)
+        with pytest.raises(OSError):
+            run_incremental(STRATEGY, df.iloc[:800], str(tmp_path))
+    assert os.path.getsize(tmp_path / EQUITY_FILE) == 800 * 8
+
+    info = {}
+    result = run_incremental(STRATEGY, df, str(tmp_path), info)
+    assert info == {"bars": 1000, "new_bars": 500, "recomputed": False}
+    assert os.path.getsize(tmp_path / EQUITY_FILE) == 1000 * 8
+    assert os.path.getsize(tmp_path / POSITION_FILE) == 1000
+    _assert_same(result, _full(df))
+
+
+def test_state_of_another_strategy_is_rejected(make_ohlcv, tmp_path):
+    df = make_ohlcv(300)
+    run_incremental(STRATEGY, df, str(tmp_path))
+    with pytest.raises(ValueError):
+        run_incremental("ENTRY: CLOSE > SMA(CLOSE, 5) EXIT: CLOSE < SMA(CLOSE, 5)", df, str(tmp_path))
+    # reset() clears it for reuse
+    other = IncrementalBacktest("ENTRY: CLOSE > SMA(CLOSE, 5) EXIT: CLOSE < SMA(CLOSE, 5)", str(tmp_path))
+    other.reset()
+    _assert_same(other.run(df), _full(df, "ENTRY: CLOSE > SMA(CLOSE, 5) EXIT: CLOSE < SMA(CLOSE, 5)"))
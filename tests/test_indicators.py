@@ -0,0 +1,78 @@
+# tests/test_indicators.py
+import numpy as np
+import pytest
+
+from engine.indicators import INDICATORS, compute_indicator, indicator_inputs, live_indicator, stream_indicator
+
+PARAMS = {
+    "SMA": (20,), "EMA": (10,), "RSI": (14,), "STDEV": (20,), "ATR": (14,),
+    "BBU": (20, 2), "BBL": (20, 2.5), "MACD": (12, 26, 9), "MACDS": (12, 26, 9), "MACDH": (5, 13, 4),
+}
+
+
+def _columns(bars, seed, level=100.0, gaps=False, infinite=False):
+    rng = np.random.default_rng(seed)
+    close = level + np.cumsum(rng.normal(0, 1, bars))
+    high = close + rng.uniform(0.1, 1.0, bars)
+    low = close - rng.uniform(0.1, 1.0, bars)
+    if gaps:
+        for column in (close, high, low):
+            column[rng.choice(bars, size=bars // 50, replace=False)] = np.nan
+    if infinite:
+        close[bars // 3] = np.inf
+    return {"CLOSE": close, "HIGH": high, "LOW": low}
+
+
+def _live(name, columns, params):
+    indicator = live_indicator(name, params)
+    inputs = [columns[column] for column in indicator_inputs(name, "CLOSE")]
+    return np.array([indicator.update(*bar) for bar in zip(*inputs)])
+
+
+def _batch(name, columns, params):
+    return compute_indicator(name, [columns[column] for column in indicator_inputs(name, "CLOSE")], params)
+
+
+def test_every_registered_indicator_is_covered():
+    assert set(PARAMS) <= set(INDICATORS)
+
+
+@pytest.mark.parametrize("name", sorted(PARAMS))
+@pytest.mark.parametrize("gaps", [False, True])
+def test_live_matches_batch_bar_by_bar(name, gaps):
+    columns = _columns(3000, seed=1, gaps=gaps)
+    batch = _batch(name, columns, PARAMS[name])
+    live = _live(name, columns, PARAMS[name])
+    np.testing.assert_array_equal(np.isnan(live), np.isnan(batch))
+    np.testing.assert_allclose(live, batch, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize("name", ["SMA", "STDEV", "BBU"])
+def test_live_windows_do_not_drift(name):
+    # A long history far from zero: running sums would drift without compensation
+    columns = _columns(200_000, seed=2, level=1e6)
+    batch = _batch(name, columns, PARAMS[name])
+    live = _live(name, columns, PARAMS[name])
+    np.testing.assert_allclose(live[-1000:], batch[-1000:], rtol=1e-12, atol=1e-8)
+
+
+@pytest.mark.filterwarnings("ignore:invalid value:RuntimeWarning")
+@pytest.mark.parametrize("name", ["SMA", "STDEV", "BBL"])
+def test_live_windows_recover_from_infinities(name):
+    columns = _columns(500, seed=3, infinite=True)
+    batch = _batch(name, columns, PARAMS[name])
+    live = _live(name, columns, PARAMS[name])
+    # The infinity is in the window for exactly `period` bars, and then forgotten
+    np.testing.assert_array_equal(np.isfinite(live), np.isfinite(batch))
+    np.testing.assert_allclose(live, batch, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize("name", sorted(PARAMS))
+def test_stream_matches_batch_across_chunks(name):
+    columns = _columns(1000, seed=4, gaps=True)
+    inputs = [columns[column] for column in indicator_inputs(name, "CLOSE")]
+    state, parts = None, []
+    for start, end in [(0, 1), (1, 1), (1, 17), (17, 500), (500, 1000)]:
+        values, state = stream_indicator(name, [column[start:end] for column in inputs], PARAMS[name], state)
+        parts.append(values)
+    np.testing.assert_array_equal(np.concatenate(parts), _batch(name, columns, PARAMS[name]))
@@ -0,0 +1,204 @@
+# tests/test_live_service.py
+import asyncio
+
+import numpy as np
+import pytest
+
+from engine import live_service
+from engine.live_service import Bar, LiveService, _frame_bars, replay_frame, run_live, serve_bars, socket_source
+from engine.streaming import StreamingBacktest
+
+STRATEGIES = {
+    "cross": "ENTRY: SMA(CLOSE, 10) > SMA(CLOSE, 30)\nEXIT: SMA(CLOSE, 10) < SMA(CLOSE, 30)",
+    "rsi": "ENTRY: RSI(CLOSE, 14) < 40 AND CLOSE > SMA(CLOSE, 30)\nEXIT: RSI(CLOSE, 14) > 60",
+    "bands": "ENTRY: CLOSE < BBL(CLOSE, 20, 2)\nEXIT: CLOSE > SMA(CLOSE, 10) OR ATR(CLOSE, 14) > 1.6",
+}
+
+
+async def _iterate(bars):
+    for bar in bars:
+        yield bar
+        await asyncio.sleep(0)
+
+
+def _expected_positions(df, strategy):
+    return StreamingBacktest(strategy).update(df)['position']
+
+
+def test_signals_match_the_batch_backtest(make_ohlcv):
+    df = make_ohlcv(300, seed=1)
+    signals = asyncio.run(run_live(STRATEGIES, replay_frame(df)))
+    for name, strategy in STRATEGIES.items():
+        assert [signal.timestamp for signal in signals[name]] == list(df.index)
+        positions = np.array([signal.position for signal in signals[name]])
+        np.testing.assert_array_equal(positions, _expected_positions(df, strategy))
+
+
+def test_duplicate_and_stale_bars_are_skipped(make_ohlcv):
+    df = make_ohlcv(200, seed=2)
+    bars = list(_frame_bars(df))
+    # Every bar re-sent, plus a late copy of an older bar now and then
+    noisy = [bar for position, bar in enumerate(bars) for bar in
+             ([bar, bar, bars[position - 5]] if position % 10 == 9 else [bar, bar])]
+
+    async def main():
+        service = LiveService(_iterate(noisy))
+        subscriptions = {name: service.subscribe(name, strategy, overflow="block")
+                         for name, strategy in STRATEGIES.items()}
+        consumers = {name: asyncio.ensure_future(_collect(subscription))
+                     for name, subscription in subscriptions.items()}
+        await service.run()
+        return service, {name: await consumer for name, consumer in consumers.items()}
+
+    service, signals = asyncio.run(main())
+    assert service.bars == len(bars)
+    assert service.skipped == len(noisy) - len(bars)
+    clean = asyncio.run(run_live(STRATEGIES, _iterate(bars)))
+    for name in STRATEGIES:
+        assert signals[name] == [signal._replace(received=signals[name][i].received)
+                                 for i, signal in enumerate(clean[name])]
+
+
+async def _collect(subscription):
+    return [signal async for signal in subscription]
+
+
+def test_indicators_are_shared_and_updated_once_per_bar(make_ohlcv, monkeypatch):
+    df = make_ohlcv(120, seed=3)
+    updates = {}
+    original = live_service.live_indicator
+
+    class Counting:
+        def __init__(self, name, params):
+            self.state = original(name, params)
+            self.key = (name, tuple(params))
+            updates[self.key] = 0
+
+        def update(self, *values):
+            updates[self.key] += 1
+            return self.state.update(*values)
+
+    monkeypatch.setattr(live_service, "live_indicator", Counting)
+
+    async def main():
+        service = LiveService(replay_frame(df))
+        service.subscribe("cross", STRATEGIES["cross"], overflow="drop_oldest")
+        service.subscribe("rsi", STRATEGIES["rsi"], overflow="drop_oldest")
+        # SMA 10, SMA 30 and RSI 14: the SMA 30 of both strategies is one node
+        assert len(service.graph) == 3
+        assert service.graph.refs("ind_sma_close_30") == 2
+        await service.run()
+        return service
+
+    service = asyncio.run(main())
+    assert service.bars == len(df)
+    assert updates == {("SMA", (10,)): len(df), ("SMA", (30,)): len(df), ("RSI", (14,)): len(df)}
+    # run() unsubscribed everything, which released every node
+    assert len(service.graph) == 0
+
+
+def test_unsubscribe_keeps_shared_indicators(make_ohlcv):
+    df = make_ohlcv(100, seed=4)
+
+    async def main():
+        service = LiveService(replay_frame(df))
+        cross = service.subscribe("cross", STRATEGIES["cross"])
+        rsi = service.subscribe("rsi", STRATEGIES["rsi"])
+        run = asyncio.ensure_future(service.run())
+        received = []
+        async for signal in cross:
+            received.append(signal)
+            if len(received) == 50:
+                service.unsubscribe("cross")
+        assert "ind_sma_close_10" not in service.graph
+        assert service.graph.refs("ind_sma_close_30") == 1
+        rsi_signals = [signal async for signal in rsi]
+        await run
+        return received, rsi_signals
+
+    received, rsi_signals = asyncio.run(main())
+    assert 50 <= len(received) < len(df)
+    # The remaining strategy is unaffected by the removal
+    positions = np.array([signal.position for signal in rsi_signals])
+    np.testing.assert_array_equal(positions, _expected_positions(df, STRATEGIES["rsi"])[-len(positions):])
+    assert len(rsi_signals) == len(df)
+
+
+def test_blocking_consumer_stalls_the_source(make_ohlcv):
+    df = make_ohlcv(200, seed=5)
+    produced = []
+
+    async def source():
+        for bar in _frame_bars(df):
+            produced.append(bar.timestamp)
+            yield bar
+
+    async def main():
+        service = LiveService(source(), ingest_queue_size=4)
+        subscription = service.subscribe("cross", STRATEGIES["cross"], queue_size=3, overflow="block")
+        run = asyncio.ensure_future(service.run())
+        for _ in range(20):
+            await asyncio.sleep(0)
+        # Three signals queued, one put waiting, four bars in the ingest queue, one read waiting
+        stalled = len(produced)
+        signals = [signal async for signal in subscription]
+        await run
+        return stalled, signals, subscription
+
+    stalled, signals, subscription = asyncio.run(main())
+    assert stalled <= 3 + 1 + 4 + 1
+    assert len(signals) == len(df)
+    assert subscription.dropped == 0
+
+
+@pytest.mark.parametrize("overflow", ["drop_oldest", "drop_newest"])
+def test_slow_consumers_drop_signals(make_ohlcv, overflow):
+    df = make_ohlcv(100, seed=6)
+
+    async def main():
+        service = LiveService(replay_frame(df))
+        subscription = service.subscribe("cross", STRATEGIES["cross"], queue_size=5, overflow=overflow)
+        # Nobody consumes until the feed has ended
+        await service.run()
+        return [signal async for signal in subscription], subscription
+
+    signals, subscription = asyncio.run(main())
+    # The end-of-feed marker displaced the oldest queued signal
+    assert len(signals) == 4
+    assert subscription.delivered == (len(df) if overflow == "drop_oldest" else 5)
+    timestamps = [signal.timestamp for signal in signals]
+    expected = list(df.index[-4:]) if overflow == "drop_oldest" else list(df.index[1:5])
+    assert timestamps == expected
+
+
+def test_socket_source_round_trip(make_ohlcv):
+    df = make_ohlcv(60, seed=7)
+    bars = list(_frame_bars(df))
+
+    async def main():
+        server = await serve_bars(bars)
+        host, port = server.sockets[0].getsockname()[:2]
+        async with server:
+            return [bar async for bar in socket_source(host, port)]
+
+    received = asyncio.run(main())
+    assert [bar.timestamp for bar in received] == list(df.index)
+    np.testing.assert_array_equal(np.array([bar[1:] for bar in received]), np.array([bar[1:] for bar in bars]))
+
+
+def test_invalid_subscriptions():
+    async def main():
+        service = LiveService(_iterate([]))
+        service.subscribe("cross", STRATEGIES["cross"])
+        with pytest.raises(ValueError):
+            service.subscribe("cross", STRATEGIES["rsi"])
+        with pytest.raises(ValueError):
+            service.subscribe("weekly", "ENTRY: CLOSE > SMA@W(CLOSE, 4)\nEXIT: CLOSE < SMA@W(CLOSE, 4)")
+        with pytest.raises(ValueError):
+            service.subscribe("other", STRATEGIES["rsi"], overflow="ignore")
+        with pytest.raises(ValueError):
+            service.unsubscribe("missing")
+        await service.run()
+        assert service.subscriptions == {}
+
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+# tests/test_market_store.py
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine import market_store
+from engine.market_store import MarketStore, read_meta, write_symbol
+
+
+@pytest.fixture
+def minutes(make_ohlcv):
+    df = make_ohlcv(500, seed=3, freq="min", start="2024-03-08 14:00")
+    # The store keeps nanosecond timestamps
+    df.index = df.index.tz_localize("America/New_York").as_unit("ns")
+    return df
+
+
+def _npy_files(root, symbol):
+    return sorted(name for name in os.listdir(os.path.join(root, symbol)) if name.endswith(".npy"))
+
+
+def test_round_trip(tmp_path, minutes):
+    write_symbol(str(tmp_path), "SPY", minutes)
+    loaded = MarketStore(str(tmp_path)).load("SPY")
+    pd.testing.assert_frame_equal(loaded, minutes, check_freq=False)
+    assert MarketStore(str(tmp_path)).symbols() == ["SPY"]
+
+
+@pytest.mark.parametrize("start, end", [
+    (None, None),
+    ("2024-03-08 15:00", "2024-03-08 16:30"),
+    ("2024-03-08 15:00:30", None),          # between two bars
+    (None, "2024-03-08 14:00"),             # empty: end is exclusive
+    ("2024-03-09 03:00", "2024-03-10 00:00"),
+    (pd.Timestamp("2024-03-08 20:00", tz="UTC"), None),
+])
+def test_range_slicing(tmp_path, minutes, start, end):
+    write_symbol(str(tmp_path), "SPY", minutes)
+    store = MarketStore(str(tmp_path))
+    mask = np.ones(len(minutes), dtype=bool)
+    tz = minutes.index.tz
+    if start is not None:
+        stamp = pd.Timestamp(start)
+        mask &= minutes.index >= (stamp if stamp.tzinfo else stamp.tz_localize(tz))
+    if end is not None:
+        mask &= minutes.index < pd.Timestamp(end).tz_localize(tz)
+    expected = minutes[mask]
+
+    pd.testing.assert_frame_equal(store.load("SPY", start, end), expected, check_freq=False)
+    arrays = store.arrays("SPY", start, end, fields=["CLOSE"])
+    np.testing.assert_array_equal(arrays["CLOSE"], expected["CLOSE"].to_numpy())
+    chunks = list(store.iter_chunks("SPY", 37, start, end))
+    assert all(len(chunk) <= 37 for chunk in chunks)
+    if chunks:
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected, check_freq=False)
+    else:
+        assert expected.empty
+
+
+def test_versioned_rewrite_is_seen_by_an_open_store(tmp_path, minutes):
+    root = str(tmp_path)
+    write_symbol(root, "SPY", minutes)
+    store = MarketStore(root)
+    before = store.load("SPY")
+    before_close = before["CLOSE"].to_numpy().copy()
+
+    shorter = minutes.iloc[100:300] * 2.0
+    write_symbol(root, "SPY", shorter)
+    assert read_meta(root, "SPY")["version"] == 2
+    assert _npy_files(root, "SPY") == [f"{column}.2.npy" for column in
+                                       ["CLOSE", "HIGH", "LOW", "OPEN", "VOLUME", "timestamps"]]
+
+    pd.testing.assert_frame_equal(store.load("SPY"), shorter, check_freq=False)
+    assert store.locate("SPY") == (0, 200)
+    # Frames loaded before the rewrite still read the old, unlinked files
+    np.testing.assert_array_equal(before["CLOSE"].to_numpy(), before_close)
+
+    # Unchanged symbols reuse the maps
+    assert store.open("SPY") is store.open("SPY")
+
+
+def test_crash_before_commit_keeps_the_previous_version(tmp_path, minutes, monkeypatch):
+    root = str(tmp_path)
+    write_symbol(root, "SPY", minutes)
+    replace = os.replace
+
+    def crash_on_meta(source, target):
+        if os.path.basename(target) == market_store.META_FILE:
+            raise OSError("power loss")
+        replace(source, target)
+
+    monkeypatch.setattr(market_store.os, "replace", crash_on_meta)
+    with pytest.raises(OSError):
+        write_symbol(root, "SPY", minutes.iloc[:10] + 1.0)
+    monkeypatch.undo()
+
+    # The new column files exist but are not referenced
+    assert "CLOSE.2.npy" in _npy_files(root, "SPY")
+    assert read_meta(root, "SPY")["version"] == 1
+    pd.testing.assert_frame_equal(MarketStore(root).load("SPY"), minutes, check_freq=False)
+
+    # The next write overwrites them and removes every older file
+    write_symbol(root, "SPY", minutes.iloc[:20])
+    assert all(name.endswith(".2.npy") for name in _npy_files(root, "SPY"))
+    pd.testing.assert_frame_equal(MarketStore(root).load("SPY"), minutes.iloc[:20], check_freq=False)
+
+
+def test_unversioned_symbols_are_read_and_replaced(tmp_path, make_ohlcv):
+    # Layout of symbols written before column files carried a version
+    root = str(tmp_path)
+    df = make_ohlcv(30, seed=4)
+    df.index = df.index.as_unit("ns")
+    directory = os.path.join(root, "OLD")
+    os.makedirs(directory)
+    np.save(os.path.join(directory, "timestamps.npy"), df.index.as_unit("ns").asi8)
+    for field in df.columns:
+        np.save(os.path.join(directory, f"{field}.npy"), df[field].to_numpy())
+    with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"fields": list(df.columns), "rows": len(df), "tz": None, "index_name": None}, f)
+
+    store = MarketStore(root)
+    pd.testing.assert_frame_equal(store.load("OLD"), df, check_freq=False)
+    write_symbol(root, "OLD", df.iloc[:5])
+    assert all(name.endswith(".1.npy") for name in _npy_files(root, "OLD"))
+    pd.testing.assert_frame_equal(store.load("OLD"), df.iloc[:5], check_freq=False)
+
+
+def test_invalid_input(tmp_path, make_ohlcv):
+    df = make_ohlcv(10)
+    with pytest.raises(ValueError):
+        write_symbol(str(tmp_path), "X", df.iloc[::-1])
+    with pytest.raises(ValueError):
+        write_symbol(str(tmp_path), "X", df.reset_index(drop=True))
+    with pytest.raises(ValueError):
+        MarketStore(str(tmp_path)).load("X")
+    write_symbol(str(tmp_path), "X", df)
+    with pytest.raises(ValueError):
+        MarketStore(str(tmp_path)).load("X", start=pd.Timestamp("2020-01-02", tz="UTC"))
@@ -0,0 +1,93 @@
+# tests/test_optimizer.py
+import numpy as np
+import pytest
+
+from engine.batch import frame_columns
+from engine.dsl_parser import parse_dsl_to_ast
+from engine.evaluator import compute_indicator_set, evaluate_signals
+from engine.optimizer import optimize_ast, temp_name
+
+SMA = {"type": "temp", "name": "ind_sma_close_20"}
+CLOSE = {"type": "series", "data": "CLOSE"}
+ABOVE = {"type": "comparison", "op": ">", "left": SMA, "right": CLOSE}
+BELOW = {"type": "comparison", "op": "<", "left": SMA, "right": CLOSE}
+TRUE = {"type": "constant", "data": True}
+FALSE = {"type": "constant", "data": False}
+
+
+def _optimize(entry, exit="CLOSE < 0"):
+    return optimize_ast(parse_dsl_to_ast(f"ENTRY: {entry}\nEXIT: {exit}"))
+
+
+def test_indicators_are_hoisted_once():
+    optimized = _optimize("SMA(CLOSE, 20) > CLOSE AND RSI(CLOSE, 14) < 30", "SMA(CLOSE, 20) < CLOSE")
+    assert list(optimized["indicators"]) == ["ind_sma_close_20", "ind_rsi_close_14"]
+    assert optimized["indicators"]["ind_sma_close_20"] == {"type": "indicator", "name": "SMA", "params": ["CLOSE", 20]}
+    assert optimized["exit"] == BELOW
+    # Same name, field and parameters are one temporary; any difference is another
+    assert len(_optimize("SMA(CLOSE, 20) > SMA(OPEN, 20) AND SMA(CLOSE, 21) > SMA(CLOSE, 20)")["indicators"]) == 3
+
+
+def test_temp_names():
+    assert temp_name({"name": "SMA", "params": ["CLOSE", 20]}) == "ind_sma_close_20"
+    assert temp_name({"name": "BBU", "params": ["CLOSE", 20, 2.5]}) == "ind_bbu_close_20_2p5"
+    assert temp_name({"name": "SMA", "params": ["CLOSE", 4], "timeframe": "W-SUN"}) == "ind_sma_at_wmsun_close_4"
+
+
+@pytest.mark.parametrize("entry, expected", [
+    ("1 > 0", TRUE),
+    ("2 <= 1", FALSE),
+    ("3 == 3", TRUE),
+    ("3 != 3", FALSE),
+    ("1 GTE 2", FALSE),
+])
+def test_constant_folding(entry, expected):
+    optimized = _optimize(entry)
+    assert optimized["entry"] == expected
+    assert optimized["indicators"] == {}
+
+
+@pytest.mark.parametrize("entry, expected", [
+    ("1 > 0 AND SMA(CLOSE, 20) > CLOSE", ABOVE),
+    ("SMA(CLOSE, 20) > CLOSE AND 1 > 0", ABOVE),
+    ("0 > 1 OR SMA(CLOSE, 20) > CLOSE", ABOVE),
+    ("SMA(CLOSE, 20) > CLOSE OR 0 > 1", ABOVE),
+    ("0 > 1 AND SMA(CLOSE, 20) > CLOSE", FALSE),
+    ("1 > 0 OR SMA(CLOSE, 20) > CLOSE", TRUE),
+    ("(1 > 0 AND SMA(CLOSE, 20) > CLOSE) OR (2 < 1 AND RSI(CLOSE, 14) < 30)", ABOVE),
+])
+def test_dead_branch_pruning(entry, expected):
+    optimized = _optimize(entry)
+    assert optimized["entry"] == expected
+    # Indicators only used by pruned branches are not computed
+    assert list(optimized["indicators"]) == (["ind_sma_close_20"] if expected is ABOVE else [])
+
+
+def test_operand_order_is_kept():
+    optimized = _optimize("SMA(CLOSE, 20) > CLOSE AND CLOSE > 100 AND VOLUME > 5000")
+    first = optimized["entry"]["left"]["left"]
+    assert first == ABOVE
+
+
+def test_optimized_rules_give_the_same_signals(make_ohlcv):
+    df = make_ohlcv(300, seed=1)
+    columns = frame_columns(df)
+    text = ("ENTRY: (1 > 0 AND SMA(CLOSE, 20) > CLOSE AND RSI(CLOSE, 14) < 60) OR (0 > 1 AND CLOSE > 0)\n"
+            "EXIT: SMA(CLOSE, 20) < CLOSE OR RSI(CLOSE, 14) > 70")
+    optimized = optimize_ast(parse_dsl_to_ast(text))
+    indicators = compute_indicator_set(optimized["indicators"], columns)
+    entry, exit = evaluate_signals(optimized, columns, indicators, len(df))
+
+    close = columns["CLOSE"]
+    sma = indicators["ind_sma_close_20"]
+    rsi = indicators["ind_rsi_close_14"]
+    np.testing.assert_array_equal(entry, (sma > close) & (rsi < 60))
+    np.testing.assert_array_equal(exit, (sma < close) | (rsi > 70))
+    assert entry.any() and exit.any()
+
+
+def test_missing_rules_become_false():
+    optimized = optimize_ast({"entry": parse_dsl_to_ast("ENTRY: CLOSE > 1\nEXIT: CLOSE < 1")["entry"]})
+    assert optimized["exit"] == FALSE
+    with pytest.raises(ValueError):
+        optimize_ast({"entry": ["CLOSE"]})
@@ -0,0 +1,34 @@
+# tests/test_portfolio.py
+import numpy as np
+import pandas as pd
+
+from engine.portfolio import run_portfolio
+
+STRATEGY = "ENTRY: CLOSE > 1 EXIT: CLOSE > 100"
+
+
+def _frame(close, index):
+    df = pd.DataFrame({field: np.asarray(close, dtype=float) for field in ("OPEN", "HIGH", "LOW", "CLOSE")},
+                      index=index)
+    df["VOLUME"] = 1.0
+    return df
+
+
+def test_staggered_calendars_keep_held_positions():
+    dates = pd.date_range("2021-01-01", periods=10, freq="D")
+    # A misses a date it is held through; B lists late and delists early
+    a = _frame(np.arange(1, 11), dates).drop(dates[3])
+    b = _frame(np.arange(10, 0, -1)[2:8], dates[2:8])
+
+    result = run_portfolio(STRATEGY, {"A": a, "B": b}, allocation="max_positions", max_positions=1, processes=1)
+    position = result["position"]
+    assert position["A"].iloc[1:].all()
+    assert not position["B"].any()
+    # The return across A's missing date is kept (close 3 -> 5)
+    np.testing.assert_allclose(result["equity_curve"].iloc[2:5], [1.5, 1.5, 2.5])
+
+    result = run_portfolio(STRATEGY, {"B": b, "A": a}, allocation="equal", processes=1)
+    position = result["position"]
+    assert position["A"].iloc[1:].all()
+    assert position["B"].iloc[2:8].all()
+    assert not position["B"].iloc[:2].any() and not position["B"].iloc[8:].any()
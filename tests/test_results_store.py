@@ -0,0 +1,157 @@
+# tests/test_results_store.py
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.results_store import ResultsStore
+
+
+def _table(rows, seed):
+    rng = np.random.default_rng(seed)
+    sharpe = rng.normal(size=rows).round(1)  # rounded, so there are ties
+    sharpe[rng.random(rows) < 0.1] = np.nan
+    return {
+        "sharpe": sharpe,
+        "trades": rng.integers(0, 20, size=rows),
+        "bars": rng.integers(0, 5, size=rows).astype(np.uint64),
+        "profitable": rng.random(rows) < 0.5,
+    }
+
+
+def _fill(root, sizes, seed=0, index=("sharpe", "trades", "bars", "profitable")):
+    # A store with an index built up front, then one chunk per size; returns the store and the reference frame
+    store = ResultsStore(str(root))
+    frames = []
+    for chunk, rows in enumerate(sizes):
+        columns = _table(rows, seed + chunk)
+        keys = [f"k{chunk}-{row}" for row in range(rows)]
+        store.append(keys, columns, strategies=[f"CLOSE > {row}" for row in range(rows)])
+        frames.append(pd.DataFrame({"key": keys, **columns}))
+        if chunk == 0:
+            for name in index:
+                store.create_index(name)
+    return store, pd.concat(frames, ignore_index=True)
+
+
+def _expected_top(reference, metric, k, ascending, rows=None):
+    table = reference if rows is None else reference.loc[rows]
+    table = table[table[metric].notna()]
+    # Best first, ties by row id
+    ranked = table.assign(row=table.index).sort_values([metric, "row"], ascending=[ascending, True], kind="stable")
+    return ranked.index.to_numpy()[:k]
+
+
+@pytest.mark.parametrize("metric", ["sharpe", "trades", "bars", "profitable"])
+@pytest.mark.parametrize("ascending", [False, True])
+@pytest.mark.parametrize("k", [0, 1, 7, 500])
+def test_top_matches_a_full_sort(tmp_path, metric, ascending, k):
+    store, reference = _fill(tmp_path, [40, 13, 13, 5, 60, 1, 9])
+    top = store.top(metric, k, ascending=ascending)
+    np.testing.assert_array_equal(top.index.to_numpy(), _expected_top(reference, metric, k, ascending))
+    assert top[metric].dtype == reference[metric].dtype
+
+
+@pytest.mark.parametrize("metric", ["sharpe", "bars", "profitable"])
+@pytest.mark.parametrize("ascending", [False, True])
+def test_top_with_filters(tmp_path, metric, ascending):
+    store, reference = _fill(tmp_path, [30, 30, 30])
+    rows = reference.index[reference["trades"].between(5, 12)]
+    top = store.top(metric, 10, ascending=ascending, where={"trades": (5, 12)})
+    np.testing.assert_array_equal(top.index.to_numpy(), _expected_top(reference, metric, 10, ascending, rows))
+
+
+def test_unsigned_metric_is_ranked_without_wrapping(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.append(["a", "b", "c"], {"bars": np.array([0, 2**63 + 5, 3], dtype=np.uint64)})
+    assert store.top("bars", 3).index.tolist() == [1, 2, 0]
+    assert store.top("bars", 3, where={"bars": (None, None)}).index.tolist() == [1, 2, 0]
+
+
+@pytest.mark.parametrize("where", [
+    {"sharpe": (-0.5, 0.5)},
+    {"sharpe": (None, 0.0), "trades": (3, None)},
+    {"trades": 7},
+    {"profitable": True, "bars": (1, 3)},
+])
+def test_select_matches_a_scan(tmp_path, where):
+    store, reference = _fill(tmp_path, [25, 10, 10, 10, 3])
+    mask = np.ones(len(reference), dtype=bool)
+    for name, bound in where.items():
+        low, high = bound if isinstance(bound, tuple) else (bound, bound)
+        values = reference[name]
+        mask &= values.notna().to_numpy()
+        if low is not None:
+            mask &= (values >= low).to_numpy()
+        if high is not None:
+            mask &= (values <= high).to_numpy()
+    np.testing.assert_array_equal(store.select(where), np.flatnonzero(mask))
+
+    table = store.filter(where, columns=["sharpe"])
+    assert table["key"].tolist() == reference["key"][mask].tolist()
+
+
+def test_runs_are_merged_size_tiered(tmp_path):
+    store, reference = _fill(tmp_path, [1] * 64, index=("sharpe",))
+    runs = store.manifest["indexes"]["sharpe"]
+    # Every chunk is covered exactly once, by O(log n) runs
+    assert [run[0] for run in runs] == [0] + [run[1] + 1 for run in runs[:-1]]
+    assert runs[-1][1] == 63
+    assert len(runs) <= 7
+    for values, order in store._index("sharpe"):
+        assert len(np.unique(order)) == len(order)
+        np.testing.assert_array_equal(values, reference["sharpe"].to_numpy()[order])
+        valid = np.asarray(values)[~np.isnan(values)]
+        assert np.all(np.diff(valid) >= 0)
+
+    before = store.top("sharpe", 20)
+    store.compact()
+    assert store.manifest["indexes"]["sharpe"] == [[0, 63]]
+    pd.testing.assert_frame_equal(store.top("sharpe", 20), before)
+    # Merged runs are deleted, the single run is left
+    assert sorted(os.listdir(tmp_path / "indexes")) == ["sharpe.000000-000063.order.npy",
+                                                        "sharpe.000000-000063.values.npy"]
+
+
+def test_reopened_store_and_find(tmp_path):
+    store, reference = _fill(tmp_path, [10, 10])
+    reopened = ResultsStore(str(tmp_path))
+    assert len(reopened) == 20
+    pd.testing.assert_frame_equal(reopened.rows(np.arange(20)), store.rows(np.arange(20)))
+    found = reopened.find(["k1-3", "k0-9", "missing"])
+    assert sorted(found["key"]) == ["k0-9", "k1-3"]
+    assert found.loc[13, "strategy"] == "CLOSE > 3"
+    np.testing.assert_array_equal(reopened.column("trades"), reference["trades"].to_numpy())
+
+
+def test_crash_before_manifest_leaves_the_store_unchanged(tmp_path, monkeypatch):
+    store, _ = _fill(tmp_path, [10, 10])
+    with open(tmp_path / "manifest.json", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    def crash():
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "_write_manifest", crash)
+    with pytest.raises(OSError):
+        store.append([f"x{row}" for row in range(10)], _table(10, 5), strategies=["CLOSE > 1"] * 10)
+    monkeypatch.undo()
+
+    reopened = ResultsStore(str(tmp_path))
+    assert reopened.manifest == manifest
+    assert len(reopened) == 20 and reopened.top("sharpe", 100).index.max() < 20
+    reopened.append([f"y{row}" for row in range(4)], _table(4, 6), strategies=["CLOSE > 1"] * 4)
+    assert len(reopened.find("y3")) == 1 and len(reopened.find("x3")) == 0
+
+
+def test_schema_is_enforced(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.append(["a"], {"sharpe": [1.0]})
+    with pytest.raises(ValueError):
+        store.append(["b"], {"sortino": [1.0]})
+    with pytest.raises(ValueError):
+        store.append(["b"], {"sharpe": ["high"]})
+    with pytest.raises(ValueError):
+        store.top("sortino")
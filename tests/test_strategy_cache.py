@@ -0,0 +1,81 @@
+# tests/test_strategy_cache.py
+import os
+
+import pytest
+
+import engine.strategy_cache as strategy_cache
+from engine.dsl_parser import parse_dsl_to_ast
+from engine.strategy_cache import StrategyCache, ast_hash
+
+
+def _hash(text):
+    return ast_hash(parse_dsl_to_ast(text))
+
+
+@pytest.mark.parametrize("first, second", [
+    # Whitespace
+    ("ENTRY: CLOSE > SMA(CLOSE, 20) EXIT: CLOSE < 90",
+     "ENTRY:   CLOSE >SMA( CLOSE,20 )\n EXIT: CLOSE<90"),
+    # Commutative AND / OR operands, including longer chains
+    ("ENTRY: CLOSE > 100 AND VOLUME > 1000 EXIT: CLOSE < 90 OR RSI(CLOSE, 14) > 70",
+     "ENTRY: VOLUME > 1000 AND CLOSE > 100 EXIT: RSI(CLOSE, 14) > 70 OR CLOSE < 90"),
+    ("ENTRY: CLOSE > 1 AND VOLUME > 2 AND OPEN > 3 EXIT: CLOSE < 1",
+     "ENTRY: OPEN > 3 AND (CLOSE > 1 AND VOLUME > 2) EXIT: CLOSE < 1"),
+    # Commutative comparisons, mirrored comparisons and symbol/word operators
+    ("ENTRY: CLOSE == SMA(CLOSE, 5) EXIT: CLOSE != 3",
+     "ENTRY: SMA(CLOSE, 5) == CLOSE EXIT: 3 != CLOSE"),
+    ("ENTRY: CLOSE < SMA(CLOSE, 20) EXIT: CLOSE <= 90",
+     "ENTRY: SMA(CLOSE, 20) GT CLOSE EXIT: 90 GTE CLOSE"),
+    # Integer and float literals
+    ("ENTRY: CLOSE > 100 EXIT: CLOSE < 90", "ENTRY: CLOSE > 100.0 EXIT: CLOSE < 90.0"),
+])
+def test_equivalent_strategies_share_a_key(first, second):
+    assert _hash(first) == _hash(second)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("ENTRY: CLOSE > SMA(CLOSE, 20) EXIT: CLOSE < 90", "ENTRY: CLOSE > SMA(CLOSE, 21) EXIT: CLOSE < 90"),
+    ("ENTRY: CLOSE > SMA(CLOSE, 20) EXIT: CLOSE < 90", "ENTRY: CLOSE > EMA(CLOSE, 20) EXIT: CLOSE < 90"),
+    ("ENTRY: CLOSE > SMA(CLOSE, 20) EXIT: CLOSE < 90", "ENTRY: CLOSE > SMA(HIGH, 20) EXIT: CLOSE < 90"),
+    ("ENTRY: CLOSE > SMA(CLOSE, 20) EXIT: CLOSE < 90", "ENTRY: CLOSE > SMA@W(CLOSE, 20) EXIT: CLOSE < 90"),
+    ("ENTRY: CLOSE > 100 EXIT: CLOSE < 90", "ENTRY: CLOSE >= 100 EXIT: CLOSE < 90"),
+    # Entry and exit are not interchangeable
+    ("ENTRY: CLOSE > 100 EXIT: CLOSE < 90", "ENTRY: CLOSE < 90 EXIT: CLOSE > 100"),
+])
+def test_different_strategies_have_different_keys(first, second):
+    assert _hash(first) != _hash(second)
+
+
+def test_memory_tier_reuses_compiled_strategies():
+    cache = StrategyCache(max_entries=2)
+    first = cache.compile_dsl("ENTRY: CLOSE > 100 AND VOLUME > 1 EXIT: CLOSE < 90")
+    second = cache.compile_dsl("ENTRY: VOLUME > 1 AND CLOSE > 100 EXIT: CLOSE < 90")
+    assert second is first
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_disk_tier_is_keyed_by_codegen_version(tmp_path, monkeypatch):
+    text = "ENTRY: CLOSE > SMA(CLOSE, 20) EXIT: CLOSE < SMA(CLOSE, 50)"
+    first = StrategyCache(cache_dir=str(tmp_path)).compile_dsl(text)
+
+    reloaded = StrategyCache(cache_dir=str(tmp_path))
+    assert reloaded.compile_dsl(text).source == first.source
+    assert reloaded.disk_hits == 1
+
+    # A generator with another version must not load the old files
+    monkeypatch.setattr(strategy_cache, "CODEGEN_VERSION", strategy_cache.CODEGEN_VERSION + 1)
+    bumped = StrategyCache(cache_dir=str(tmp_path))
+    compiled = bumped.compile_dsl(text)
+    assert bumped.disk_hits == 0
+    assert compiled.key != first.key
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".py")]) == 2
+
+
+def test_disk_tier_ignores_foreign_bytecode(tmp_path):
+    text = "ENTRY: CLOSE > 100 EXIT: CLOSE < 90"
+    compiled = StrategyCache(cache_dir=str(tmp_path)).compile_dsl(text)
+    _, code_path = StrategyCache(cache_dir=str(tmp_path))._paths(compiled.key)
+    with open(code_path, "wb") as f:
+        f.write(b"\x00\x00\x00\x00garbage")
+    reloaded = StrategyCache(cache_dir=str(tmp_path)).compile_dsl(text)
+    assert reloaded.source == compiled.source
@@ -0,0 +1,61 @@
+# tests/test_streaming.py
+import numpy as np
+import pytest
+
+from engine.backtester import run_backtest
+from engine.streaming import StreamingBacktest, run_streaming_backtest
+from engine.strategy_cache import STRATEGY_CACHE
+
+STRATEGIES = [
+    "ENTRY: CLOSE > BBL(CLOSE, 20, 2) EXIT: CLOSE < SMA(CLOSE, 10)",
+    "ENTRY: STDEV(CLOSE, 10) > 1 EXIT: STDEV(CLOSE, 10) < 0.8",
+    "ENTRY: EMA(CLOSE, 10) > SMA(CLOSE, 30) AND RSI(CLOSE, 14) < 70 EXIT: EMA(CLOSE, 10) < SMA(CLOSE, 30)",
+]
+
+# Exact for everything derived from positions and equity; Sharpe/Sortino combine chunk moments
+EXACT_METRICS = ("total_return", "max_drawdown", "max_drawdown_duration", "exposure", "win_rate",
+                 "number_of_trades")
+
+
+def _chunks(df, size):
+    return (df.iloc[start:start + size] for start in range(0, len(df), size))
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+@pytest.mark.parametrize("nan_close", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 333, 1000])
+def test_streaming_matches_full_run(make_ohlcv, strategy, nan_close, chunk_size):
+    df = make_ohlcv(1000, seed=1)
+    if nan_close:
+        df.iloc[100:106, df.columns.get_loc("CLOSE")] = np.nan
+    full = run_backtest(df, STRATEGY_CACHE.compile_dsl(strategy).calculate_signals(df))
+
+    equity, position = [], []
+    result = run_streaming_backtest(strategy, _chunks(df, chunk_size),
+                                    on_chunk=lambda chunk, output: (equity.append(output["equity"]),
+                                                                    position.append(output["position"])))
+
+    np.testing.assert_array_equal(np.concatenate(position), full["position"])
+    np.testing.assert_array_equal(np.concatenate(equity), full["equity_curve"])
+    for name in EXACT_METRICS:
+        assert result["metrics"][name] == full["metrics"][name], name
+    for name in ("sharpe", "sortino"):
+        assert result["metrics"][name] == pytest.approx(full["metrics"][name], rel=1e-9, abs=1e-12)
+    assert np.isfinite(result["max_drawdown"])
+    np.testing.assert_allclose(result["trade_returns"], full["trade_returns"])
+
+
+def test_empty_chunks_are_ignored(make_ohlcv):
+    df = make_ohlcv(200)
+    backtest = StreamingBacktest(STRATEGIES[0])
+    for start in range(0, 200, 50):
+        backtest.update(df.iloc[start:start])
+        backtest.update(df.iloc[start:start + 50])
+    full = run_backtest(df, STRATEGY_CACHE.compile_dsl(STRATEGIES[0]).calculate_signals(df))
+    assert backtest.result()["total_return"] == full["total_return"]
+    assert backtest.bars == 200
+
+
+def test_timeframe_indicators_are_rejected():
+    with pytest.raises(ValueError):
+        StreamingBacktest("ENTRY: CLOSE > SMA@W(CLOSE, 4) EXIT: CLOSE < 1")
@@ -0,0 +1,110 @@
+# tests/test_sweep.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine import batch
+from engine.backtester import METRIC_NAMES
+from engine.results_store import ResultsStore
+from engine.streaming import run_streaming_backtest
+from engine.sweep import expand_grid, render_template, run_sweep
+
+TEMPLATE = ("ENTRY: SMA(CLOSE, $fast) > SMA(CLOSE, $slow) AND RSI(CLOSE, 14) < $level\n"
+            "EXIT: SMA(CLOSE, $fast) < SMA(CLOSE, $slow)")
+GRID = {"fast": [3, 5, 8], "slow": [15, 20, 30], "level": [60, 70.5]}
+
+
+def _assert_tables_close(left, right):
+    assert list(left.columns) == list(right.columns)
+    pd.testing.assert_frame_equal(left[list(GRID)], right[list(GRID)])
+    for name in METRIC_NAMES:
+        np.testing.assert_allclose(left[name].to_numpy(dtype=float), right[name].to_numpy(dtype=float),
+                                   rtol=1e-12, atol=0)
+
+
+def test_grid_expansion_and_rendering():
+    combinations = expand_grid({"fast": np.arange(3, 5), "level": [60, 70.5]})
+    assert combinations == [{"fast": 3, "level": 60}, {"fast": 3, "level": 70.5},
+                            {"fast": 4, "level": 60}, {"fast": 4, "level": 70.5}]
+    assert type(combinations[0]["fast"]) is int
+    assert render_template("CLOSE > SMA(CLOSE, $fast)", {"fast": np.int64(3)}) == "CLOSE > SMA(CLOSE, 3)"
+
+
+def test_rows_match_single_backtests(make_ohlcv):
+    df = make_ohlcv(400, seed=1)
+    table = run_sweep(TEMPLATE, GRID, df, processes=1)
+    assert len(table) == 18
+    assert table["sharpe"].is_monotonic_decreasing
+    for row in table.head(5).itertuples():
+        values = {name: getattr(row, name) for name in GRID}
+        metrics = run_streaming_backtest(render_template(TEMPLATE, values), [df])['metrics']
+        for name in ("total_return", "max_drawdown", "number_of_trades", "exposure", "win_rate"):
+            assert getattr(row, name) == metrics[name]
+        assert row.sharpe == pytest.approx(metrics["sharpe"])
+
+
+@pytest.mark.parametrize("processes, chunk_size", [(2, 4), (3, 256), (4, 1)])
+def test_process_pool_matches_serial(make_ohlcv, processes, chunk_size):
+    df = make_ohlcv(400, seed=2)
+    serial = run_sweep(TEMPLATE, GRID, df, processes=1)
+    parallel = run_sweep(TEMPLATE, GRID, df, processes=processes, chunk_size=chunk_size)
+    _assert_tables_close(parallel, serial)
+
+
+def test_checkpoint_resume(make_ohlcv, tmp_path, monkeypatch):
+    df = make_ohlcv(400, seed=3)
+    path = str(tmp_path / "sweep.jsonl")
+    expected = run_sweep(TEMPLATE, GRID, df, processes=1)
+
+    # Interrupted after the first chunk of 4 strategies
+    iterate = batch.iter_backtest_optimized
+
+    def interrupted(*args, **kwargs):
+        for number, chunk in enumerate(iterate(*args, **kwargs)):
+            if number == 1:
+                raise KeyboardInterrupt
+            yield chunk
+
+    monkeypatch.setattr(batch, "iter_backtest_optimized", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        run_sweep(TEMPLATE, GRID, df, processes=1, chunk_size=4, checkpoint=path)
+    monkeypatch.undo()
+
+    # The restart runs the 14 missing strategies only, in a process pool
+    counts = []
+
+    def counting(asts, *args, **kwargs):
+        counts.append(len(asts))
+        return iterate(asts, *args, **kwargs)
+
+    monkeypatch.setattr(batch, "iter_backtest_optimized", counting)
+    resumed = run_sweep(TEMPLATE, GRID, df, processes=2, chunk_size=4, checkpoint=path)
+    assert counts == [14]
+    _assert_tables_close(resumed, expected)
+
+    # A grown grid reuses every stored combination
+    grown = {**GRID, "slow": GRID["slow"] + [40]}
+    table = run_sweep(TEMPLATE, grown, df, processes=1, checkpoint=path)
+    assert counts == [14, 6]
+    _assert_tables_close(table[table["slow"] != 40].reset_index(drop=True), expected)
+
+
+def test_results_store(make_ohlcv, tmp_path):
+    df = make_ohlcv(300, seed=4)
+    store = ResultsStore(str(tmp_path / "results"))
+    table = run_sweep(TEMPLATE, GRID, df, processes=1, results_store=store)
+    assert len(store) == len(table)
+    best = store.top("sharpe", 1)
+    assert best["sharpe"].iloc[0] == table["sharpe"].iloc[0]
+    values = {name: table[name].iloc[0] for name in GRID}
+    assert best["strategy"].iloc[0] == render_template(TEMPLATE, values)
+
+
+def test_invalid_arguments(make_ohlcv):
+    df = make_ohlcv(100)
+    with pytest.raises(ValueError, match="Unknown metric"):
+        run_sweep(TEMPLATE, GRID, df, metric="profit", processes=1)
+    with pytest.raises(ValueError, match="missing"):
+        run_sweep(TEMPLATE, {"fast": [3], "slow": [20]}, df, processes=1)
+    with pytest.raises(ValueError, match="unknown"):
+        run_sweep(TEMPLATE, {**GRID, "period": [1]}, df, processes=1)
@@ -0,0 +1,77 @@
+# tests/test_timeframes.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.data_utils import calculate_indicator, data_fingerprint
+from engine.indicator_cache import IndicatorCache
+from engine.timeframes import ResampleCache, lookup_timeframe_indicator, parse_timeframe, resample_index
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("W", "W-SUN"), ("@1W", "W-SUN"), ("W-FRI", "W-FRI"), ("4H", "4h"), ("15MIN", "15min"), ("M", "ME"),
+])
+def test_parse_timeframe(text, expected):
+    assert parse_timeframe(text) == expected
+
+
+def test_parse_timeframe_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_timeframe("3 weeks")
+
+
+@pytest.mark.parametrize("freq, timeframe, name, params", [
+    ("D", "W-SUN", "SMA", (4,)),
+    ("D", "W-SUN", "RSI", (3,)),
+    ("h", "4h", "EMA", (5,)),
+])
+def test_no_lookahead(make_ohlcv, freq, timeframe, name, params):
+    # The value at bar t must not change when the bars after t are removed
+    df = make_ohlcv(400, seed=7, freq=freq)
+    full = calculate_indicator(df, name, "CLOSE", *params, timeframe=timeframe).to_numpy()
+    assert np.isfinite(full).sum() > 100
+    for t in range(0, len(df), 7):
+        truncated = calculate_indicator(df.iloc[:t + 1], name, "CLOSE", *params, timeframe=timeframe).to_numpy()
+        np.testing.assert_array_equal(truncated[-1], full[t])
+
+
+def test_values_come_from_the_last_completed_bin(make_ohlcv):
+    df = make_ohlcv(200, seed=8).drop(pd.Timestamp("2020-01-15"))  # a missing day inside a week
+    weekly_close = df["CLOSE"].resample("W-SUN").last().dropna()
+    weekly_sma = weekly_close.rolling(3).mean()
+    aligned = calculate_indicator(df, "SMA", "CLOSE", 3, timeframe="W-SUN").to_numpy()
+
+    # Bin of every bar, then the value of the bin before it (position = bin - 1)
+    bins = np.searchsorted(weekly_close.index, df.index, side="left")
+    expected = np.where(bins >= 1, weekly_sma.to_numpy()[np.maximum(bins - 1, 0)], np.nan)
+    np.testing.assert_allclose(aligned, expected, equal_nan=True)
+
+
+def test_bars_of_the_same_bin_share_the_previous_value():
+    index = pd.date_range("2021-01-04", periods=21, freq="D")  # Monday, three full weeks
+    bins = resample_index(index, "W-SUN")
+    np.testing.assert_array_equal(bins.starts, [0, 7, 14])
+    np.testing.assert_array_equal(bins.positions, [-1] * 7 + [0] * 7 + [1] * 7)
+
+
+def test_cache_keys_include_interior_timestamps(make_ohlcv):
+    daily = make_ohlcv(60, seed=9)
+    # Same values and endpoints, different interior calendar
+    bunched = daily.copy()
+    bunched.index = pd.DatetimeIndex(list(pd.date_range(daily.index[0], periods=59, freq="12h"))
+                                     + [daily.index[-1]])
+    assert data_fingerprint(daily) != data_fingerprint(bunched)
+
+    cache, resample_cache = IndicatorCache(), ResampleCache()
+    for df in (daily, bunched):
+        inputs = [df["CLOSE"].to_numpy()]
+        cached = lookup_timeframe_indicator(cache, data_fingerprint(df), "SMA", ["CLOSE"], inputs, (3,),
+                                            "W-SUN", df.index, resample_cache)
+        uncached = lookup_timeframe_indicator(None, None, "SMA", ["CLOSE"], inputs, (3,), "W-SUN", df.index, None)
+        np.testing.assert_array_equal(cached, uncached)
+    assert resample_cache.stats()["misses"] == 2
+
+
+def test_missing_index_is_rejected():
+    with pytest.raises(ValueError):
+        resample_index(None, "W-SUN")
@@ -0,0 +1,93 @@
+# tests/test_walk_forward.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine import walk_forward
+from engine.walk_forward import Fold, run_walk_forward, walk_forward_folds
+
+TEMPLATE = "ENTRY: SMA(CLOSE, $fast) > SMA(CLOSE, $slow)\nEXIT: SMA(CLOSE, $fast) < SMA(CLOSE, $slow)"
+GRID = {"fast": [3, 5, 8], "slow": [15, 20, 30]}
+
+
+def _assert_same_result(left, right):
+    pd.testing.assert_frame_equal(left['folds'], right['folds'])
+    pd.testing.assert_series_equal(left['equity_curve'], right['equity_curve'])
+    assert left['metrics'] == right['metrics']
+
+
+def test_folds():
+    assert walk_forward_folds(10, 4, 3) == [Fold(0, 4, 4, 7), Fold(3, 7, 7, 10)]
+    assert walk_forward_folds(11, 4, 3, anchored=True) == [Fold(0, 4, 4, 7), Fold(0, 7, 7, 10), Fold(0, 10, 10, 11)]
+    assert walk_forward_folds(4, 4, 3) == []
+    with pytest.raises(ValueError):
+        walk_forward_folds(10, 0, 3)
+
+
+def test_invalid_metric_is_rejected_before_compiling(make_ohlcv, monkeypatch):
+    def compile_grid(*args):
+        raise AssertionError("compiled the grid")
+
+    monkeypatch.setattr(walk_forward, "compile_grid", compile_grid)
+    with pytest.raises(ValueError, match="Unknown metric"):
+        run_walk_forward(TEMPLATE, GRID, make_ohlcv(100), 50, 10, metric="profit", processes=1)
+    with pytest.raises(ValueError, match="Not enough bars"):
+        run_walk_forward(TEMPLATE, GRID, make_ohlcv(40), 50, 10, processes=1)
+
+
+@pytest.mark.parametrize("anchored", [False, True])
+def test_processes_give_the_same_result(make_ohlcv, anchored):
+    df = make_ohlcv(400, seed=1)
+    serial = run_walk_forward(TEMPLATE, GRID, df, 120, 50, anchored=anchored, processes=1, chunk_size=4)
+    parallel = run_walk_forward(TEMPLATE, GRID, df, 120, 50, anchored=anchored, processes=3)
+    _assert_same_result(serial, parallel)
+
+    folds = serial['folds']
+    assert len(folds) == 6
+    assert list(serial['equity_curve'].index) == list(df.index[120:])
+    assert set(zip(folds['fast'], folds['slow'])) <= {(fast, slow) for fast in GRID["fast"] for slow in GRID["slow"]}
+
+
+def test_out_of_sample_curve_is_chained(make_ohlcv):
+    df = make_ohlcv(300, seed=2)
+    result = run_walk_forward(TEMPLATE, GRID, df, 100, 40, processes=1)
+    equity = result['equity_curve'].to_numpy()
+    # Each fold's total return compounds onto the previous fold's final equity
+    total = np.prod(1.0 + result['folds']['total_return'].to_numpy())
+    assert equity[-1] == pytest.approx(total)
+
+
+def test_checkpoint_resume(make_ohlcv, tmp_path, monkeypatch):
+    df = make_ohlcv(400, seed=3)
+    path = str(tmp_path / "walk_forward.jsonl")
+    expected = run_walk_forward(TEMPLATE, GRID, df, 120, 50, processes=1)
+
+    # Interrupted after two folds
+    run_folds = walk_forward._run_folds
+
+    def interrupted(*args):
+        for number, output in enumerate(run_folds(*args)):
+            if number == 2:
+                raise KeyboardInterrupt
+            yield output
+
+    monkeypatch.setattr(walk_forward, "_run_folds", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        run_walk_forward(TEMPLATE, GRID, df, 120, 50, processes=1, checkpoint=path)
+    monkeypatch.undo()
+
+    # The restart only runs the missing folds, in a process pool
+    calls = []
+    monkeypatch.setattr(walk_forward, "_run_folds",
+                        lambda folds, *args: calls.append(len(folds)) or run_folds(folds, *args))
+    resumed = run_walk_forward(TEMPLATE, GRID, df, 120, 50, processes=2, checkpoint=path)
+    assert calls == [4]
+    _assert_same_result(resumed, expected)
+
+    # A finished checkpoint is read back without running anything
+    again = run_walk_forward(TEMPLATE, GRID, df, 120, 50, processes=1, checkpoint=path)
+    assert calls == [4, 0]
+    _assert_same_result(again, expected)
+
+    with pytest.raises(ValueError):
+        run_walk_forward(TEMPLATE, GRID, df, 120, 50, metric="sortino", processes=1, checkpoint=path)